@@ -54,9 +54,25 @@ CONFIG_TYPE_ERROR_MESSAGES = {
 
     "dataset_type": "`dataset_type` should be either `dbpedia`, `wikidata` or `yago`",
     "dataset_path": "`dataset_path` should be of type string",
+    "hdt_use_ids": "`hdt_use_ids`, if used, should be 1 or 0 (default 0)",
+    "hdt_threads": "`hdt_threads`, if used, should be a positive integer",
     "sparql_endpoint": "`sparql_endpoint` should be of type string",
+    "sparql_batch_size": "`sparql_batch_size`, if used, should be an integer",
+    "sparql_max_concurrency": "`sparql_max_concurrency`, if used, should be a positive integer",
+    "sparql_max_retries": "`sparql_max_retries`, if used, should be a non-negative integer",
     "uri_limit": "`uri_limit` should be in the config keys if type_walk is `random`, " + \
         "with format: int, or with value `all`",
-    "max_uri": "`max_uri`, if used, should be an integer"
+    "max_uri": "`max_uri`, if used, should be an integer",
+    "workers": "`workers`, if used, should be a positive integer " + \
+        "(number of processes expanding nodes, HDT interface only)",
+    "cache_path": "`cache_path`, if used, should be of type string " + \
+        "(path to the SQLite file caching triple patterns)",
+    "cache_max_size": "`cache_max_size`, if used, should be an integer (size in bytes)",
+    "expansion_cache": "`expansion_cache`, if used, should be of type string " + \
+        "(folder caching the triples of expanded nodes)",
+    "chunk_size": "`chunk_size`, if used, should be a positive integer " + \
+        "(max number of triples of a node processed at once)",
+    "checkpoint_format": "`checkpoint_format`, if used, should be either `csv` or `binary`",
+    "profile": "`profile`, if used, should be 1 or 0 (default 0)"
 
 }
@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+"""
+Asynchronous variant of the SPARQL interface
+
+Requests are sent with an asynchronous HTTP client (aiohttp), through one session
+pooling at most `max_concurrency` connections, with at most `max_concurrency`
+requests in flight. Ingoing and outgoing queries of a node are sent concurrently,
+then all the chunks of the specific outgoing lookup.
+Coroutines run on one event loop per interface, in its own thread: the interface
+can be called from synchronous code as well as from a running event loop.
+Server errors (5xx) and timeouts are retried with exponential backoff,
+other errors are raised as `SPARQLEndpointError` instead of returning no triples.
+"""
+import asyncio
+import threading
+
+import aiohttp
+from rdflib import Graph
+
+from settings import AGENT
+from src.sparql_interface import SPARQLInterface, DEFAULT_PRED
+
+# Content-Type of the response -> rdflib parser
+RDF_FORMATS = {
+    "application/n-triples": "nt",
+    "text/plain": "nt",
+    "text/turtle": "turtle",
+    "application/x-turtle": "turtle",
+    "application/rdf+xml": "xml",
+    "application/ld+json": "json-ld",
+}
+
+
+class SPARQLEndpointError(Exception):
+    """ Query to the SPARQL endpoint failed (after retries for server errors) """
+
+
+class AsyncSPARQLInterface(SPARQLInterface):
+    """
+    SPARQL interface sending concurrent requests through a connection pool
+    """
+    def __init__(self, dataset_config: dict = None,
+                 dates: list[str] = [None, None], default_pred: list[str] = DEFAULT_PRED,
+                 filter_kb: bool = 1, sparql_endpoint: str = "http://dbpedia.org/sparql",
+                 agent: str = AGENT, batch_size: int = 100, max_concurrency: int = 8,
+                 max_retries: int = 3, backoff: float = 0.5, timeout: float = 60):
+        """
+        - `max_concurrency`: int, max number of requests in flight
+        - `max_retries`: int, number of retries on server errors (5xx) and timeouts
+        - `backoff`: float, delay (in seconds) before the first retry, doubled for each retry
+        - `timeout`: float, timeout (in seconds) of one request
+        """
+        SPARQLInterface.__init__(self, dataset_config=dataset_config, dates=dates,
+                                 default_pred=default_pred, filter_kb=filter_kb,
+                                 sparql_endpoint=sparql_endpoint, agent=agent,
+                                 batch_size=batch_size)
+        self.endpoint = sparql_endpoint
+        self.agent = agent
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        self.semaphore, self.session = self._run(self._start)
+
+    async def _start(self) -> (asyncio.Semaphore, aiohttp.ClientSession):
+        """ Limit on the requests in flight and HTTP session,
+        created on the loop of the interface """
+        session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.max_concurrency),
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            headers={"Accept": "application/n-triples", "User-Agent": self.agent},
+            trust_env=False)  # same as the sync interface: no proxy
+        return asyncio.Semaphore(self.max_concurrency), session
+
+    async def _post(self, query: str) -> (int, str, str):
+        """ Status, content type and body of the response to one query """
+        async with self.session.post(self.endpoint, data={"query": query}) as response:
+            return response.status, response.headers.get("Content-Type", ""), \
+                await response.text()
+
+    @staticmethod
+    def _parse(content_type: str, text: str) -> list[(str, str, str)]:
+        """ Triples from the CONSTRUCT response, parsed depending on its content type """
+        graph = Graph()
+        graph.parse(data=text, format=RDF_FORMATS.get(content_type.split(";")[0].strip(),
+                                                      "turtle"))
+        return [(str(sub), str(pred), str(obj)) for (sub, pred, obj) in graph]
+
+    async def _fetch(self, query: str) -> list[(str, str, str)]:
+        """ Sending one query, with retries on server errors and timeouts """
+        async with self.semaphore:
+            error = None
+            for attempt in range(self.max_retries + 1):
+                if attempt:
+                    await asyncio.sleep(self.backoff * 2 ** (attempt - 1))
+                try:
+                    status, content_type, text = await self._post(query)
+                except (asyncio.TimeoutError, aiohttp.ClientError) as exc:
+                    error = repr(exc)
+                    continue
+                if status >= 500:
+                    error = f"HTTP {status}"
+                    continue
+                if status >= 400:
+                    raise SPARQLEndpointError(f"HTTP {status} from {self.endpoint}: {text[:500]}")
+                return self._parse(content_type=content_type, text=text)
+        raise SPARQLEndpointError(
+            f"{self.endpoint} failed after {self.max_retries + 1} attempts: {error}")
+
+    def _run(self, coroutine_f, *args):
+        """ Running a coroutine to completion on the loop of the interface,
+        waiting for its result """
+        return asyncio.run_coroutine_threadsafe(coroutine_f(*args), self.loop).result()
+
+    def get_triples(self, **params: dict[str, str]) -> list[(str, str, str)]:
+        return self._run(self._fetch, self.sparql_query(params=params))
+
+    async def _get_triples_filtered(self, params: dict[str, str], filter_pred: list,
+                                    filter_keep: bool) -> list[(str, str, str)]:
+        """ Same as `SPARQLInterface.get_triples_filtered` """
+        if params.get("predicate"):
+            triples = await self._fetch(self.sparql_query(params=params))
+            res = self._filter_pred(triples=triples, filter_pred=filter_pred,
+                                    filter_keep=filter_keep)
+            self.skipped += len(triples) - len(res)
+            return res
+        if filter_keep:
+            if not filter_pred:
+                return []
+            return await self._fetch(self.sparql_query(params=dict(params,
+                                                                   predicate=filter_pred)))
+        return await self._fetch(self.sparql_query(params=dict(params,
+                                                               predicate_not_in=filter_pred)))
+
+    async def _get_triples_filtered_many(self, list_params: list[dict[str, str]],
+                                         filter_pred: list, filter_keep: bool) \
+                                            -> list[list[(str, str, str)]]:
+        return list(await asyncio.gather(*[
+            self._get_triples_filtered(params=params, filter_pred=filter_pred,
+                                       filter_keep=filter_keep) for params in list_params]))
+
+    def get_triples_filtered_many(self, list_params: list[dict[str, str]], filter_pred: list,
+                                  filter_keep: bool) -> list[list[(str, str, str)]]:
+        """ All requests sent concurrently """
+        return self._run(self._get_triples_filtered_many, list_params, filter_pred,
+                         filter_keep)
+
+    async def _get_triples_many(self, subjects: list[str], predicates: list[str]) \
+        -> list[(str, str, str)]:
+        if not predicates:
+            return []
+        subjects = [str(elt) for elt in subjects if str(elt).startswith("http")]
+        chunks = await asyncio.gather(*[
+            self._fetch(self.sparql_query(params=dict(
+                subject=subjects[i:i+self.batch_size], predicate=predicates)))
+            for i in range(0, len(subjects), self.batch_size)])
+        return [(a, b, c) for triples in chunks for (a, b, c) in triples if b in predicates]
+
+    def get_triples_many(self, subjects: list[str], predicates: list[str]) \
+        -> list[(str, str, str)]:
+        """ Batched lookup: one CONSTRUCT query per chunk of `batch_size` subjects,
+        all chunks sent concurrently """
+        return self._run(self._get_triples_many, subjects, predicates)
+
+    def close(self):
+        """ Closing pooled connections, stopping the event loop """
+        if self.loop.is_running():
+            self._run(self.session.close)
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join()
+            self.loop.close()
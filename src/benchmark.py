@@ -0,0 +1,349 @@
+# -*- coding: utf-8 -*-
+"""
+Reproducible benchmarks of the search, offline
+
+- Micro: `Interface.__call__`, `NodeExpansion`, `Filtering`, `Ordering` and `Ranker`,
+on the hubs and on random events of synthetic KGs (see `src.synthetic_kg`), at several scales
+- `hdt_threads`: `HDTInterface.__call__` on the same KGs split in several documents
+(nested dataset), with 1 to 4 threads querying the documents
+- Macro: full `GraphSearchFramework` runs on the same KGs (with `profile`: timings of
+their stages are saved too, see `src.profiler`)
+- Replay: `Ranker`, `Metrics` and `SubgraphStore` on the recorded outputs
+of the search in `sample-data/French_Revolution_*` (`Ordering` is only run on synthetic KGs,
+with the HDT interface of the KG)
+
+Results are saved as JSON:
+{
+    "meta": {"date": .., "commit": .., "python": .., "params": {..}},
+    "results": {<scale>/<benchmark>: {"times": [..], "min": .., "median": .., "mean": ..,
+                                      <other info>}}
+}
+and can be compared with a previous results file (ratio of medians) to spot regressions.
+
+Usage (from the root of the repo):
+python src/benchmark.py -o <results.json> [-s small medium] [-c <previous.json>]
+"""
+import os
+import sys
+import json
+import random
+import shutil
+import platform
+import subprocess
+from time import perf_counter
+from datetime import datetime
+from typing import Callable
+import numpy as np
+import pandas as pd
+
+from settings import FOLDER_PATH
+from src.hdt_interface import HDTInterface
+from src.expansion import NodeExpansion
+from src.filtering import Filtering
+from src.ordering import Ordering
+from src.ranker import Ranker, PathOccurrences
+from src.metrics import Metrics
+from src.subgraph_store import SubgraphStore
+from src.framework import GraphSearchFramework
+from src.registry import get_dataset_config
+from src.synthetic_kg import DBO, build_synthetic_kg, build_nested_hdt
+
+# Synthetic KGs: name -> parameters of `build_synthetic_kg`
+SCALES = {
+    "small": {"nb_nodes": 1_000, "mean_degree": 5, "alpha": 1.0},
+    "medium": {"nb_nodes": 10_000, "mean_degree": 5, "alpha": 1.0},
+    "large": {"nb_nodes": 100_000, "mean_degree": 5, "alpha": 1.0},
+}
+GS_YEARS = (1750, 1850)
+DATES = [f"{GS_YEARS[0]}-01-01", f"{GS_YEARS[1]}-12-31"]
+RDF_TYPE = [("event", f"{DBO}Event")]
+PREDICATE_FILTER = [f"{DBO}wikiPageWikiLink"]
+FILTERING = {"what": 1, "where": 1, "when": 1, "who": 1}
+# Nested version of the synthetic KGs: number of documents, threads querying them
+NB_DOCS = 4
+HDT_THREADS = [1, 2, 4]
+# Searches run on each synthetic KG: name -> (config update, walk)
+SEARCHES = {
+    "search_pred_object_freq": ({"type_ranking": "pred_object_freq"}, "informed"),
+    "search_entropy_pred_freq": ({"type_ranking": "entropy_pred_freq"}, "informed"),
+    "search_random": ({"uri_limit": 5, "type_ranking": "pred_freq"}, "random"),
+}
+SAMPLE_DATA = os.path.join(FOLDER_PATH, "sample-data")
+
+
+def time_func(func: Callable, repeat: int, warmup: int = 1, number: int = 1) -> dict:
+    """ Wall time of `repeat` runs of `func` (after `warmup` calls, not timed)
+    - `number`: calls per run, for very short functions (time per call is saved) """
+    for _ in range(warmup):
+        func()
+    times = []
+    for _ in range(repeat):
+        start = perf_counter()
+        for _ in range(number):
+            func()
+        times.append((perf_counter() - start) / number)
+    return {"times": times, "min": min(times), "median": float(np.median(times)),
+            "mean": float(np.mean(times))}
+
+
+def get_commit() -> str:
+    """ Current git commit, None if not in a git repository """
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, check=True,
+                              text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def get_nodes(folder: str, info: dict, nb_nodes: int, seed: int = 23) -> list[str]:
+    """ Nodes to expand in micro benchmarks: hubs, and random events of the gold standard """
+    events = pd.read_csv(os.path.join(folder, "gs_events.csv")).linkDBpediaEn.tolist()
+    nb_hubs = nb_nodes // 2
+    return info["hubs"][:nb_hubs] + \
+        random.Random(seed).sample(events, min(nb_nodes - nb_hubs, len(events)))
+
+
+def get_search_config(folder: str, start: str, iterations: int, name_exp: str) -> dict:
+    """ Config of a search on a synthetic KG (see `GraphSearchFramework`) """
+    return {
+        "rdf_type": RDF_TYPE, "predicate_filter": PREDICATE_FILTER, "start": start,
+        "start_date": DATES[0], "end_date": DATES[1], "iterations": iterations,
+        "type_interface": "hdt", "type_metrics": ["precision", "recall", "f1"],
+        "gold_standard": os.path.join(folder, "gs_events.csv"),
+        "referents": os.path.join(folder, "referents.json"),
+        "ordering": {"domain_range": 1}, "filtering": FILTERING,
+        "dataset_type": "dbpedia", "dataset_path": os.path.join(folder, "hdt"),
+        "nested_dataset": 0, "name_exp": name_exp, "profile": 1,
+    }
+
+
+def run_search(config: dict, walk: str, seed: int = 23) -> GraphSearchFramework:
+    """ One search (random choices seeded), its save folder is removed
+    (results are in the framework) """
+    random.seed(seed)
+    framework = GraphSearchFramework(config=config, walk=walk)
+    try:
+        framework()
+    finally:
+        shutil.rmtree(framework.save_folder, ignore_errors=True)
+    return framework
+
+
+def bench_searches(folder: str, info: dict, repeat: int, iterations: int) -> dict:
+    """ Full searches starting from the event with the highest degree """
+    events = set(pd.read_csv(os.path.join(folder, "gs_events.csv")).linkDBpediaEn)
+    start = next((node for node in info["hubs"] if node in events), info["hubs"][0])
+    results = {}
+    for name, (update, walk) in SEARCHES.items():
+        frameworks = []
+        def func():
+            config = get_search_config(folder=folder, start=start, iterations=iterations,
+                                       name_exp=f"benchmark-{name}-{len(frameworks)}")
+            config.update(update)
+            frameworks.append(run_search(config=config, walk=walk))
+        results[name] = time_func(func=func, repeat=repeat, warmup=0)
+        framework = frameworks[-1]
+        results[name].update({
+            "nb_expanded": len(framework.nodes_expanded),
+            "subgraph_size": len(framework.subgraph_store),
+            "metrics": framework.metrics_data.get(framework.last_iteration),
+            "stages": framework.profiler.get_report()["total"]})
+        if walk == "informed":
+            occurences = PathOccurrences(framework.occurence)
+            ranker = Ranker(type_ranking=update["type_ranking"])
+            results[f"ranker_{update['type_ranking']}"] = dict(
+                time_func(func=lambda: ranker(occurences=occurences), repeat=repeat,
+                          number=1000),
+                nb_paths=len(occurences))
+    return results
+
+
+def bench_components(folder: str, info: dict, repeat: int, nb_nodes: int) -> dict:
+    """ Interface, NodeExpansion, Filtering and Ordering on the same nodes """
+    dataset_config = get_dataset_config("dbpedia")
+    interface = HDTInterface(dataset_config=dataset_config, dates=DATES,
+                             folder_hdt=os.path.join(folder, "hdt"), nested_dataset=False)
+    nodes = get_nodes(folder=folder, info=info, nb_nodes=nb_nodes)
+    args_filtering = GraphSearchFramework.get_config_filtering(
+        config={"filtering": FILTERING}, dataset_config=dataset_config)
+    results = {}
+
+    outputs = [interface(node=node, predicate=PREDICATE_FILTER) for node in nodes]
+    results["interface"] = dict(
+        time_func(func=lambda: [interface(node=node, predicate=PREDICATE_FILTER) \
+            for node in nodes], repeat=repeat),
+        nb_nodes=len(nodes), nb_triples=sum(sum(df.shape[0] for df in output) \
+            for output in outputs))
+
+    filtering = Filtering(args=args_filtering)
+    results["filtering"] = time_func(
+        func=lambda: [filtering(ingoing=ingoing, outgoing=outgoing, type_date=type_date,
+                                dates=DATES) for ingoing, outgoing, type_date in outputs],
+        repeat=repeat)
+
+    node_expander = NodeExpansion(rdf_type=RDF_TYPE, args_filtering=args_filtering,
+                                  interface=interface)
+    list_args = [{"node": node, "predicate": PREDICATE_FILTER} for node in nodes]
+    expanded = [node_expander(args=args, dates=DATES) for args in list_args]
+    results["node_expansion"] = time_func(
+        func=lambda: [node_expander(args=args, dates=DATES) for args in list_args],
+        repeat=repeat)
+
+    ordering = Ordering(interface=interface, domain_range=1, focus_for_search=RDF_TYPE[0][1])
+    def func():
+        info_ordering = {}
+        for _, path_ingoing, _, path_outgoing, _ in expanded:
+            _, info_ordering = ordering(triple_df=path_ingoing, type_node="ingoing",
+                                        info=info_ordering, iteration=1)
+            _, info_ordering = ordering(triple_df=path_outgoing, type_node="outgoing",
+                                        info=info_ordering, iteration=1)
+    results["ordering"] = dict(
+        time_func(func=func, repeat=repeat),
+        nb_triples=sum(output[1].shape[0] + output[3].shape[0] for output in expanded))
+    return results
+
+
+def bench_hdt_threads(folder: str, info: dict, repeat: int, nb_nodes: int,
+                      rdf2hdt: str = "rdf2hdt") -> dict:
+    """ Interface on the KG split in `NB_DOCS` documents, for each number of threads
+    querying the documents in `HDT_THREADS` (`hdt_threads` in the config) """
+    folder_hdt = build_nested_hdt(folder=folder, nb_docs=NB_DOCS, rdf2hdt=rdf2hdt)
+    nodes = get_nodes(folder=folder, info=info, nb_nodes=nb_nodes)
+    results = {}
+    for threads in HDT_THREADS:
+        interface = HDTInterface(dataset_config=get_dataset_config("dbpedia"), dates=DATES,
+                                 folder_hdt=folder_hdt, nested_dataset=True, threads=threads)
+        def func(interface=interface):
+            return [interface(node=node, predicate=PREDICATE_FILTER) for node in nodes]
+        try:
+            results[f"hdt_threads_{threads}"] = dict(time_func(func=func, repeat=repeat),
+                                                     nb_docs=NB_DOCS, nb_nodes=len(nodes))
+        finally:
+            interface.close()
+    return results
+
+
+def bench_replay(repeat: int) -> dict:
+    """ Components run on the recorded outputs of the French Revolution search """
+    with open(os.path.join(SAMPLE_DATA, "French_Revolution_config.json"),
+              "r", encoding="utf-8") as openfile:
+        config = json.load(openfile)
+    with open(os.path.join(SAMPLE_DATA, "French_Revolution_occurences.json"),
+              "r", encoding="utf-8") as openfile:
+        occurences = PathOccurrences(json.load(openfile))
+    subgraph = pd.read_csv(os.path.join(SAMPLE_DATA, "French_Revolution_subgraph.csv"),
+                           index_col=0)
+    per_iteration = [df for _, df in subgraph.groupby("iteration", sort=True)]
+    results = {}
+
+    ranker = Ranker(type_ranking=config["type_ranking"])
+    results["ranker"] = dict(time_func(func=lambda: ranker(occurences=occurences),
+                                       repeat=repeat, number=1000),
+                             nb_paths=len(occurences))
+
+    metrics = Metrics(config_metrics={
+        "referents": os.path.join(SAMPLE_DATA, "French_Revolution_referents.json"),
+        "gold_standard": os.path.join(SAMPLE_DATA, "French_Revolution_gs_events.csv"),
+        "type_metrics": config["type_metrics"]})
+    def func():
+        subgraph_store, metrics_data = SubgraphStore(), {}
+        for df_iteration in per_iteration:
+            iteration = int(df_iteration.iteration.iloc[0])
+            subgraph_store.append(df_iteration, iteration=iteration)
+            metrics_data = metrics.update_metrics_data(
+                metrics_data=metrics_data, iteration=iteration,
+                found=subgraph_store.get_events())
+        return metrics_data
+    results["subgraph_metrics"] = dict(time_func(func=func, repeat=repeat),
+                                       nb_triples=subgraph.shape[0],
+                                       nb_iterations=len(per_iteration))
+    return results
+
+
+def run_benchmarks(scales: list[str], repeat: int = 5, iterations: int = 5,
+                   nb_nodes: int = 10, folder: str = None, rdf2hdt: str = "rdf2hdt") -> dict:
+    """ All benchmarks
+    - `scales`: synthetic KGs to run on (keys of SCALES)
+    - `repeat`: number of timed runs of each benchmark
+    - `iterations`: number of iterations of the searches
+    - `nb_nodes`: number of nodes expanded in micro benchmarks
+    - `folder`: where synthetic KGs are saved (and reused), default `<FOLDER_PATH>/benchmark`
+    - `rdf2hdt`: path to the `rdf2hdt` binary of hdt-cpp, to convert synthetic KGs """
+    folder = folder or os.path.join(FOLDER_PATH, "benchmark")
+    output = {
+        "meta": {"date": str(datetime.now()), "commit": get_commit(),
+                 "python": sys.version, "platform": platform.platform(),
+                 "params": {"scales": {scale: SCALES[scale] for scale in scales},
+                            "repeat": repeat, "iterations": iterations,
+                            "nb_nodes": nb_nodes}},
+        "results": {}
+    }
+    for name, result in bench_replay(repeat=repeat).items():
+        output["results"][f"replay/{name}"] = result
+
+    for scale in scales:
+        print(f"Benchmarks on synthetic KG `{scale}` started at {datetime.now()}")
+        folder_kg = os.path.join(folder, scale)
+        info = build_synthetic_kg(folder=folder_kg, rdf2hdt=rdf2hdt, gs_years=GS_YEARS,
+                                  **SCALES[scale])
+        output["meta"][scale] = {key: val for key, val in info.items() if key != "hubs"}
+        results = bench_components(folder=folder_kg, info=info, repeat=repeat,
+                                   nb_nodes=nb_nodes)
+        results.update(bench_hdt_threads(folder=folder_kg, info=info, repeat=repeat,
+                                         nb_nodes=nb_nodes, rdf2hdt=rdf2hdt))
+        results.update(bench_searches(folder=folder_kg, info=info, repeat=repeat,
+                                      iterations=iterations))
+        for name, result in results.items():
+            output["results"][f"{scale}/{name}"] = result
+    return output
+
+
+def compare_results(previous: dict, current: dict, threshold: float = 0.1) -> dict:
+    """ Ratio of median times (current / previous) of benchmarks in both results,
+    with whether it is a regression (ratio > 1 + `threshold`) """
+    return {name: {"ratio": result["median"] / previous["results"][name]["median"],
+                   "regression": result["median"] > \
+                        (1 + threshold) * previous["results"][name]["median"]} \
+        for name, result in current["results"].items() \
+            if name in previous["results"] and previous["results"][name]["median"] > 0}
+
+
+if __name__ == '__main__':
+    import argparse
+    ap = argparse.ArgumentParser()
+    ap.add_argument("-o", "--output", required=True,
+                    help="Path to the JSON file to save the results in")
+    ap.add_argument("-s", "--scales", nargs="+", default=["small", "medium"],
+                    help=f"Synthetic KGs to run on, among {list(SCALES)}")
+    ap.add_argument("-r", "--repeat", default=5, type=int,
+                    help="Number of timed runs of each benchmark")
+    ap.add_argument("-i", "--iterations", default=5, type=int,
+                    help="Number of iterations of the searches")
+    ap.add_argument("-n", "--nb_nodes", default=10, type=int,
+                    help="Number of nodes expanded in micro benchmarks")
+    ap.add_argument("-f", "--folder", default=None,
+                    help="Folder of the synthetic KGs (default: <FOLDER_PATH>/benchmark)")
+    ap.add_argument("--rdf2hdt", default="rdf2hdt",
+                    help="Path to the `rdf2hdt` binary of hdt-cpp")
+    ap.add_argument("-c", "--compare", default=None,
+                    help="Path to previous results, to compare with")
+    ap.add_argument("-t", "--threshold", default=0.1, type=float,
+                    help="Slowdown above which a benchmark is flagged as a regression")
+    args_main = vars(ap.parse_args())
+
+    OUTPUT = run_benchmarks(scales=args_main["scales"], repeat=args_main["repeat"],
+                            iterations=args_main["iterations"], nb_nodes=args_main["nb_nodes"],
+                            folder=args_main["folder"], rdf2hdt=args_main["rdf2hdt"])
+    with open(args_main["output"], "w", encoding="utf-8") as openfile_main:
+        json.dump(OUTPUT, openfile_main, indent=4)
+
+    for NAME, RESULT in OUTPUT["results"].items():
+        print(f"{NAME}\t{RESULT['median']:.3g}s")
+    if args_main["compare"]:
+        with open(args_main["compare"], "r", encoding="utf-8") as openfile_main:
+            PREVIOUS = json.load(openfile_main)
+        for NAME, COMPARISON in compare_results(
+                previous=PREVIOUS, current=OUTPUT,
+                threshold=args_main["threshold"]).items():
+            FLAG = "REGRESSION" if COMPARISON["regression"] else ""
+            print(f"{NAME}\tx{COMPARISON['ratio']:.2f}\t{FLAG}")
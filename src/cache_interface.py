@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+"""
+On-disk cache of triple patterns, wrapping any Interface subclass
+
+Every (subject, predicate, object) pattern sent to the KG is stored in a SQLite file,
+that can be shared across runs (and processes) of the search on the same dataset.
+Least recently used patterns are evicted once the cache gets bigger than `max_size`.
+"""
+import os
+import json
+import hashlib
+import sqlite3
+
+from src.interface import Interface
+
+
+class CachedInterface(Interface):
+    """
+    Wrapper around an interface (e.g. HDTInterface, SPARQLInterface):
+    queries go through the cache first, and only missing patterns are sent to the KG
+    """
+    def __init__(self, interface: Interface, cache_path: str,
+                 max_size: int = 2 * 1024**3):
+        """
+        - `interface`: Interface subclass to wrap
+        - `cache_path`: path to the SQLite file (created if it doesn't exist)
+        - `max_size`: int, max size (in bytes) of the cached triples
+        """
+        Interface.__init__(self, dataset_config=interface.dataset_config,
+                           dates=[interface.start_date, interface.end_date],
+                           default_pred=interface.pred, filter_kb=interface.filter_kb)
+        self.interface = interface
+        self.cache_path = cache_path
+        self.max_size = max_size
+
+        self.hits = 0
+        self.misses = 0
+
+        folder = os.path.dirname(cache_path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+        self.connection = sqlite3.connect(cache_path, timeout=60)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS triples " + \
+                "(pattern TEXT PRIMARY KEY, triples TEXT, size INTEGER, last_access INTEGER)")
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS triples_last_access ON triples (last_access)")
+        self.connection.commit()
+        self.access = self._get_last_access()
+        self.size = self._get_size()
+
+    def __getattr__(self, name: str):
+        """ Attributes specific to the wrapped interface (e.g. `docs` for HDT) """
+        if name == "interface":
+            raise AttributeError(name)
+        return getattr(self.interface, name)
+
+    def _get_last_access(self) -> int:
+        res = self.connection.execute("SELECT MAX(last_access) FROM triples").fetchone()[0]
+        return res if res else 0
+
+    def _get_size(self) -> int:
+        res = self.connection.execute("SELECT SUM(size) FROM triples").fetchone()[0]
+        return res if res else 0
+
+    @staticmethod
+    def get_pattern(subject: str = "", predicate: str = "", object_t: str = "") -> str:
+        """ Normalised key of a triple pattern, empty string = variable """
+        return json.dumps([str(subject or ""), str(predicate or ""), str(object_t or "")])
+
+    @staticmethod
+    def get_filtered_pattern(pattern: str, filter_pred: list, filter_keep: bool) -> str:
+        """ Key of a triple pattern with a predicate filter,
+        the filter is hashed to keep keys short """
+        digest = hashlib.sha1(json.dumps(sorted(set(str(pred) for pred in filter_pred))) \
+            .encode("utf-8")).hexdigest()[:16]
+        return f"{pattern}|{'keep' if filter_keep else 'drop'}:{digest}"
+
+    def _get(self, pattern: str):
+        """ Cached triples for `pattern`, None if not cached """
+        row = self.connection.execute(
+            "SELECT triples FROM triples WHERE pattern = ?", (pattern,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.access += 1
+        self.connection.execute(
+            "UPDATE triples SET last_access = ? WHERE pattern = ?", (self.access, pattern))
+        return [tuple(triple) for triple in json.loads(row[0])]
+
+    def _set(self, pattern: str, triples: list[(str, str, str)]):
+        content = json.dumps([[str(a), str(b), str(c)] for (a, b, c) in triples])
+        self.access += 1
+        self.connection.execute(
+            "INSERT OR REPLACE INTO triples VALUES (?, ?, ?, ?)",
+            (pattern, content, len(content), self.access))
+        self.size += len(content)
+
+    def _evict(self):
+        """ Removing least recently used patterns until size is below `max_size` """
+        if self.size <= self.max_size:
+            return
+        # Other processes may write to the same file: checking real size first
+        size = self._get_size()
+        rows = self.connection.execute(
+            "SELECT pattern, size FROM triples ORDER BY last_access ASC").fetchall()
+        to_remove = []
+        for pattern, curr_size in rows:
+            if size <= self.max_size:
+                break
+            to_remove.append((pattern,))
+            size -= curr_size
+        self.connection.executemany("DELETE FROM triples WHERE pattern = ?", to_remove)
+        self.size = size
+
+    def _commit(self):
+        self._evict()
+        self.connection.commit()
+
+    def get_triples(self, **params: dict) -> list[(str, str, str)]:
+        """ Querying cache, then KG if pattern not cached """
+        pattern = self.get_pattern(subject=params.get("subject"),
+                                   predicate=params.get("predicate"),
+                                   object_t=params.get("object"))
+        triples = self._get(pattern)
+        if triples is None:
+            triples = self.interface.get_triples(**params)
+            self._set(pattern, triples)
+        self._commit()
+        return triples
+
+    def get_triples_filtered(self, params: dict[str, str], filter_pred: list,
+                             filter_keep: bool) -> list[(str, str, str)]:
+        """ Querying cache, then KG (with the predicate filter pushed down)
+        if pattern + filter not cached """
+        return self.get_triples_filtered_many(list_params=[params], filter_pred=filter_pred,
+                                              filter_keep=filter_keep)[0]
+
+    def get_triples_filtered_many(self, list_params: list[dict[str, str]], filter_pred: list,
+                                  filter_keep: bool) -> list[list[(str, str, str)]]:
+        """ Querying cache, then KG for all patterns + filter not cached,
+        in one call to the wrapped interface (e.g. concurrent requests) """
+        patterns = [self.get_filtered_pattern(
+            pattern=self.get_pattern(subject=params.get("subject"),
+                                     predicate=params.get("predicate"),
+                                     object_t=params.get("object")),
+            filter_pred=filter_pred, filter_keep=filter_keep) for params in list_params]
+        results = [self._get(pattern) for pattern in patterns]
+        missing = [index for index, triples in enumerate(results) if triples is None]
+        if missing:
+            fetched = self.interface.get_triples_filtered_many(
+                list_params=[list_params[index] for index in missing],
+                filter_pred=filter_pred, filter_keep=filter_keep)
+            for index, triples in zip(missing, fetched):
+                self._set(patterns[index], triples)
+                results[index] = triples
+        self._commit()
+        return results
+
+    def get_triples_many(self, subjects: list[str], predicates: list[str]) \
+        -> list[(str, str, str)]:
+        """ Batched lookup: one (s, p, ?) pattern cached per subject/predicate pair,
+        all missing subjects are sent to the wrapped interface in one batch """
+        triples, missing = [], []
+        for subject in subjects:
+            curr_triples = []
+            for predicate in predicates:
+                cached = self._get(self.get_pattern(subject=subject, predicate=predicate))
+                if cached is None:
+                    missing.append(str(subject))
+                    break
+                curr_triples += cached
+            else:
+                triples += curr_triples
+
+        if missing:
+            res = {(subject, predicate): [] for subject in missing for predicate in predicates}
+            for (sub, pred, obj) in self.interface.get_triples_many(
+                    subjects=missing, predicates=predicates):
+                if (str(sub), str(pred)) in res:
+                    res[(str(sub), str(pred))].append((sub, pred, obj))
+            for (subject, predicate), curr_triples in res.items():
+                self._set(self.get_pattern(subject=subject, predicate=predicate), curr_triples)
+                triples += curr_triples
+
+        self._commit()
+        return triples
+
+    def get_stats(self) -> dict:
+        """ Hit/miss counters of the cache """
+        return {"hits": self.hits, "misses": self.misses}
+
+    def get_pushdown_stats(self) -> dict:
+        """ Counters of the predicate filter of the wrapped interface (cache misses only) """
+        return self.interface.get_pushdown_stats()
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+Append-only binary checkpoint of the search
+
+Instead of rewriting the whole subgraph/pending nodes/occurences at each iteration,
+one record per iteration is appended to `checkpoint.bin`, with only what changed:
+- subgraph: new rows (integer columns) + new values of the vocabulary
+- frontier: operations applied to the pending nodes (added triples, expanded nodes)
+- expanded, nodes_expanded_per_iter, discarded: new rows
+- occurences, paths: values of the keys touched (updated, added or removed) during the
+iteration, recorded as they happen (see `PathOccurrences.pop_journal`)
+- metrics: metrics of the iteration
+
+Record = header (iteration, payload size) + pickled payload.
+`Checkpoint.read` replays records to get the state at any iteration,
+an incomplete last record (e.g. process killed while writing) is ignored.
+"""
+import os
+import pickle
+import struct
+from typing import Union
+
+import pandas as pd
+from pandas.core.frame import DataFrame
+
+from src.frontier import Frontier
+from src.subgraph_store import SubgraphStore
+
+HEADER = struct.Struct("<IQ")
+TABLES = ["expanded", "nodes_expanded_per_iter", "discarded"]
+DICTS = ["occurences", "paths"]
+
+
+def diff_dict(curr: dict, keys: set) -> dict:
+    """ Current values of the `keys` touched, `keys` removed from `curr` """
+    return {"set": {key: curr[key] for key in keys if key in curr},
+            "removed": [key for key in keys if key not in curr]}
+
+
+def apply_diff(curr: dict, diff: dict) -> dict:
+    """ Applying a diff of `diff_dict`, keys removed may have been added and removed
+    during the same iteration """
+    for key in diff["removed"]:
+        curr.pop(key, None)
+    curr.update(diff["set"])
+    return curr
+
+
+class Checkpoint:
+    """
+    Writing (and reading) the per-iteration deltas of the search state
+    """
+    def __init__(self, path: str, frontier: Frontier):
+        """
+        - `path`: path to the checkpoint file
+        - `frontier`: frontier of the search, its operations are recorded from now on
+        """
+        self.path = path
+        self.subgraph_offsets = (0, 0)  # rows, values
+        self.table_offsets = {name: 0 for name in TABLES}
+        frontier.pop_journal()
+
+    def write(self, iteration: int, subgraph_store: SubgraphStore, frontier: Frontier,
+              tables: dict[str, DataFrame], dicts: dict[str, tuple[dict, set]],
+              metrics: dict) -> int:
+        """ Appending the delta since last call, returns the number of bytes written
+        - `tables`: name -> dataframe only growing (see TABLES)
+        - `dicts`: name -> (dict, keys touched since last call) (see DICTS) """
+        delta = {
+            "subgraph": subgraph_store.get_delta(*self.subgraph_offsets),
+            "frontier": frontier.pop_journal(),
+            "tables": {name: df.iloc[self.table_offsets[name]:] \
+                for name, df in tables.items()},
+            "dicts": {name: diff_dict(curr, keys) for name, (curr, keys) in dicts.items()},
+            "metrics": metrics,
+        }
+        self._set_offsets(subgraph_store=subgraph_store, tables=tables)
+
+        payload = pickle.dumps(delta, protocol=pickle.HIGHEST_PROTOCOL)
+        with open(self.path, "ab") as openfile:
+            openfile.write(HEADER.pack(iteration, len(payload)) + payload)
+            openfile.flush()
+            os.fsync(openfile.fileno())
+        return HEADER.size + len(payload)
+
+    def _set_offsets(self, subgraph_store: SubgraphStore, tables: dict[str, DataFrame]):
+        """ Next delta computed from this state """
+        self.subgraph_offsets = (len(subgraph_store), len(subgraph_store.values))
+        self.table_offsets.update({name: df.shape[0] for name, df in tables.items()})
+
+    def restore(self, state: dict):
+        """ Resuming the checkpoint from `state` (returned by `read`),
+        the next record only contains the changes made after it """
+        self._set_offsets(subgraph_store=state["subgraph_store"], tables=state["tables"])
+
+    @staticmethod
+    def iter_records(path: str):
+        """ (iteration, delta) for each complete record of the file """
+        with open(path, "rb") as openfile:
+            while True:
+                header = openfile.read(HEADER.size)
+                if len(header) < HEADER.size:
+                    return
+                iteration, size = HEADER.unpack(header)
+                payload = openfile.read(size)
+                if len(payload) < size:
+                    return
+                yield iteration, pickle.loads(payload)
+
+    @staticmethod
+    def read(path: str, iteration: Union[int, None] = None) -> dict:
+        """ State of the search at the end of `iteration` (last one if None):
+        subgraph_store, frontier, tables, dicts, metrics, last iteration """
+        state = {"subgraph_store": SubgraphStore(), "frontier": Frontier(),
+                 "tables": {}, "dicts": {name: {} for name in DICTS},
+                 "metrics": {}, "iteration": None}
+        for curr_it, delta in Checkpoint.iter_records(path):
+            if iteration is not None and curr_it > iteration:
+                break
+            state["subgraph_store"].extend(delta["subgraph"])
+            state["frontier"].replay(delta["frontier"])
+            for name, rows in delta["tables"].items():
+                state["tables"][name] = pd.concat([state["tables"][name], rows]) \
+                    if name in state["tables"] else rows
+            for name, diff in delta["dicts"].items():
+                apply_diff(state["dicts"].setdefault(name, {}), diff)
+            if delta["metrics"] is not None:
+                state["metrics"][curr_it] = delta["metrics"]
+            state["iteration"] = curr_it
+        return state
@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""
+Compact binary format for the domain/range/superclasses lookup tables
+
+Instead of one JSON dict of lists per table, the three tables of a dataset are stored
+in one file `domain-range-pred/{dataset}-domain-range.bin`, read through a memory map:
+- terms (predicates/classes) are interned: sorted (utf-8 bytes) and identified by their
+rank, stored as one blob of bytes + offsets
+- each table is stored as CSR arrays: sorted ids of its keys, `indptr` and `indices`
+(values of the i-th key = `indices[indptr[i]:indptr[i+1]]`)
+
+Opening the file parses a small JSON header only, and all processes opening it share
+the same pages of the OS cache.
+
+File = MAGIC + header size (uint64) + JSON header (array -> dtype, offset, length)
++ arrays aligned on 8 bytes.
+"""
+import json
+import struct
+from bisect import bisect_left
+from collections.abc import Mapping
+from functools import lru_cache
+from typing import Iterator
+
+import numpy as np
+
+MAGIC = b"DRINFO1\n"
+HEADER_SIZE = struct.Struct("<Q")
+ALIGN = 8
+CACHE_SIZE = 2**16
+
+
+def write_domain_range_store(path: str, tables: dict[str, dict[str, list[str]]]):
+    """ Saving `tables` (name -> {key: list of values}) in the binary format """
+    terms = sorted({term.encode("utf-8") for table in tables.values() \
+        for key, values in table.items() for term in [key] + list(values)})
+    term_ids = {term.decode("utf-8"): index for index, term in enumerate(terms)}
+
+    arrays = {
+        "strings": np.frombuffer(b"".join(terms), dtype=np.uint8),
+        "offsets": np.cumsum([0] + [len(term) for term in terms], dtype=np.int64),
+    }
+    for name, table in tables.items():
+        keys = sorted(table, key=lambda key: term_ids[key])
+        arrays[f"{name}.keys"] = np.array([term_ids[key] for key in keys], dtype=np.int32)
+        arrays[f"{name}.indptr"] = np.cumsum(
+            [0] + [len(table[key]) for key in keys], dtype=np.int64)
+        arrays[f"{name}.indices"] = np.array(
+            [term_ids[val] for key in keys for val in table[key]], dtype=np.int32)
+
+    header, offset = {}, 0
+    for name, array in arrays.items():
+        header[name] = {"dtype": array.dtype.str, "offset": offset, "length": len(array)}
+        offset += -(-array.nbytes // ALIGN) * ALIGN
+    header = json.dumps({"tables": list(tables), "arrays": header}).encode("utf-8")
+
+    with open(path, "wb") as openfile:
+        openfile.write(MAGIC + HEADER_SIZE.pack(len(header)) + header)
+        openfile.write(b"\0" * (-openfile.tell() % ALIGN))
+        start = openfile.tell()
+        for name, array in arrays.items():
+            openfile.write(array.tobytes())
+            openfile.write(b"\0" * (-(openfile.tell() - start) % ALIGN))
+
+
+class DomainRangeStore:
+    """ Memory-mapped file of `write_domain_range_store`, tables accessed by name """
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as openfile:
+            if openfile.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a domain/range binary file")
+            header = json.loads(openfile.read(
+                HEADER_SIZE.unpack(openfile.read(HEADER_SIZE.size))[0]))
+            start = openfile.tell()
+        start += -start % ALIGN
+
+        buffer = np.memmap(path, dtype=np.uint8, mode="r")
+        self.arrays = {}
+        for name, info in header["arrays"].items():
+            dtype = np.dtype(info["dtype"])
+            offset = start + info["offset"]
+            self.arrays[name] = buffer[offset:offset + info["length"] * dtype.itemsize] \
+                .view(dtype)
+        self.strings = self.arrays["strings"]
+        self.offsets = self.arrays["offsets"]
+        self.tables = {name: DomainRangeTable(store=self, name=name) \
+            for name in header["tables"]}
+
+        self.get_id = lru_cache(maxsize=CACHE_SIZE)(self._get_id)
+
+    def __len__(self) -> int:
+        """ Number of interned terms """
+        return len(self.offsets) - 1
+
+    def __getitem__(self, name: str) -> "DomainRangeTable":
+        return self.tables[name]
+
+    def get_term(self, term_id: int) -> str:
+        """ Term from its id """
+        return self._get_bytes(term_id).decode("utf-8")
+
+    def _get_bytes(self, term_id: int) -> bytes:
+        return self.strings[self.offsets[term_id]:self.offsets[term_id + 1]].tobytes()
+
+    def _get_id(self, term: str) -> int:
+        """ Id of a term (binary search on sorted terms), -1 if unknown """
+        term = term.encode("utf-8")
+        index = bisect_left(range(len(self)), term, key=self._get_bytes)
+        return index if index < len(self) and self._get_bytes(index) == term else -1
+
+    def get_ids(self, terms: list[str]) -> np.ndarray:
+        """ Ids of known terms """
+        ids = [self.get_id(term) for term in terms]
+        return np.array([term_id for term_id in ids if term_id >= 0], dtype=np.int32)
+
+
+class DomainRangeTable(Mapping):
+    """ One table of the store (e.g. `range`), read-only dict of term -> list of terms """
+    def __init__(self, store: DomainRangeStore, name: str):
+        self.store = store
+        self.keys_ids = store.arrays[f"{name}.keys"]
+        self.indptr = store.arrays[f"{name}.indptr"]
+        self.indices = store.arrays[f"{name}.indices"]
+
+        self.get_values = lru_cache(maxsize=CACHE_SIZE)(self._get_values)
+
+    def _get_row(self, key: str) -> int:
+        """ Row of `key` in the table, -1 if absent """
+        term_id = self.store.get_id(str(key))
+        if term_id < 0:
+            return -1
+        row = int(np.searchsorted(self.keys_ids, term_id))
+        return row if row < len(self.keys_ids) and self.keys_ids[row] == term_id else -1
+
+    def _get_values(self, key: str) -> list[str]:
+        row = self._get_row(key)
+        if row < 0:
+            raise KeyError(key)
+        return [self.store.get_term(term_id) for term_id in \
+            self.indices[self.indptr[row]:self.indptr[row + 1]]]
+
+    def __getitem__(self, key: str) -> list[str]:
+        return self.get_values(key)
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and self._get_row(key) >= 0
+
+    def __len__(self) -> int:
+        return len(self.keys_ids)
+
+    def __iter__(self) -> Iterator[str]:
+        return (self.store.get_term(term_id) for term_id in self.keys_ids)
+
+    def keys_with_any_value(self, values: list[str]) -> list[str]:
+        """ Keys whose values contain at least one of `values` (in one pass on arrays) """
+        positions = np.flatnonzero(np.isin(self.indices, self.store.get_ids(values)))
+        rows = np.unique(np.searchsorted(self.indptr, positions, side="right") - 1)
+        return [self.store.get_term(term_id) for term_id in self.keys_ids[rows]]
+
+
+def keys_with_any_value(table: Mapping, values: list[str]) -> list[str]:
+    """ Keys of `table` whose values contain at least one of `values`,
+    `table` being a dict (JSON file) or a DomainRangeTable """
+    if isinstance(table, DomainRangeTable):
+        return table.keys_with_any_value(values)
+    return [key for key, key_values in table.items() \
+        if any(elt in key_values for elt in values)]
+
+
+if __name__ == '__main__':
+    # Converting JSON files previously extracted (from repo directory)
+    # python src/domain_range_store.py -dt dbpedia
+    import os
+    import argparse
+    from settings import FOLDER_PATH
+    from src.registry import DOMAIN_RANGE_INFO, get_domain_range_path
+
+    ap = argparse.ArgumentParser()
+    ap.add_argument('-dt', "--dataset_type", required=True,
+                    help="type of dataset, JSON files `domain-range-pred/{dataset_type}-*.json`")
+    DATASET_TYPE = vars(ap.parse_args())["dataset_type"]
+
+    TABLES = {}
+    for NAME in DOMAIN_RANGE_INFO:
+        with open(os.path.join(FOLDER_PATH, "domain-range-pred", f"{DATASET_TYPE}-{NAME}.json"),
+                  "r", encoding="utf-8") as openfile_main:
+            TABLES[NAME] = json.load(openfile_main)
+    write_domain_range_store(path=get_domain_range_path(DATASET_TYPE), tables=TABLES)
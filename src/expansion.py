@@ -4,12 +4,16 @@ Expanding one node by retrieving its ingoing and outgoing edges
 Filtering subgraph and pending nodes to be explored
 """
 import os
-import json
-from collections import defaultdict
+from typing import Iterator
+import pandas as pd
 from pandas.core.frame import DataFrame
 
 from settings import FOLDER_PATH
 from src.filtering import Filtering
+from src.registry import get_domain_range_info
+from src.domain_range_store import keys_with_any_value
+from src.expansion_cache import ExpansionCache
+from src.profiler import NULL_PROFILER
 from src.hdt_interface import HDTInterface
 
 class NodeExpansion:
@@ -21,7 +25,7 @@ class NodeExpansion:
     """
 
     def __init__(self, rdf_type: list[tuple], args_filtering: dict,
-                 interface):
+                 interface, expansion_cache: ExpansionCache = None):
         """
         - `rdf_type`: list of tuples (<type_uri>, <URI>),
         e.g. ["event", "http://dbpedia.org/ontology/Event"]
@@ -42,21 +46,25 @@ class NodeExpansion:
         Three implemented: HDTInterface, TriplInterface, SPARQLInterface
         BUT in practice, experiments with HDTInterface only
         --> TriplInterface and SPARQLInterface obsolete
+        - `expansion_cache`: on-disk cache of the (unfiltered) triples of expanded nodes,
+        None if not used
         """
         self.interface = interface
+        self.expansion_cache = expansion_cache
+        # Timings of the expansion (see `src.profiler`), set by the search framework
+        self.profiler = NULL_PROFILER
         self.rdf_type = rdf_type
         self._check_args()
 
         self.mapping = {uri: name for (name, uri) in rdf_type}
 
         self.filtering = Filtering(args=args_filtering)
-        self.superclasses = defaultdict(list)
 
         self.dataset_type = interface.dataset_config["config_type"]
-        info_folder = os.path.join(FOLDER_PATH, "domain-range-pred")
-        with open(os.path.join(info_folder, f"{self.dataset_type}-superclasses.json"),
-                  "r", encoding="utf-8") as openfile:
-            self.superclasses = json.load(openfile)
+        self.superclasses = get_domain_range_info(self.dataset_type, "superclasses")
+        # Classes of nodes to retrieve: classes in `rdf_type` or with superclass in it
+        self.types_to_keep = keys_with_any_value(self.superclasses, list(self.mapping.keys())) \
+            + list(self.mapping.keys()) if self.mapping else []
 
     def _check_args(self):
         """ Checking params when instantiating the class """
@@ -78,7 +86,13 @@ class NodeExpansion:
     def _get_output_triples(self, node: str, predicate: list[str]) \
         -> (DataFrame, DataFrame, DataFrame):
         """ Getting ingoing, outgoing and specific outgoing nodes """
-        return self.interface(node=node, predicate=predicate)
+        if self.expansion_cache is None:
+            return self.interface(node=node, predicate=predicate)
+        output = self.expansion_cache.get(node=node, predicate=predicate)
+        if output is None:
+            output = self.interface(node=node, predicate=predicate)
+            self.expansion_cache.set(node=node, predicate=predicate, output=output)
+        return output
 
     def filter_sub_graph(self, type_date_df, triple_ingoing, triple_outgoing, dates) \
         -> (DataFrame, DataFrame, DataFrame, DataFrame, list[str]):
@@ -86,13 +100,18 @@ class NodeExpansion:
         return self._filter_sub_graph(type_date_df, triple_ingoing, triple_outgoing, dates)
 
     def _filter_sub_graph(self, type_date_df: DataFrame, triple_ingoing: DataFrame,
-                          triple_outgoing: DataFrame, dates: list[str, str]) \
+                          triple_outgoing: DataFrame, dates: list[str, str],
+                          no_type_date: bool = None) \
                             -> (DataFrame, DataFrame, DataFrame, DataFrame, list[str]):
-        """ Filtering subgraph: nodes to be removed, nodes to be kept, other """
+        """ Filtering subgraph: nodes to be removed, nodes to be kept, other
+        `no_type_date`: whether no neighbour of the node expanded has type/date info,
+        default: `type_date_df` is empty (if not streamed by chunks) """
+        if no_type_date is None:
+            no_type_date = type_date_df.shape[0] == 0
 
         # Edge case: type_date_df is empty
         # --> we assume that the ingoing/outgoing nodes are not relevant for the search
-        if type_date_df.shape[0] == 0:
+        if no_type_date:
             to_keep = []
             to_discard = list(triple_ingoing.subject.unique()) + \
                 list(triple_outgoing.object.unique())
@@ -101,15 +120,9 @@ class NodeExpansion:
             to_discard = self.filtering(ingoing=triple_ingoing, outgoing=triple_outgoing,
                                         type_date=type_date_df, dates=dates)
 
-            if self.mapping:
-                filtered = [k for k, sup_class in self.superclasses.items() \
-                    if any(elt in sup_class for elt in self.mapping.keys())] + \
-                        list(self.mapping.keys())
-            else:
-                filtered = []
             # Filter on types of nodes that should be retrieved
             to_keep = list(type_date_df[(~type_date_df.subject.isin(to_discard)) & \
-                (type_date_df.object.isin(filtered))].subject.unique())
+                (type_date_df.object.isin(self.types_to_keep))].subject.unique())
 
         return triple_ingoing[triple_ingoing.subject.isin(to_keep)], \
             triple_ingoing[~triple_ingoing.subject.isin(to_discard)], \
@@ -117,16 +130,112 @@ class NodeExpansion:
             triple_outgoing[~triple_outgoing.object.isin(to_discard)], \
             to_discard
 
+    @staticmethod
+    def _split_output(output: (DataFrame, DataFrame, DataFrame), chunk_size: int) \
+        -> Iterator[tuple[DataFrame, DataFrame, DataFrame]]:
+        """ Output of a node (e.g. cached) split as streamed by `interface.iter_chunks` """
+        ingoing, outgoing, types_date = output
+        empty = [ingoing.iloc[:0], outgoing.iloc[:0]]
+        if ingoing.shape[0] + outgoing.shape[0] == 0:
+            yield ingoing, outgoing, types_date.iloc[:0]
+        for index, (triple_df, column) in enumerate([(ingoing, "subject"), (outgoing, "object")]):
+            for start in range(0, triple_df.shape[0], chunk_size):
+                chunk = triple_df.iloc[start:start+chunk_size]
+                res = list(empty)
+                res[index] = chunk
+                yield res[0], res[1], \
+                    types_date[types_date.subject.isin(chunk[column].unique())]
+
+    def _iter_caching(self, node: str, predicate: list[str], chunk_size: int) \
+        -> Iterator[tuple[DataFrame, DataFrame, DataFrame]]:
+        """ Chunks of the interface, whole output of the node saved in the expansion cache
+        once all chunks were streamed (not saved if the stream is stopped before) """
+        chunks = []
+        for chunk in self.interface.iter_chunks(node=node, predicate=predicate,
+                                                chunk_size=chunk_size):
+            chunks.append(chunk)
+            yield chunk
+        self.expansion_cache.set(node=node, predicate=predicate, output=tuple(
+            pd.concat([chunk[i] for chunk in chunks]).drop_duplicates() \
+                .reset_index(drop=True) for i in range(3)))
+
+    def _iter_output_chunks(self, node: str, predicate: list[str], chunk_size: int) \
+        -> Iterator[tuple[DataFrame, DataFrame, DataFrame]]:
+        """ Chunks of (ingoing, outgoing, specific outgoing) triples of the node,
+        from the expansion cache if cached, timed in stage `kg_query` """
+        if self.expansion_cache is not None:
+            with self.profiler.stage("kg_query"):
+                output = self.expansion_cache.get(node=node, predicate=predicate)
+            chunks = self._split_output(output=output, chunk_size=chunk_size) \
+                if output is not None \
+                    else self._iter_caching(node=node, predicate=predicate, chunk_size=chunk_size)
+        else:
+            chunks = self.interface.iter_chunks(node=node, predicate=predicate,
+                                                chunk_size=chunk_size)
+        while True:
+            with self.profiler.stage("kg_query"):
+                chunk = next(chunks, None)
+            if chunk is None:
+                return
+            self.profiler.add("kg_query", triples=sum(triple_df.shape[0] for triple_df in chunk))
+            yield chunk
+
+    def _filter_chunk(self, chunk: tuple[DataFrame, DataFrame, DataFrame],
+                      dates: list[str, str], no_type_date: bool) \
+                        -> (DataFrame, DataFrame, DataFrame, DataFrame, list[str]):
+        ingoing, outgoing, types_date = chunk
+        with self.profiler.stage("filtering"):
+            return self._filter_sub_graph(type_date_df=types_date, triple_ingoing=ingoing,
+                                          triple_outgoing=outgoing, dates=dates,
+                                          no_type_date=no_type_date)
+
+    def iter_chunks(self, args: dict, dates: list[str, str], chunk_size: int,
+                    max_held: int = 10) \
+        -> Iterator[tuple[DataFrame, DataFrame, DataFrame, DataFrame, list[str]]]:
+        """ Same as __call__, with the triples of the node streamed by chunks of at most
+        `chunk_size` triples: one filtered output per chunk
+        Chunks are held back until one of them has type/date info, since if none has,
+        all ingoing and outgoing nodes are discarded (see `_filter_sub_graph`).
+        At most `max_held` chunks are held: past that, the rest of the node is only scanned
+        for type/date info, then all its chunks are streamed again """
+        node, predicate = args["node"], args["predicate"]
+        chunks = self._iter_output_chunks(node=node, predicate=predicate, chunk_size=chunk_size)
+        held, no_type_date = [], True
+        for chunk in chunks:
+            if len(held) == max_held:
+                held = None
+                no_type_date = chunk[2].shape[0] == 0 and \
+                    not any(other[2].shape[0] > 0 for other in chunks)
+                break
+            held.append(chunk)
+            if chunk[2].shape[0] > 0:
+                no_type_date = False
+                break
+
+        if held is None:
+            chunks.close()
+            held = []
+            chunks = self._iter_output_chunks(node=node, predicate=predicate,
+                                              chunk_size=chunk_size)
+        for chunk in held:
+            yield self._filter_chunk(chunk=chunk, dates=dates, no_type_date=no_type_date)
+        for chunk in chunks:
+            yield self._filter_chunk(chunk=chunk, dates=dates, no_type_date=no_type_date)
+
     def __call__(self, args: dict, dates: list[str, str]) \
         -> (DataFrame, DataFrame, DataFrame, DataFrame, list[str]):
 
         # Querying knowledge base
-        ingoing, outgoing, types_date = self._get_output_triples(
-            node=args["node"], predicate=args["predicate"])
+        with self.profiler.stage("kg_query"):
+            ingoing, outgoing, types_date = self._get_output_triples(
+                node=args["node"], predicate=args["predicate"])
+        self.profiler.add("kg_query", triples=ingoing.shape[0] + outgoing.shape[0] + \
+            types_date.shape[0])
 
         # Filter subgraph to keep
-        return self._filter_sub_graph(type_date_df=types_date, triple_ingoing=ingoing,
-                                      triple_outgoing=outgoing, dates=dates)
+        with self.profiler.stage("filtering"):
+            return self._filter_sub_graph(type_date_df=types_date, triple_ingoing=ingoing,
+                                          triple_outgoing=outgoing, dates=dates)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+On-disk cache of node expansions, shared across runs of the search
+
+The raw output of the KG for one node (ingoing, outgoing and specific outgoing triples,
+before any narrative filtering) only depends on the node, the predicate filter and
+the dataset settings. Runs that only differ by `filtering`, `ordering` or `type_ranking`
+(e.g. a grid search) can hence reuse it, filtering is still applied live on top.
+
+One file per expansion, named after the hash of its key (content-addressed):
+`<folder>/<2 first chars of hash>/<hash>.npz`, with the distinct values of the three
+dataframes stored once (utf-8 bytes + offsets) and each dataframe as integer columns.
+"""
+import os
+import json
+import hashlib
+from tempfile import NamedTemporaryFile
+
+import numpy as np
+import pandas as pd
+from pandas.core.frame import DataFrame
+
+VERSION = 1
+TYPE_DF = ["ingoing", "outgoing", "spec. outgoing"]
+URI_COLUMNS = ["subject", "predicate", "object"]
+
+
+class ExpansionCache:
+    """
+    Cached (ingoing, outgoing, types_date) dataframes of expanded nodes
+    """
+    def __init__(self, folder: str, dataset: str, interface):
+        """
+        - `folder`: folder of the cache (created if it doesn't exist)
+        - `dataset`: identifier of the dataset queried, e.g. path to HDT files or endpoint
+        - `interface`: interface used for the expansions, its settings are part of the keys
+        """
+        self.folder = folder
+        self.settings = {
+            "version": VERSION, "dataset": dataset,
+            "dataset_type": interface.dataset_config["config_type"],
+            "filter_kb": int(interface.filter_kb),
+            "default_pred": sorted(set(str(pred) for pred in interface.pred)),
+        }
+
+        self.hits = 0
+        self.misses = 0
+
+        if not os.path.exists(folder):
+            os.makedirs(folder, exist_ok=True)
+
+    def get_key(self, node: str, predicate: list[str]) -> str:
+        """ Hash of the expansion of `node` with predicate filter `predicate` """
+        content = dict(self.settings, node=str(node),
+                       predicate=sorted(set(str(pred) for pred in predicate)))
+        return hashlib.sha1(json.dumps(content, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def _get_path(self, key: str) -> str:
+        return os.path.join(self.folder, key[:2], f"{key}.npz")
+
+    def get(self, node: str, predicate: list[str]) \
+        -> (DataFrame, DataFrame, DataFrame):
+        """ Cached output of the expansion, None if not cached """
+        path = self._get_path(self.get_key(node=node, predicate=predicate))
+        if not os.path.exists(path):
+            self.misses += 1
+            return None
+        self.hits += 1
+        with np.load(path, allow_pickle=False) as arrays:
+            blob, offsets = arrays["strings"].tobytes(), arrays["offsets"]
+            values = np.array([blob[start:end].decode("utf-8") for start, end in \
+                zip(offsets[:-1], offsets[1:])], dtype=object)
+            return tuple(self._get_df(arrays=arrays, values=values, type_df=type_df) \
+                for type_df in TYPE_DF)
+
+    @staticmethod
+    def _get_df(arrays, values: np.ndarray, type_df: str) -> DataFrame:
+        index = arrays[f"{type_df}.index"]
+        triple_df = pd.DataFrame(
+            {col: values[arrays[f"{type_df}.{col}"]].tolist() for col in URI_COLUMNS})
+        triple_df["type_df"] = [type_df] * len(index)
+        triple_df.index = index
+        return triple_df
+
+    def set(self, node: str, predicate: list[str],
+            output: (DataFrame, DataFrame, DataFrame)):
+        """ Saving the output of the expansion (written atomically) """
+        vocab, arrays = {}, {}
+        for type_df, triple_df in zip(TYPE_DF, output):
+            arrays[f"{type_df}.index"] = triple_df.index.values.astype(np.int64)
+            for col in URI_COLUMNS:
+                codes, uniques = pd.factorize(triple_df[col].astype(str))
+                ids = np.array([vocab.setdefault(value, len(vocab)) for value in uniques],
+                               dtype=np.int32)
+                arrays[f"{type_df}.{col}"] = ids[codes]
+        encoded = [value.encode("utf-8") for value in vocab]
+        arrays["strings"] = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        arrays["offsets"] = np.cumsum([0] + [len(value) for value in encoded], dtype=np.int64)
+
+        path = self._get_path(self.get_key(node=node, predicate=predicate))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with NamedTemporaryFile(dir=os.path.dirname(path), suffix=".tmp",
+                                delete=False) as openfile:
+            np.savez_compressed(openfile, **arrays)
+        os.replace(openfile.name, path)
+
+    def get_stats(self) -> dict:
+        """ Hit/miss counters of the cache """
+        return {"hits": self.hits, "misses": self.misses}
@@ -6,11 +6,12 @@ import json
 import argparse
 from copy import deepcopy
 from collections import defaultdict
-import yaml
 from tqdm import tqdm
 
 from src.hdt_interface import HDTInterface
 from src.sparql_interface import SPARQLInterface
+from src.registry import get_dataset_config, get_domain_range_path
+from src.domain_range_store import write_domain_range_store
 from settings import FOLDER_PATH
 
 
@@ -30,10 +31,7 @@ class ExtractDomainRange:
 
         # Parameters for the HDT interface
         self.filter_kb = 1
-        with open(
-            os.path.join(FOLDER_PATH, "dataset-config", f"{dataset_type}.yaml"),
-                        encoding='utf-8') as file:
-            self.dataset_config = yaml.load(file, Loader=yaml.FullLoader)
+        self.dataset_config = get_dataset_config(dataset_type)
         self.pred = []
 
         # Loading HDT Interface
@@ -212,3 +210,8 @@ if __name__ == '__main__':
     ]:
         with open(os.path.join(SAVE_FOLDER, save_name), 'w', encoding='utf-8') as openfile:
             json.dump(data, openfile, indent=4)
+
+    # Compact binary version, used instead of JSON files for the search
+    write_domain_range_store(
+        path=get_domain_range_path(DATASET_TYPE),
+        tables={"superclasses": SUPERCLASSES, "domain": DOMAIN_PRED, "range": RANGE_PRED})
@@ -9,8 +9,14 @@ Filtering class: Filtering out certain types of nodes
     - Filtering on pending nodes (nodes that could be expanded): same than above but for expansion
         --> removed from expandable nodes space
 """
-import re
+import pandas as pd
 from pandas.core.frame import DataFrame
+from pandas.core.series import Series
+
+# First 4 digits in a URI, e.g. 1997_National_Championships
+YEAR_REGEX = r"(\d{4})"
+# yyyy, yyyy-mm or yyyy-mm-dd at the beginning of a literal, -yyyy.. for years BCE
+DATE_REGEX = r'^"?(?P<year>-?\d{4})(?:-(?P<month>\d{2}))?(?:-(?P<day>\d{2}))?'
 
 class Filtering:
     """
@@ -49,28 +55,46 @@ class Filtering:
             if val in args and args[val] not in [0, 1]:
                 raise ValueError(f"`{val}` value from args should be 0 or 1 (int)")
 
-    def get_to_discard_date(self, date_df: DataFrame, dates: list[str]) -> DataFrame:
+    @staticmethod
+    def parse_dates(values: Series) -> (Series, Series):
+        """ Dates as integer keys (yyyymmdd), parsed once for all values
+        Returns earliest and latest day matching each value
+        (e.g. `1789` -> 17890101, 17891231), NaN if no date could be parsed
+        Years BCE are negative: only comparable with dates CE """
+        parts = values.astype(str).str.extract(DATE_REGEX)
+        year = pd.to_numeric(parts["year"], errors="coerce")
+        month = pd.to_numeric(parts["month"], errors="coerce")
+        day = pd.to_numeric(parts["day"], errors="coerce")
+        earliest = year * 10000 + month.fillna(1) * 100 + day.fillna(1)
+        latest = year * 10000 + month.fillna(12) * 100 + day.fillna(31)
+        return earliest, latest
+
+    def _get_date_mask(self, type_date: DataFrame, dates: list[str]) -> Series:
+        """ Rows of `type_date` with a date outside of `dates`
+        (only values of temporal predicates are parsed) """
+        start, _ = self.parse_dates(pd.Series([dates[0]]))
+        _, end = self.parse_dates(pd.Series([dates[1]]))
+        date_df = type_date[type_date.predicate.isin(self.time["temporal"])]
+        earliest, latest = self.parse_dates(date_df.object)
+
+        point_in_time = date_df.predicate.isin(self.time["point_in_time"])
+        ends_before = (date_df.predicate.isin(self.time["end_dates"]) | point_in_time) & \
+            (latest < start[0])
+        starts_after = (date_df.predicate.isin(self.time["start_dates"]) | point_in_time) & \
+            (earliest > end[0])
+        return (ends_before | starts_after).reindex(type_date.index, fill_value=False)
+
+    def get_to_discard_date(self, date_df: DataFrame, dates: list[str]) -> list[str]:
         """ Filtering on temporal dimension
         - checking date/start date/end date """
-
-        return list(date_df[((date_df.predicate.isin(self.time["end_dates"])) & \
-                             (date_df.object < dates[0])) | \
-                            ((date_df.predicate.isin(self.time["start_dates"])) & \
-                             (date_df.object > dates[1])) | \
-                            ((date_df.predicate.isin(self.time["point_in_time"])) & \
-                             (date_df.object < dates[0])) | \
-                            ((date_df.predicate.isin(self.time["point_in_time"])) & \
-                             (date_df.object > dates[1]))].subject.unique())
+        return list(date_df.subject[self._get_date_mask(date_df, dates)].unique())
 
     @staticmethod
-    def regex_helper(val: str, default_return_val: str) -> str:
-        """ Finding regex column name in subject str uri """
-        pattern = "\\d{4}"
-        matches = re.findall(pattern, val)
-        if matches:
-            return str(matches[0])
-        return default_return_val
-
+    def _get_to_discard_year(nodes: Series, dates: list[str]) -> list[str]:
+        """ Nodes whose URI contains a year outside of `dates` """
+        nodes = pd.Series(nodes.unique(), dtype=object).astype(str)
+        year = pd.to_numeric(nodes.str.extract(YEAR_REGEX, expand=False), errors="coerce")
+        return list(nodes[(year < int(dates[0][:4])) | (year > int(dates[1][:4]))])
 
     def get_to_discard_regex(self, ingoing: DataFrame,
                              outgoing: DataFrame, dates: list[str]) \
@@ -78,23 +102,8 @@ class Filtering:
         """ Filtering on string uri
         - temporal dimension: regex on the URL (and therefore name of the events,
             e.g. 1997_National_Championships > non relevant """
-        if ingoing.shape[0] > 0:
-            ingoing['regex_helper']= ingoing["subject"].apply(
-                lambda x: self.regex_helper(x, dates[0][:4]))
-            ingoing_discard = list(ingoing[(ingoing.regex_helper < dates[0][:4]) | \
-                                       (ingoing.regex_helper > dates[1][:4])].subject.unique())
-        else:
-            ingoing_discard = []
-
-        if outgoing.shape[0] > 0:
-            outgoing['regex_helper']= outgoing["object"].apply(
-                lambda x: self.regex_helper(x, dates[0][:4]))
-            outgoing_discard = list(outgoing[(outgoing.regex_helper < dates[0][:4]) | \
-                                         (outgoing.regex_helper > dates[1][:4])].object.unique())
-        else:
-            outgoing_discard = []
-
-        return ingoing_discard + outgoing_discard
+        return self._get_to_discard_year(nodes=ingoing.subject, dates=dates) + \
+            self._get_to_discard_year(nodes=outgoing.object, dates=dates)
 
     def get_to_discard_location(self, df_pd: DataFrame) -> list[str]:
         """ Location filter: retrieving nodes that correspond to locations
@@ -113,26 +122,21 @@ class Filtering:
                  type_date: DataFrame, dates: list[str]) -> list[str]:
         """
         Extracting list of nodes to discard from search space
+        All masks on `type_date` are combined before selecting nodes,
+        input dataframes are not modified
         """
-        date_df = type_date[type_date.predicate.isin(self.time["temporal"])]
-        date_df.object = date_df.object.astype(str)
-
-        to_discard = []
-
-        if self.where:
-            to_discard += list(set(self.get_to_discard_entity(
-                df_pd=type_date, filter_type=self.places)))
+        mask = pd.Series(False, index=type_date.index)
+        filter_type = (self.places if self.where else []) + (self.people if self.who else [])
+        if filter_type:
+            mask |= type_date.object.isin(filter_type)
 
-        if self.who:
-            to_discard += list(set(self.get_to_discard_entity(
-                df_pd=type_date, filter_type=self.people)))
+        if dates and self.when and self.time:
+            mask |= self._get_date_mask(type_date, dates)
 
-        if dates:
-            if self.when and self.time:
-                to_discard += list(set(self.get_to_discard_date(date_df=date_df, dates=dates)))
+        to_discard = list(type_date.subject[mask].unique())
 
-            if self.when and self.dataset_type in ["dbpedia"]:
-                to_discard += list(set(self.get_to_discard_regex(ingoing=ingoing, outgoing=outgoing,
-                                                                dates=dates)))
+        if dates and self.when and self.dataset_type in ["dbpedia"]:
+            to_discard += self.get_to_discard_regex(ingoing=ingoing, outgoing=outgoing,
+                                                    dates=dates)
 
-        return to_discard
+        return list(dict.fromkeys(to_discard))
@@ -4,29 +4,50 @@ Main class for the informed graph traversal
 """
 import os
 import json
+import pickle
 import random
 import multiprocessing as mp
+from typing import Iterator
 from datetime import datetime
 from collections import defaultdict
 from tqdm import tqdm
 
-import yaml
-from ray.util.multiprocessing import Pool
-
+import numpy as np
 import pandas as pd
 from pandas.core.frame import DataFrame
+from pandas.core.series import Series
 from settings import FOLDER_PATH
-from src.ranker import Ranker
+from src.ranker import Ranker, PathOccurrences
 from src.metrics import Metrics
 from src.ordering import Ordering
 from src.expansion import NodeExpansion
 from src.selecting_node import NodeSelection
+from src.frontier import Frontier
+from src.subgraph_store import SubgraphStore
+from src.checkpoint import Checkpoint
+from src.parallel_expansion import ParallelExpansion
+from src.registry import get_dataset_config
 from src.hdt_interface import HDTInterface
 from src.triply_interface import TriplInterface
 from src.sparql_interface import SPARQLInterface
+from src.async_sparql_interface import AsyncSPARQLInterface
+from src.cache_interface import CachedInterface
+from src.expansion_cache import ExpansionCache
+from src.profiler import Profiler, NULL_PROFILER
 from doc.check_config_framework import CONFIG_TYPE_ERROR_MESSAGES \
     as config_error_messages
 
+# Attributes saved after each iteration, to resume an interrupted search
+SEARCH_STATE = [
+    "last_iteration", "subgraph_store", "subgraph_info", "frontier", "occurence",
+    "to_expand", "score_expansion", "nodes_expanded", "nodes_expanded_per_iter",
+    "expanded", "discarded", "metrics_data", "info", "path_node_to_start",
+    "path_found", "it_found", "checkpoint"]
+# With a binary checkpoint: not saved with the search state, rebuilt from the checkpoint
+CHECKPOINT_STATE = [
+    "subgraph_store", "frontier", "occurence", "nodes_expanded", "nodes_expanded_per_iter",
+    "expanded", "discarded", "metrics_data", "path_node_to_start", "checkpoint"]
+
 
 class GraphSearchFramework:
     """
@@ -36,7 +57,8 @@ class GraphSearchFramework:
                  mode: str = "search_type_node_metrics",
                  node_selection: str = "all",
                  walk: str = "informed",
-                 keep_only_last: bool = True):
+                 keep_only_last: bool = True,
+                 resume_from: str = None):
         """
         - `config`: config for the search,
         examples in `configs-example` folder
@@ -52,6 +74,8 @@ class GraphSearchFramework:
             * `random`: no ranker or best path, select nodes randomly for next iteration
         - `keep_only_last`: boolean, keep only files from the latest iteration 
         (useful because very disk space consuming)
+        - `resume_from`: save folder of an interrupted run with the same config,
+        the search restarts after the last iteration saved in this folder
 
         Additional `max_uri`
         When the number of nodes visited gets higher than `max_uri`, the search stops
@@ -105,7 +129,8 @@ class GraphSearchFramework:
             raise ValueError(f"`mode` should be one of the followings: {possible_modes}")
         self.mode = mode
 
-        self.possible_type_interface = ["triply", "hdt", "sparql_endpoint"]
+        self.possible_type_interface = [
+            "triply", "hdt", "sparql_endpoint", "async_sparql_endpoint"]
         self.possible_type_ranking = [
             "pred_freq", "inverse_pred_freq", "entropy_pred_freq",
             "pred_object_freq", "inverse_pred_object_freq", "entropy_pred_object_freq"]
@@ -116,10 +141,7 @@ class GraphSearchFramework:
         self.type_interface = config["type_interface"]
 
         self.dataset_type = config["dataset_type"]
-        with open(
-            os.path.join(FOLDER_PATH, "dataset-config", f"{config['dataset_type']}.yaml"),
-            encoding='utf-8') as file:
-            self.dataset_config = yaml.load(file, Loader=yaml.FullLoader)
+        self.dataset_config = get_dataset_config(self.dataset_type)
 
         self.config = config
         self.rdf_type = config["rdf_type"] if "rdf_type" in config else []
@@ -142,24 +164,55 @@ class GraphSearchFramework:
             self.interface = SPARQLInterface(dataset_config=self.dataset_config, dates=self.dates,
                                              default_pred=self.get_pred_interface(),
                                              filter_kb=filter_kb,
-                                             sparql_endpoint=config["sparql_endpoint"])
+                                             sparql_endpoint=config["sparql_endpoint"],
+                                             batch_size=config.get("sparql_batch_size", 100))
+        elif self.type_interface == "async_sparql_endpoint":
+            self.interface = AsyncSPARQLInterface(
+                dataset_config=self.dataset_config, dates=self.dates,
+                default_pred=self.get_pred_interface(), filter_kb=filter_kb,
+                sparql_endpoint=config["sparql_endpoint"],
+                batch_size=config.get("sparql_batch_size", 100),
+                max_concurrency=config.get("sparql_max_concurrency", 8),
+                max_retries=config.get("sparql_max_retries", 3))
         else:  # type_interface == "hdt"
             nested = config["nested_dataset"] if "nested_dataset" in config else 1
             pred = self.get_pred_interface()
-            self.interface = HDTInterface(filter_kb=filter_kb, folder_hdt=config["dataset_path"],
-                                          dataset_config=self.dataset_config, nested_dataset=nested,
-                                          default_pred=pred)
-
-        self.subgraph = pd.DataFrame(columns=[
-            "subject", "predicate", "object", "type_df", "iteration"])
+            self.args_interface = {
+                "filter_kb": filter_kb, "folder_hdt": config["dataset_path"],
+                "dataset_config": self.dataset_config, "nested_dataset": nested,
+                "default_pred": pred, "use_ids": config.get("hdt_use_ids", 0),
+                "threads": config.get("hdt_threads", 1)
+            }
+            self.interface = HDTInterface(**self.args_interface)
+
+        # CACHE (shared across runs, not for triply)
+        if "cache_path" in config and self.type_interface != "triply":
+            self.interface = CachedInterface(
+                interface=self.interface, cache_path=config["cache_path"],
+                max_size=config.get("cache_max_size", 2 * 1024**3))
+
+        # EXPANSION CACHE (unfiltered triples of expanded nodes, shared across runs)
+        self.expansion_cache = None
+        if "expansion_cache" in config and self.type_interface != "triply":
+            self.expansion_cache = ExpansionCache(
+                folder=config["expansion_cache"],
+                dataset=os.path.realpath(config["dataset_path"]) \
+                    if self.type_interface == "hdt" else config["sparql_endpoint"],
+                interface=self.interface)
+
+        self.subgraph_store = SubgraphStore()
         self.subgraph_info = {}
 
-        self.pending_nodes_ingoing = pd.DataFrame(columns=["subject", "predicate", "object"])
-        self.pending_nodes_outgoing = pd.DataFrame(columns=["subject", "predicate", "object"])
+        self.frontier = Frontier()
         self.info = pd.DataFrame(columns=["path", "iteration", "tot"] + \
             [x for elt in self.rdf_type for x in [f"{elt[0]}"] ])
 
         self.nb_cpu = mp.cpu_count()
+        # Parallel expansion (HDT only): workers opening HDT documents once
+        self.workers = config.get("workers", 1)
+        # Streamed expansion: at most `chunk_size` triples of a node in memory at once
+        self.chunk_size = config.get("chunk_size") if self.type_interface != "triply" else None
+        self.parallel_expansion = None
         self.paths = []
 
         # RANKER
@@ -186,7 +239,7 @@ class GraphSearchFramework:
 
 
         self.nodes_expanded = []
-        self.occurence = defaultdict(int)
+        self.occurence = PathOccurrences()
         self.to_expand = None
         self.score_expansion = None
         self.nodes_expanded_per_iter = pd.DataFrame(columns=["iteration", "node_expanded"])
@@ -219,24 +272,68 @@ class GraphSearchFramework:
             self.predicate_filter += [self.dataset_config["rdf_type"]]
 
 
+        self.args_filtering = self.get_config_filtering(
+            config=config, dataset_config=self.dataset_config)
         self.node_expander = NodeExpansion(rdf_type=self.rdf_type,
                                            interface=self.interface,
-                                           args_filtering=self.get_config_filtering(
-                                            config=config, dataset_config=self.dataset_config))
+                                           args_filtering=self.args_filtering,
+                                           expansion_cache=self.expansion_cache)
+
+        # PROFILING: timings of the stages of each iteration, saved in `timings.json`
+        self.profiler = Profiler() if config.get("profile") else NULL_PROFILER
+        self.interface.profiler = self.profiler
+        self.node_expander.profiler = self.profiler
 
         self.path_node_to_start = defaultdict(list)
+        # keys of `path_node_to_start` touched since the last checkpoint record
+        self.paths_journal = set()
         self.path_found = False
         self.it_found = None
 
         self.folder_name_suffix = \
             self.get_exp_name(config=config)
-        self.save_folder = self._add_save_info()
+        if resume_from is None:
+            self.save_folder = self._add_save_info()
+            self.resumed_state = None
+        else:
+            self.save_folder = resume_from
+            self.resumed_state = self._load_search_state()
+
+        # SAVING: csv (full state rewritten at each iteration) or binary (deltas only)
+        self.checkpoint = None
+        if config.get("checkpoint_format", "csv") == "binary":
+            self.checkpoint = Checkpoint(path=os.path.join(self.save_folder, "checkpoint.bin"),
+                                         frontier=self.frontier)
+            self.occurence.pop_journal()
 
         # max_uri
         self.max_uri = config["max_uri"] if "max_uri" in config else float("inf")
 
         self.last_iteration = None
 
+    @property
+    def subgraph(self) -> DataFrame:
+        """ Subgraph found so far (materialised from the subgraph store) """
+        return self.subgraph_store.to_df()
+
+    @property
+    def pending_nodes_ingoing(self) -> DataFrame:
+        """ Pending ingoing triples (materialised from the frontier) """
+        return self.frontier.to_df(type_node="ingoing")
+
+    @pending_nodes_ingoing.setter
+    def pending_nodes_ingoing(self, triple_df: DataFrame):
+        self.frontier.reset(triple_df=triple_df, type_node="ingoing")
+
+    @property
+    def pending_nodes_outgoing(self) -> DataFrame:
+        """ Pending outgoing triples (materialised from the frontier) """
+        return self.frontier.to_df(type_node="outgoing")
+
+    @pending_nodes_outgoing.setter
+    def pending_nodes_outgoing(self, triple_df: DataFrame):
+        self.frontier.reset(triple_df=triple_df, type_node="outgoing")
+
     def get_pred_interface(self) -> list[(str, str)]:
         """ Specific predicates for retrieving info with interface """
         res = []
@@ -318,12 +415,24 @@ class GraphSearchFramework:
                 raise ValueError(self.config_error_messages['dataset_path'])
             if not isinstance(config["dataset_path"], str):
                 raise TypeError(self.config_error_messages['dataset_path'])
+            if "hdt_use_ids" in config and config["hdt_use_ids"] not in [0, 1]:
+                raise TypeError(self.config_error_messages['hdt_use_ids'])
+            if "hdt_threads" in config and \
+                not (isinstance(config["hdt_threads"], int) and config["hdt_threads"] >= 1):
+                raise TypeError(self.config_error_messages['hdt_threads'])
 
-        if config["type_interface"] == "sparql_endpoint":
+        if config["type_interface"] in ["sparql_endpoint", "async_sparql_endpoint"]:
             if "sparql_endpoint" not in config:
                 raise ValueError(self.config_error_messages['sparql_endpoint'])
             if not isinstance(config["sparql_endpoint"], str):
                 raise TypeError(self.config_error_messages['sparql_endpoint'])
+            if "sparql_batch_size" in config and \
+                not isinstance(config["sparql_batch_size"], int):
+                raise TypeError(self.config_error_messages['sparql_batch_size'])
+            for key, min_value in [("sparql_max_concurrency", 1), ("sparql_max_retries", 0)]:
+                if key in config and \
+                    not (isinstance(config[key], int) and config[key] >= min_value):
+                    raise TypeError(self.config_error_messages[key])
 
         # OPTIONAL FOR ALL
         # `predicate_filter`
@@ -362,6 +471,32 @@ class GraphSearchFramework:
             if not isinstance(config["max_uri"], int):
                 raise TypeError(self.config_error_messages['max_uri'])
 
+        if "workers" in config:
+            if not isinstance(config["workers"], int) or config["workers"] < 1:
+                raise TypeError(self.config_error_messages['workers'])
+
+        if "cache_path" in config:
+            if not isinstance(config["cache_path"], str):
+                raise TypeError(self.config_error_messages['cache_path'])
+        if "cache_max_size" in config:
+            if not isinstance(config["cache_max_size"], int):
+                raise TypeError(self.config_error_messages['cache_max_size'])
+
+        if "expansion_cache" in config:
+            if not isinstance(config["expansion_cache"], str):
+                raise TypeError(self.config_error_messages['expansion_cache'])
+
+        if "chunk_size" in config:
+            if not isinstance(config["chunk_size"], int) or config["chunk_size"] < 1:
+                raise TypeError(self.config_error_messages['chunk_size'])
+
+        if "checkpoint_format" in config and \
+            config["checkpoint_format"] not in ["csv", "binary"]:
+            raise TypeError(self.config_error_messages['checkpoint_format'])
+
+        if "profile" in config and config["profile"] not in [0, 1]:
+            raise TypeError(self.config_error_messages['profile'])
+
 
         # MANDATORY FOR MODE 1: search type + metrics
         # `rdf_type` (for search type and if ordering domain range)
@@ -434,28 +569,15 @@ class GraphSearchFramework:
             if (";" in self.to_expand) and ("ingoing" in self.to_expand):
                 splitted = self.to_expand.replace('ingoing-', '').split(";")
                 pred, obj = splitted[0], ";".join(splitted[1:])
-                nodes = list(
-                    self.pending_nodes_ingoing[
-                        (self.pending_nodes_ingoing.predicate.isin([pred, str(pred)])) & \
-                        (self.pending_nodes_ingoing.object.isin([obj, str(obj)]))].subject.values)
+                nodes = self.frontier.get_nodes_ingoing(predicate=pred, object_t=obj)
             elif (";" in self.to_expand) and ("outgoing" in self.to_expand):
                 subj, pred = self.to_expand.replace('outgoing-', '').split(";")
-                nodes = list(
-                    self.pending_nodes_outgoing[
-                        (self.pending_nodes_outgoing.predicate.isin([pred, str(pred)])) & \
-                        (self.pending_nodes_outgoing.subject \
-                            .isin([subj, str(subj)]))].object.values)
+                nodes = self.frontier.get_nodes_outgoing(predicate=pred, subject=subj)
             else:
-                # print(self.pending_nodes_ingoing.predicate.unique())
-                nodes = list(self.pending_nodes_ingoing[\
-                    self.pending_nodes_ingoing.predicate.isin(
-                        [self.to_expand])].subject.values) + \
-                        list(self.pending_nodes_outgoing[\
-                    self.pending_nodes_outgoing.predicate.isin(
-                        [self.to_expand])].object.values)
-                # print(nodes)
+                nodes = self.frontier.get_nodes_ingoing(predicate=self.to_expand).union(
+                    self.frontier.get_nodes_outgoing(predicate=self.to_expand))
 
-            nodes = list(set([node for node in nodes if node not in self.nodes_expanded]))
+            nodes = sorted(node for node in nodes if node not in self.frontier.expanded)
 
             # Sampling nodes if too many compared to max uri
             if len(nodes) > self.max_uri - len(self.nodes_expanded):
@@ -466,9 +588,7 @@ class GraphSearchFramework:
                 nodes, _ = self.node_selection(nodes)
 
         else:  # self.walk == "random"
-            candidates = set(list(self.pending_nodes_ingoing.subject.unique()) + \
-                list(self.pending_nodes_outgoing.object.unique()))
-            candidates = {node for node in candidates if node not in self.nodes_expanded}
+            candidates = sorted(self.frontier.get_candidates() - self.frontier.expanded)
             if isinstance(self.uri_limit, int):  # sampling a subset of nodes
                 if len(list(candidates)) < self.uri_limit:
                     nodes = list(candidates)
@@ -479,7 +599,8 @@ class GraphSearchFramework:
                 # Sampling nodes if too many compared to max uri
                 if len(candidates) > self.max_uri - len(self.nodes_expanded):
                     random.seed(23)
-                    nodes = random.sample(candidates, k=self.max_uri - len(self.nodes_expanded))
+                    nodes = random.sample(list(candidates),
+                                          k=self.max_uri - len(self.nodes_expanded))
                 else:
                     nodes = list(candidates)
             path = self._extract_paths_from_candidates(nodes)
@@ -491,25 +612,23 @@ class GraphSearchFramework:
         """ Extract paths from randomly sampled nodes """
         path = []
         for node in nodes:
-            subset_ingoing = self.pending_nodes_ingoing[\
-                self.pending_nodes_ingoing.subject.isin([node])]
-            subset_outgoing = self.pending_nodes_outgoing[\
-                self.pending_nodes_outgoing.object.isin([node])]
-
-            if subset_ingoing.shape[0] == 0:  # only outgoing
-                sample = subset_outgoing.sample().iloc[0]
-                path.append(f"outgoing-{sample.subject};{sample.predicate}")
-            elif subset_outgoing.shape[0] == 0:  # only ingoing
-                sample = subset_ingoing.sample().iloc[0]
-                path.append(f"ingoing-{sample.predicate};{sample.object}")
+            subset_ingoing = self.frontier.get_triples(node=node, type_node="ingoing")
+            subset_outgoing = self.frontier.get_triples(node=node, type_node="outgoing")
+
+            if not subset_ingoing:  # only outgoing
+                subj, pred, _ = random.choice(subset_outgoing)
+                path.append(f"outgoing-{subj};{pred}")
+            elif not subset_outgoing:  # only ingoing
+                _, pred, obj = random.choice(subset_ingoing)
+                path.append(f"ingoing-{pred};{obj}")
             else:  # ingoing and outgoing
-                type_path = random.sample(["in", "out"], k=1)
+                type_path = random.choice(["in", "out"])
                 if type_path == "in":
-                    sample = subset_ingoing.sample().iloc[0]
-                    path.append(f"ingoing-{sample.predicate};{sample.object}")
+                    _, pred, obj = random.choice(subset_ingoing)
+                    path.append(f"ingoing-{pred};{obj}")
                 else:
-                    sample = subset_ingoing.sample().iloc[0]
-                    path.append(f"ingoing-{sample.predicate};{sample.object}")
+                    subj, pred, _ = random.choice(subset_outgoing)
+                    path.append(f"outgoing-{subj};{pred}")
 
         return path
 
@@ -517,6 +636,18 @@ class GraphSearchFramework:
         -> (DataFrame, DataFrame, DataFrame, DataFrame, list[str]):
         return self.node_expander(args=args, dates=self.dates)
 
+    def _get_parallel_expansion(self) -> ParallelExpansion:
+        """ Pool of workers, each with its own HDTInterface and NodeExpansion """
+        cache = None
+        if isinstance(self.interface, CachedInterface):
+            cache = {"cache_path": self.interface.cache_path,
+                     "max_size": self.interface.max_size}
+        return ParallelExpansion(
+            workers=self.workers, args_interface=self.args_interface,
+            args_expansion={"rdf_type": self.rdf_type, "args_filtering": self.args_filtering,
+                            "expansion_cache": self.expansion_cache},
+            cache=cache)
+
     def _update_nodes_expanded(self, iteration:int, nodes: list[str]) -> DataFrame:
 
         self.nodes_expanded_per_iter = pd.concat(
@@ -528,45 +659,81 @@ class GraphSearchFramework:
     def run_one_iteration(self, iteration: int) \
         -> (list[(DataFrame, DataFrame, DataFrame, DataFrame, list[str])], list[str], str):
         """ Running one iteration of the search framework """
-        nodes_to_expand, path = self._select_nodes_to_expand(iteration)
+        with self.profiler.stage("select"):
+            nodes_to_expand, path = self._select_nodes_to_expand(iteration)
         self._update_nodes_expanded(iteration=iteration, nodes=nodes_to_expand)
 
-        if self.type_interface == '':
-            pool = Pool(self.nb_cpu)
-            output = pool.map(self._expand_one_node,
-                                [{
-                                    "node": node,
-                                    "path": path,
-                                    "predicate": self.predicate_filter,
-                                    "iteration": iteration
-                                    } for node in nodes_to_expand])
-            pool.close()
-            pool.join()
-
-        else:  # type_interface == 'hdt'
+        list_args = [{"node": node,
+                      "path": path,
+                      "predicate": self.predicate_filter,
+                      "iteration": iteration,
+                      } for node in nodes_to_expand]
+
+        if self.workers > 1 and self.type_interface == "hdt":
+            if self.parallel_expansion is None:
+                self.parallel_expansion = self._get_parallel_expansion()
+            print(f"Processing {len(nodes_to_expand)} nodes with {self.workers} workers")
+            self.nodes_expanded += nodes_to_expand
+            self.frontier.set_expanded(nodes=nodes_to_expand)
+            with self.profiler.stage("expansion"):
+                output = self.parallel_expansion(list_args=list_args, dates=self.dates)
+
+        elif self.chunk_size:
+            self.nodes_expanded += nodes_to_expand
+            self.frontier.set_expanded(nodes=nodes_to_expand)
+            output = self._iter_expansion(list_args=list_args)
+
+        else:
             output = []
-            for i, args in enumerate([{"node": node,
-                                    "path": path,
-                                    "predicate": self.predicate_filter,
-                                    "iteration": iteration,
-                                    } for node in nodes_to_expand]):
+            for i, args in enumerate(list_args):
                 print(f"Processing node {i+1}/{len(nodes_to_expand)}\t{nodes_to_expand[i]}")
                 self.nodes_expanded.append(args["node"])
-                output.append(self._expand_one_node(args))
-
+                self.frontier.set_expanded(nodes=[args["node"]])
+                with self.profiler.node(args["node"]):
+                    output.append(self._expand_one_node(args))
+
+        if self.profiler.enabled and isinstance(output, list):
+            for args, (_, path_ingoing, _, path_outgoing, to_discard) in zip(list_args, output):
+                self.profiler.add_node(args["node"], ingoing=path_ingoing.shape[0],
+                                       outgoing=path_outgoing.shape[0],
+                                       discarded=len(to_discard))
         return output, nodes_to_expand, path
 
+    def _iter_expansion(self, list_args: list[dict]) \
+        -> Iterator[tuple[DataFrame, DataFrame, DataFrame, DataFrame, list[str]]]:
+        """ Expanding nodes one chunk of triples at a time (`chunk_size`),
+        outputs are merged as they are produced """
+        for i, args in enumerate(list_args):
+            print(f"Processing node {i+1}/{len(list_args)}\t{args['node']}")
+            yield from self.node_expander.iter_chunks(args=args, dates=self.dates,
+                                                      chunk_size=self.chunk_size)
+
     def update_occurence(self, ingoing: DataFrame,
                          outgoing: DataFrame, occurence: dict) -> dict:
         """ Accessible call to _update_occurence """
         return self._update_occurence(ingoing, outgoing, occurence)
 
-    def _get_nb(self, superclass: str, pred: str):
-        if any(x in superclass for x in [y[1] for y in self.rdf_type]):
-            return "1"
-        if pred in []:
-            return "2"
-        return "3"
+    def _get_nb(self, triple_df: DataFrame) -> Series:
+        """ Priority of each triple, computed in one pass over the superclass column
+        1 = relevant superclass | 2 = filtered predicate (not used) | 3 = other """
+        focus = [y[1] for y in self.rdf_type]
+        exploded = triple_df.superclass.reset_index(drop=True).explode()
+        relevant = exploded.isin(focus).groupby(level=0).any()
+        return pd.Series(np.where(relevant.values, "1", "3"))
+
+    def _get_path_keys(self, triple_df: DataFrame, type_node: str) -> Series:
+        """ Path key of each triple, e.g. `1-ingoing-pred;obj` """
+        nb_order = self._get_nb(triple_df=triple_df)
+        predicate = triple_df.predicate.astype(str).reset_index(drop=True)
+        if self.type_ranking in ["pred_freq", "entropy_pred_freq",
+                                 "inverse_pred_freq"]:  # predicate
+            return nb_order + "-" + predicate
+        # pred_object_freq, entropy_pred_object_freq, inverse_pred_object_freq
+        if type_node == "ingoing":
+            return nb_order + "-ingoing-" + predicate + ";" + \
+                triple_df.object.astype(str).reset_index(drop=True)
+        return nb_order + "-outgoing-" + \
+            triple_df.subject.astype(str).reset_index(drop=True) + ";" + predicate
 
     def _update_occurence(self, ingoing: DataFrame,
                           outgoing: DataFrame, occurence: dict) -> dict:
@@ -577,39 +744,36 @@ class GraphSearchFramework:
         - If path on predicate only: {1-3} + pred
         - If pred_object: adding whether ingoing or outgoing
         """
-        if self.type_ranking in ["pred_freq", "entropy_pred_freq",
-                                 "inverse_pred_freq"]:  # predicate
-            for _, row in ingoing.iterrows():
-                nb_order = self._get_nb(superclass=row.superclass, pred=row.predicate)
-                occurence[f"{nb_order}-{str(row.predicate)}"] += 1
-            for _, row in outgoing.iterrows():
-                nb_order = self._get_nb(superclass=row.superclass, pred=row.predicate)
-                occurence[f"{nb_order}-{str(row.predicate)}"] += 1
-        if self.type_ranking in ["pred_object_freq",
-                                 "entropy_pred_object_freq",
-                                 "inverse_pred_object_freq"]:  # subject predicate
-            for _, row in ingoing.iterrows():
-                nb_order = self._get_nb(superclass=row.superclass, pred=row.predicate)
-                occurence[f"{nb_order}-ingoing-{str(row.predicate)};{str(row.object)}"] += 1
-            for _, row in outgoing.iterrows():
-                nb_order = self._get_nb(superclass=row.superclass, pred=row.predicate)
-                occurence[f"{nb_order}-outgoing-{str(row.subject)};{str(row.predicate)}"] += 1
+        if self.type_ranking not in self.possible_type_ranking:
+            return occurence
+        keys = [self._get_path_keys(triple_df=triple_df, type_node=type_node) \
+            for triple_df, type_node in [(ingoing, "ingoing"), (outgoing, "outgoing")] \
+                if triple_df.shape[0] > 0]
+        if not keys:
+            return occurence
+
+        # Counting with first-appearance order, ties in ranking depend on it
+        keys = pd.concat(keys, ignore_index=True)
+        for path, count in keys.groupby(keys, sort=False).size().items():
+            occurence[path] += int(count)
         return occurence
 
     def update_occurrence_after_expansion(self, occurence: dict, to_expand: str) -> dict:
         """ Updating path count:
         - if node selection is all nodes corresponding to a path, then removing that path
         - else decreasing it by one """
+        if not isinstance(occurence, PathOccurrences):
+            occurence = PathOccurrences(occurence)
         if self.node_selection_type == "random":
-            return defaultdict(int, {k: v if v != to_expand else v-1 for k, v in occurence.items()})
-        return defaultdict(int, {k: v for k, v in occurence.items() if k != to_expand})
+            occurence.decrement(to_expand)
+        else:
+            occurence.remove(to_expand)
+        return occurence
 
     def merge_outputs(self, output: list, iteration: int, info: dict) -> dict:
         """ Gather outputs from each of the nodes expanded """
         curr_discarded = []
         for subgraph_ingoing, path_ingoing, subgraph_outgoing, path_outgoing, to_discard in output:
-            subgraph_ingoing["iteration"] = iteration
-            subgraph_outgoing["iteration"] = iteration
             self._merge_outputs_single_run(subgraph_ingoing, path_ingoing,
                                            subgraph_outgoing, path_outgoing, info, iteration)
 
@@ -623,14 +787,11 @@ class GraphSearchFramework:
         )
 
         if self.walk == "informed":
-            self.to_expand, self.score_expansion = self.ranker(occurences=self.occurence)
-            if self.to_expand:
-                self.occurence = self.update_occurrence_after_expansion(
-                    occurence=self.occurence, to_expand=self.to_expand)
-        self.pending_nodes_ingoing = self.pending_nodes_ingoing[\
-            ~self.pending_nodes_ingoing.subject.isin(self.nodes_expanded)]
-        self.pending_nodes_outgoing = self.pending_nodes_outgoing[\
-            ~self.pending_nodes_outgoing.object.isin(self.nodes_expanded)]
+            with self.profiler.stage("ranking"):
+                self.to_expand, self.score_expansion = self.ranker(occurences=self.occurence)
+                if self.to_expand:
+                    self.occurence = self.update_occurrence_after_expansion(
+                        occurence=self.occurence, to_expand=self.to_expand)
 
         return info
 
@@ -639,26 +800,29 @@ class GraphSearchFramework:
                                   subgraph_outgoing: DataFrame,
                                   path_outgoing: DataFrame,
                                   info: dict, iteration: int):
-        self.subgraph = pd.concat([self.subgraph, subgraph_ingoing], axis=0)
-        self.subgraph = pd.concat([self.subgraph, subgraph_outgoing], axis=0)
+        with self.profiler.stage("merge"):
+            self.subgraph_store.append(subgraph_ingoing, iteration=iteration)
+            self.subgraph_store.append(subgraph_outgoing, iteration=iteration)
+        self.profiler.add("merge", triples=path_ingoing.shape[0] + path_outgoing.shape[0])
 
         # Pre-ordering step (remove non relevant predicates)
         # 1st = add info on predicates (using domain/range information)
-        path_ingoing, info = self.ordering(triple_df=path_ingoing, type_node="ingoing",
-                                            info=info, iteration=iteration)
-        path_outgoing, info = self.ordering(triple_df=path_outgoing, type_node="outgoing",
-                                            info=info, iteration=iteration)
-
-        self.pending_nodes_ingoing = pd.concat(
-            [self.pending_nodes_ingoing, path_ingoing], axis=0)
-        self.pending_nodes_outgoing = pd.concat(
-            [self.pending_nodes_outgoing, path_outgoing], axis=0)
+        with self.profiler.stage("ordering"):
+            path_ingoing, info = self.ordering(triple_df=path_ingoing, type_node="ingoing",
+                                                info=info, iteration=iteration)
+            path_outgoing, info = self.ordering(triple_df=path_outgoing, type_node="outgoing",
+                                                info=info, iteration=iteration)
+
+        with self.profiler.stage("frontier"):
+            self.frontier.add(triple_df=path_ingoing, type_node="ingoing")
+            self.frontier.add(triple_df=path_outgoing, type_node="outgoing")
         # self.info = pd.concat([self.info, info], axis=0)
 
         if self.walk == "informed":
-            self.occurence = self._update_occurence(ingoing=path_ingoing,
-                                                    outgoing=path_outgoing,
-                                                    occurence=self.occurence)
+            with self.profiler.stage("occurrence_update"):
+                self.occurence = self._update_occurence(ingoing=path_ingoing,
+                                                        outgoing=path_outgoing,
+                                                        occurence=self.occurence)
 
     def _add_save_info(self) -> str:
         date_begin = datetime.now()
@@ -677,11 +841,8 @@ class GraphSearchFramework:
 
     def add_subgraph_info(self, iteration: int):
         """ Tracking # of events + unique events found """
-        size = self.subgraph.shape[0]
-        unique = len(set([str(e) for e in self.subgraph[self.subgraph.type_df == "ingoing"] \
-                    .subject.unique()] + \
-                    [str(e) for e in self.subgraph[self.subgraph.type_df == "outgoing"] \
-                        .object.unique()]))
+        size = len(self.subgraph_store)
+        unique = len(set(self.subgraph_store.get_events()))
         self.subgraph_info[iteration] = dict(subgraph_nb_event=size,
                                              subgraph_nb_event_unique=unique)
 
@@ -701,8 +862,186 @@ class GraphSearchFramework:
                     found_node = True
         return found_node
 
+    @staticmethod
+    def _track_end_node(output, end_node: str, found: list[bool]):
+        """ Streamed outputs, unchanged, recording in `found` whether `end_node`
+        is in the paths of each (streamed outputs can only be read once) """
+        for elt in output:
+            _, path_ingoing, _, path_outgoing, _ = elt
+            found.append(bool((path_ingoing.subject == end_node).any() or \
+                (path_outgoing.object == end_node).any()))
+            yield elt
+
+    def _get_cache_stats(self, name: str, cache) -> dict:
+        """ Hit/miss counters of a cache, with those of the workers (`workers` > 1) """
+        stats = dict(cache.get_stats())
+        if self.parallel_expansion is not None:
+            for key, val in self.parallel_expansion.stats.get(name, {}).items():
+                stats[key] += val
+        return stats
+
+    def _get_search_state_path(self) -> str:
+        return os.path.join(self.save_folder, "search_state.pkl")
+
+    def _save_search_state(self, metadata: dict, best_fone: float):
+        """ Snapshot of the search after one iteration (file replaced atomically)
+        With a binary checkpoint, only what is not in the checkpoint is saved """
+        state = {attr: getattr(self, attr) for attr in SEARCH_STATE \
+            if self.checkpoint is None or attr not in CHECKPOINT_STATE}
+        state.update(metadata=metadata, best_fone=best_fone, random_state=random.getstate(),
+                     checkpoint_size=os.path.getsize(self.checkpoint.path) \
+                        if self.checkpoint is not None else None)
+        path = self._get_search_state_path()
+        with open(f"{path}.tmp", "wb") as openfile:
+            pickle.dump(state, openfile, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(f"{path}.tmp", path)
+
+    def _load_search_state(self) -> dict:
+        path = self._get_search_state_path()
+        if not os.path.exists(path):
+            raise ValueError(f"No search state to resume from in {self.save_folder} " + \
+                "(folder does not exist, or search already finished)")
+        with open(path, "rb") as openfile:
+            return pickle.load(openfile)
+
+    def _restore_search_state(self) -> (dict, float):
+        """ Restoring attributes saved by `_save_search_state`, returns metadata and best f1
+        Records of iterations started after the snapshot are removed from the checkpoint """
+        state = self.resumed_state
+        for attr in SEARCH_STATE:
+            if attr in state:
+                setattr(self, attr, state[attr])
+        random.setstate(state["random_state"])
+        if self.checkpoint is not None:
+            with open(self.checkpoint.path, "r+b") as openfile:
+                openfile.truncate(state["checkpoint_size"])
+            if "checkpoint" not in state:
+                self._restore_from_checkpoint()
+        self.resumed_state = None
+        return state["metadata"], state["best_fone"]
+
+    def _restore_from_checkpoint(self):
+        """ Restoring the attributes of CHECKPOINT_STATE by replaying the checkpoint """
+        state = Checkpoint.read(self.checkpoint.path, iteration=self.last_iteration)
+        self.subgraph_store, self.frontier = state["subgraph_store"], state["frontier"]
+        self.expanded = state["tables"]["expanded"]
+        self.nodes_expanded_per_iter = state["tables"]["nodes_expanded_per_iter"]
+        self.discarded = state["tables"]["discarded"]
+        self.nodes_expanded = [node for nodes in self.nodes_expanded_per_iter.node_expanded \
+            for node in nodes]
+        self.occurence = PathOccurrences(state["dicts"]["occurences"])
+        self.path_node_to_start = defaultdict(list, state["dicts"]["paths"])
+        self.metrics_data = state["metrics"]
+        self.checkpoint = Checkpoint(path=self.checkpoint.path, frontier=self.frontier)
+        self.checkpoint.restore(state)
+        self.occurence.pop_journal()
+
+    def _add_written_bytes(self, paths: list[str]):
+        """ Profiling: size of the files just written """
+        if self.profiler.enabled:
+            self.profiler.add("save", bytes=sum(os.path.getsize(path) for path in paths))
+
+    def _save_json(self, name: str, content: dict):
+        """ Saving `content` in `name` (in the save folder) """
+        path = f"{self.save_folder}/{name}"
+        with self.profiler.stage("save"):
+            with open(path, "w", encoding="utf-8") as openfile:
+                json.dump(content, openfile, indent=4)
+        self._add_written_bytes([path])
+
+    def _save_timings(self):
+        """ Saving the timings of the stages of the search (`profile`: 1) """
+        if self.profiler.enabled:
+            self.profiler.save(f"{self.save_folder}/timings.json")
+
+    @staticmethod
+    def _remove_previous(path: str):
+        """ Removing a file of the previous iteration (`keep_only_last`), it may already
+        be removed if the search was stopped while saving, then resumed """
+        if os.path.exists(path):
+            os.remove(path)
+
+    def _save_iteration_csv(self, iteration: int):
+        """ Saving full state of the search as csv/json files (`checkpoint_format`: csv) """
+        i = iteration
+        written = []
+        if self.keep_only_last and i > 1:
+            if self.rdf_type:
+                self._remove_previous(f"{self.save_folder}/{i-1}-subgraph.csv")
+            self._remove_previous(f"{self.save_folder}/{i-1}-pending_nodes_ingoing.csv")
+            self._remove_previous(f"{self.save_folder}/{i-1}-pending_nodes_outgoing.csv")
+
+        if self.rdf_type:
+            self.subgraph.to_csv(f"{self.save_folder}/{i}-subgraph.csv")
+            written.append(f"{self.save_folder}/{i}-subgraph.csv")
+
+        self.pending_nodes_ingoing.to_csv(
+            f"{self.save_folder}/{i}-pending_nodes_ingoing.csv")
+        self.pending_nodes_outgoing.to_csv(
+            f"{self.save_folder}/{i}-pending_nodes_outgoing.csv")
+        written += [f"{self.save_folder}/{i}-pending_nodes_ingoing.csv",
+                    f"{self.save_folder}/{i}-pending_nodes_outgoing.csv"]
+
+        if self.walk == "informed":
+            # if walk is random, no occurences used for best path choosing
+            if self.keep_only_last and i > 1:
+                self._remove_previous(f"{self.save_folder}/{i-1}-occurences.json")
+
+            with open(f"{self.save_folder}/{i}-occurences.json", "w", encoding='utf-8') \
+                    as openfile:
+                json.dump(self.occurence, openfile, indent=4)
+            written.append(f"{self.save_folder}/{i}-occurences.json")
+
+        if self.mode in ["simple_search", "search_specific_node"]:
+            if self.keep_only_last and i > 1:
+                self._remove_previous(f"{self.save_folder}/{i-1}-paths.json")
+
+            with open(f"{self.save_folder}/{i}-paths.json", "w", encoding='utf-8') \
+                    as openfile:
+                json.dump(self.path_node_to_start, openfile, indent=4)
+            written.append(f"{self.save_folder}/{i}-paths.json")
+
+        self._add_written_bytes(written)
+
+    def _write_checkpoint(self, iteration: int):
+        """ Appending the changes of `iteration` to the binary checkpoint """
+        with self.profiler.stage("save"):
+            nb_bytes = self.checkpoint.write(
+                iteration=iteration, subgraph_store=self.subgraph_store,
+                frontier=self.frontier,
+                tables={"expanded": self.expanded,
+                        "nodes_expanded_per_iter": self.nodes_expanded_per_iter,
+                        "discarded": self.discarded},
+                dicts={"occurences": (self.occurence, self.occurence.pop_journal()),
+                       "paths": (self.path_node_to_start, self.paths_journal)},
+                metrics=self.metrics_data.get(iteration))
+        self.paths_journal = set()
+        self.profiler.add("save", bytes=nb_bytes)
+
+    def _save_expanded_csv(self):
+        if self.checkpoint is None:
+            with self.profiler.stage("save"):
+                self.expanded.to_csv(f"{self.save_folder}/expanded.csv")
+            self._add_written_bytes([f"{self.save_folder}/expanded.csv"])
+
     def __call__(self, end_node: str = ""):
         """ end_node necessary only if self.mode == 'search_specific_node' """
+        for _ in self.iter_search(end_node=end_node):
+            pass
+
+    def iter_search(self, end_node: str = "") -> Iterator[int]:
+        """ Same as __call__, yielding the number of each iteration once it is finished
+        and saved (e.g. to run several searches step by step, see `src.sweep`)
+        Workers of the parallel expansion are stopped when the search is finished,
+        fails, or is not iterated over any more """
+        try:
+            yield from self._iter_search(end_node=end_node)
+        finally:
+            if self.parallel_expansion is not None:
+                self.parallel_expansion.close()
+                self.parallel_expansion = None
+
+    def _iter_search(self, end_node: str) -> Iterator[int]:
         start = datetime.now()
         metadata = {"start": str(start), "node_start": self.start}
 
@@ -721,63 +1060,43 @@ class GraphSearchFramework:
         self.info = {}
         best_fone = 0
         found_node = False  # only if looking for a specific node
+        start_iteration = 1
+        if self.resumed_state is not None:
+            metadata, best_fone = self._restore_search_state()
+            start_iteration = self.last_iteration + 1
+            print(f"Resuming search from iteration {start_iteration}")
 
-        for i in range(1, self.iterations+1):
+        for i in range(start_iteration, self.iterations+1):
             self.last_iteration = i
+            self.profiler.start_iteration(i)
             print(i, self.iterations)
             print(f"Iteration {i} started at {datetime.now()}")
             output, nodes_to_expand, path = self.run_one_iteration(iteration=i)
+            found_in_chunks = []
+            if self.mode in ["simple_search", "search_specific_node"] and \
+                not isinstance(output, list):
+                output = self._track_end_node(output=output, end_node=end_node,
+                                              found=found_in_chunks)
             self.info = self.merge_outputs(output=output, iteration=i, info=self.info)
 
             self.add_subgraph_info(iteration=i)
 
-            if self.keep_only_last and i > 1:
-                if self.rdf_type:
-                    os.remove(f"{self.save_folder}/{i-1}-subgraph.csv")
-                os.remove(f"{self.save_folder}/{i-1}-pending_nodes_ingoing.csv")
-                os.remove(f"{self.save_folder}/{i-1}-pending_nodes_outgoing.csv")
-
-            if self.rdf_type:
-                self.subgraph.to_csv(f"{self.save_folder}/{i}-subgraph.csv")
-
-            self.pending_nodes_ingoing.to_csv(
-                f"{self.save_folder}/{i}-pending_nodes_ingoing.csv")
-            self.pending_nodes_outgoing.to_csv(
-                f"{self.save_folder}/{i}-pending_nodes_outgoing.csv")
-
-            if self.walk == "informed":
-                # if walk is random, no occurences used for best path choosing
-                if self.keep_only_last and i > 1:
-                    os.remove(f"{self.save_folder}/{i-1}-occurences.json")
-
-                with open(f"{self.save_folder}/{i}-occurences.json", "w", encoding='utf-8') \
-                        as openfile:
-                    json.dump(self.occurence, openfile, indent=4)
-
             if self.mode in ["simple_search", "search_specific_node"]:
-                found_node = self._update_path(output=output, end_node=end_node)
-                if self.keep_only_last and i > 1:
-                    os.remove(f"{self.save_folder}/{i}-paths.json")
+                found_node = self._update_path(output=output, end_node=end_node) \
+                    if isinstance(output, list) else any(found_in_chunks)
+            if self.checkpoint is None:
+                with self.profiler.stage("save"):
+                    self._save_iteration_csv(iteration=i)
+                self._save_expanded_csv()
 
-                with open(f"{self.save_folder}/{i}-paths.json", "w", encoding='utf-8') \
-                        as openfile:
-                    json.dump(self.path_node_to_start, openfile, indent=4)
-
-            self.expanded.to_csv(f"{self.save_folder}/expanded.csv")
-
-            events_found = \
-                [str(e) for e in self.subgraph[self.subgraph.type_df == "ingoing"] \
-                    .subject.unique()] + \
-                    [str(e) for e in self.subgraph[self.subgraph.type_df == "outgoing"] \
-                        .object.unique()]
+            events_found = self.subgraph_store.get_events()
 
             # METRICS
             if self.mode == "search_type_node_metrics":
                 self.metrics_data = self.metrics.update_metrics_data(
                     metrics_data=self.metrics_data, iteration=i, found=events_found)
 
-                with open(f"{self.save_folder}/metrics.json", "w", encoding='utf-8') as openfile:
-                    json.dump(self.metrics_data, openfile, indent=4)
+                self._save_json(name="metrics.json", content=self.metrics_data)
 
                 current_metrics = self.metrics_data[i]
 
@@ -798,12 +1117,23 @@ class GraphSearchFramework:
                 })
 
             metadata.update({"nb_expanded": len(self.nodes_expanded)})
+            if isinstance(self.interface, CachedInterface):
+                metadata.update({"cache": self._get_cache_stats(
+                    name="cache", cache=self.interface)})
+            if self.expansion_cache is not None:
+                metadata.update({"expansion_cache": self._get_cache_stats(
+                    name="expansion_cache", cache=self.expansion_cache)})
+            pushdown_stats = self.interface.get_pushdown_stats()
+            if pushdown_stats:
+                metadata.update({"predicate_filter": pushdown_stats})
             metadata.update({"end": str(datetime.now())})
 
-            with open(f"{self.save_folder}/metadata.json", "w", encoding="utf-8") as openfile:
-                json.dump(metadata, openfile, indent=4)
+            self._save_json(name="metadata.json", content=metadata)
             print(f"Iteration {i} finished at {datetime.now()}\n=====")
 
+            # Deciding whether to stop before saving the checkpoint,
+            # so that it contains the rows of `expanded` of this iteration
+            stop = True
             if found_node:
                 print(f"Node {end_node} was found, stopping search. " + \
                     "Path can be found in {i}-paths.json")
@@ -811,19 +1141,13 @@ class GraphSearchFramework:
                 self.it_found = i
                 metadata.update({"path_found": True, "path_found_iteration": i,
                                  "path": self.path_node_to_start[end_node]})
-                with open(f"{self.save_folder}/metadata.json", "w", encoding="utf-8") as openfile:
-                    json.dump(metadata, openfile, indent=4)
-                break
-
-            candidates = set(list(self.pending_nodes_ingoing.subject.unique()) + \
-                list(self.pending_nodes_outgoing.object.unique()))
-            candidates = {node for node in candidates if node not in self.nodes_expanded}
+                self.paths_journal.add(end_node)
+                self._save_json(name="metadata.json", content=metadata)
 
-            if len(self.nodes_expanded) >= self.max_uri:
+            elif len(self.nodes_expanded) >= self.max_uri:
                 print(f"More than {self.max_uri} nodes were expanded, ",
                       f"finishing process at {datetime.now()} due to parameter `max_uri`\n=====")
-                self.expanded.to_csv(f"{self.save_folder}/expanded.csv")
-                break
+                self._save_expanded_csv()
 
             elif (self.walk == "informed" and self.to_expand):
                 self.expanded = pd.concat(
@@ -835,9 +1159,11 @@ class GraphSearchFramework:
                              "node_expanded", "score"])],
                     ignore_index=True
                 )
-                self.expanded.to_csv(f"{self.save_folder}/expanded.csv")
+                self._save_expanded_csv()
+                stop = False
 
-            elif (self.walk == "random" and candidates):
+            elif (self.walk == "random" and \
+                self.frontier.get_candidates() - self.frontier.expanded):
                 self.expanded = pd.concat(
                     [self.expanded,
                      pd.DataFrame(
@@ -846,15 +1172,32 @@ class GraphSearchFramework:
                              "node_expanded", "score"])],
                     ignore_index=True
                 )
-                self.expanded.to_csv(f"{self.save_folder}/expanded.csv")
+                self._save_expanded_csv()
+                stop = False
 
             else:
                 print("According to params, no further nodes to expand," \
                     + f"finishing process at {datetime.now()}\n=====")
+
+            if self.checkpoint is not None:
+                self._write_checkpoint(iteration=i)
+            if stop:
                 break
 
-        with open(f"{self.save_folder}/metadata.json", "w", encoding="utf-8") as openfile:
-            json.dump(metadata, openfile, indent=4)
+            with self.profiler.stage("save"):
+                self._save_search_state(metadata=metadata, best_fone=best_fone)
+            self._add_written_bytes([self._get_search_state_path()])
+            self.profiler.end_iteration()
+            self._save_timings()
+            yield i
+
+        # Search finished: nothing left to resume
+        if os.path.exists(self._get_search_state_path()):
+            os.remove(self._get_search_state_path())
+
+        self._save_json(name="metadata.json", content=metadata)
+        self.profiler.end_iteration()
+        self._save_timings()
 
 
 
@@ -871,6 +1214,8 @@ if __name__ == '__main__':
                     help="node to look for in search (only if mode == 'search_specific_node'")
     ap.add_argument("-w", "--walk", default="informed",
                     help="type of walk in the graph: `random` or `informed`")
+    ap.add_argument("-r", "--resume_from", default=None,
+                    help="save folder of an interrupted search to resume")
     args_main = vars(ap.parse_args())
 
     with open(args_main["json"], "r", encoding="utf-8") as openfile_main:
@@ -880,7 +1225,8 @@ if __name__ == '__main__':
 
     framework = GraphSearchFramework(config=config_loaded, mode=args_main["mode"],
                                      node_selection=args_main["node_selection"],
-                                     walk=args_main["walk"])
+                                     walk=args_main["walk"],
+                                     resume_from=args_main["resume_from"])
     START = datetime.now()
     print(f"Process started at {START}")
     framework(end_node=args_main["end_node"])
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+Frontier of the search: pending nodes that could be expanded
+
+Pending triples are indexed by the path keys used by the ranker
+(predicate, predicate;object for ingoing, subject;predicate for outgoing),
+so that resolving the chosen path to its candidate nodes is O(result)
+instead of scanning the whole frontier
+"""
+from collections import defaultdict
+import pandas as pd
+from pandas.core.frame import DataFrame
+
+DEFAULT_COLUMNS = ["subject", "predicate", "object"]
+
+
+class Frontier:
+    """
+    Pending nodes, separated in two types:
+    - `ingoing`: triples (node, p, o), with o already expanded
+    - `outgoing`: triples (s, p, node), with s already expanded
+    """
+    def __init__(self):
+        # triple (s, p, o) -> row (dict, all columns)
+        self.rows = {"ingoing": {}, "outgoing": {}}
+        self.columns = {"ingoing": list(DEFAULT_COLUMNS), "outgoing": list(DEFAULT_COLUMNS)}
+
+        # pending node -> triples
+        self.node_index = {"ingoing": defaultdict(set), "outgoing": defaultdict(set)}
+        # predicate -> triples
+        self.pred_index = {"ingoing": defaultdict(set), "outgoing": defaultdict(set)}
+        # (predicate, object) for ingoing | (subject, predicate) for outgoing -> triples
+        self.path_index = {"ingoing": defaultdict(set), "outgoing": defaultdict(set)}
+
+        self.expanded = set()
+        # operations since last `pop_journal`, None if not recorded (see `Checkpoint`)
+        self.journal = None
+
+    @staticmethod
+    def _get_node(triple: (str, str, str), type_node: str) -> str:
+        return triple[0] if type_node == "ingoing" else triple[2]
+
+    @staticmethod
+    def _get_path(triple: (str, str, str), type_node: str) -> (str, str):
+        return (triple[1], triple[2]) if type_node == "ingoing" else (triple[0], triple[1])
+
+    def add(self, triple_df: DataFrame, type_node: str):
+        """ Adding triples to the frontier (nodes already expanded are skipped) """
+        if self.journal is not None:
+            self.journal.append(("add", type_node, triple_df))
+        for col in triple_df.columns:
+            if col not in self.columns[type_node]:
+                self.columns[type_node].append(col)
+
+        for row in triple_df.to_dict("records"):
+            triple = (str(row["subject"]), str(row["predicate"]), str(row["object"]))
+            node = self._get_node(triple, type_node)
+            if node in self.expanded:
+                continue
+            self.rows[type_node][triple] = row
+            self.node_index[type_node][node].add(triple)
+            self.pred_index[type_node][triple[1]].add(triple)
+            self.path_index[type_node][self._get_path(triple, type_node)].add(triple)
+
+    def set_expanded(self, nodes: list[str]):
+        """ Marking nodes as expanded, and removing them from the frontier """
+        nodes = list(nodes)
+        if self.journal is not None:
+            self.journal.append(("expanded", nodes))
+        for node in nodes:
+            self.expanded.add(node)
+            for type_node in ["ingoing", "outgoing"]:
+                for triple in self.node_index[type_node].pop(node, set()):
+                    del self.rows[type_node][triple]
+                    self._discard(self.pred_index[type_node], triple[1], triple)
+                    self._discard(self.path_index[type_node],
+                                  self._get_path(triple, type_node), triple)
+
+    @staticmethod
+    def _discard(index: dict, key, triple: (str, str, str)):
+        index[key].discard(triple)
+        if not index[key]:
+            del index[key]
+
+    def _get_nodes(self, triples, type_node: str) -> set[str]:
+        return {self._get_node(triple, type_node) for triple in triples}
+
+    def get_nodes_ingoing(self, predicate: str, object_t: str = None) -> set[str]:
+        """ Pending subjects of ingoing triples with `predicate` (and `object_t`) """
+        if object_t is None:
+            triples = self.pred_index["ingoing"].get(predicate, set())
+        else:
+            triples = self.path_index["ingoing"].get((predicate, object_t), set())
+        return self._get_nodes(triples, "ingoing")
+
+    def get_nodes_outgoing(self, predicate: str, subject: str = None) -> set[str]:
+        """ Pending objects of outgoing triples with `predicate` (and `subject`) """
+        if subject is None:
+            triples = self.pred_index["outgoing"].get(predicate, set())
+        else:
+            triples = self.path_index["outgoing"].get((subject, predicate), set())
+        return self._get_nodes(triples, "outgoing")
+
+    def get_candidates(self) -> set[str]:
+        """ All pending nodes """
+        return set(self.node_index["ingoing"].keys()).union(
+            self.node_index["outgoing"].keys())
+
+    def get_triples(self, node: str, type_node: str) -> list[(str, str, str)]:
+        """ Pending triples of `node`, sorted for reproducibility """
+        return sorted(self.node_index[type_node].get(node, set()))
+
+    def to_df(self, type_node: str) -> DataFrame:
+        """ Pending triples as a dataframe """
+        return pd.DataFrame(list(self.rows[type_node].values()),
+                            columns=self.columns[type_node])
+
+    def reset(self, triple_df: DataFrame, type_node: str):
+        """ Replacing all triples of one type """
+        if self.journal is not None:
+            self.journal.append(("reset", type_node))
+        self.rows[type_node] = {}
+        self.columns[type_node] = list(DEFAULT_COLUMNS)
+        for index in [self.node_index, self.pred_index, self.path_index]:
+            index[type_node] = defaultdict(set)
+        self.add(triple_df=triple_df, type_node=type_node)
+
+    def pop_journal(self) -> list:
+        """ Operations recorded since last call (recording starts at first call) """
+        journal, self.journal = self.journal, []
+        return journal or []
+
+    def replay(self, journal: list):
+        """ Applying operations recorded by another frontier """
+        for operation in journal:
+            if operation[0] == "add":
+                self.add(triple_df=operation[2], type_node=operation[1])
+            elif operation[0] == "expanded":
+                self.set_expanded(nodes=operation[1])
+            else:
+                self.reset(triple_df=pd.DataFrame(columns=DEFAULT_COLUMNS),
+                           type_node=operation[1])
+
+    def __len__(self):
+        return len(self.rows["ingoing"]) + len(self.rows["outgoing"])
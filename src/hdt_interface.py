@@ -1,12 +1,18 @@
 # -*- coding: utf-8 -*-
 """
 Interface to query a KG - format compressed HDT
+
+HDT documents are opened lazily, on first query, and kept open for the whole process:
+all HDTInterface instances on the same dataset share them
 """
 import os
 import fnmatch
-import yaml
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Iterator
 
-from hdt import HDTDocument
+from hdt import HDTDocument, IdentifierPosition
 
 from src.interface import Interface
 from settings import FOLDER_PATH
@@ -22,40 +28,250 @@ DEFAULT_PRED = \
      "http://dbpedia.org/property/birthDate",
      "http://dbpedia.org/property/deathDate"]
 
-with open(os.path.join(FOLDER_PATH, "dataset-config", "dbpedia.yaml"),
-          encoding='utf-8') as file:
-    dbpedia_dataset_config = yaml.load(file, Loader=yaml.FullLoader)
+# HDT documents opened in the process (path -> document), shared by all HDTInterface
+HDT_DOCUMENTS = {}
+HDT_LOCK = threading.Lock()
+# Terms whose ID in a document is kept per HDTInterface (see `_get_term_id`)
+TERM_CACHE_SIZE = 100_000
+
+
+@lru_cache(maxsize=None)
+def get_hdt_paths(folder_hdt: str, nested_dataset: bool) -> tuple[str]:
+    """ Paths to the HDT files of a dataset
+    - nested: `<folder_hdt>/<chunk>/<sub-chunk>/hdt`
+    - else: `<folder_hdt>/*.hdt` """
+    if nested_dataset:
+        dirs = [os.path.join(folder_hdt, file) for file in os.listdir(folder_hdt)]
+        dirs = [elt for elt in dirs if not elt.split('/')[-1].startswith(".")]
+        dirs = [os.path.join(old_dir, new_dir, "hdt") \
+            for old_dir in dirs for new_dir in os.listdir(old_dir)]
+        dirs = [elt for elt in dirs if not elt.split('/')[-2].startswith(".")]
+        return tuple(elt for elt in dirs if os.path.exists(elt))
+    return tuple(os.path.join(folder_hdt, file) for file in os.listdir(folder_hdt) \
+        if fnmatch.fnmatch(file, "*.hdt"))
+
+
+def get_hdt_document(path: str) -> HDTDocument:
+    """ HDT document opened on first use, then shared within the process """
+    path = os.path.realpath(path)
+    with HDT_LOCK:
+        if path not in HDT_DOCUMENTS:
+            HDT_DOCUMENTS[path] = HDTDocument(path)
+        return HDT_DOCUMENTS[path]
+
+
+class HDTDocuments:
+    """ Documents of a dataset, each one opened on first access """
+    def __init__(self, paths: list[str]):
+        self.paths = paths
+        self.docs = [None] * len(paths)
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __getitem__(self, index: int) -> HDTDocument:
+        if self.docs[index] is None:
+            self.docs[index] = get_hdt_document(self.paths[index])
+        return self.docs[index]
+
+    def __iter__(self):
+        return (self[index] for index in range(len(self)))
+
 
 class HDTInterface(Interface):
     """
     Format of dataset = HDT, where you can do "simple" queries only, but much faster
     """
-    def __init__(self, dataset_config: dict = dbpedia_dataset_config,
+    def __init__(self, dataset_config: dict = None,
                  dates: list[str] = [None, None], default_pred: list[str] = DEFAULT_PRED,
-                 folder_hdt: str = HDT_DBPEDIA, nested_dataset: bool = True, filter_kb: bool = 1):
+                 folder_hdt: str = HDT_DBPEDIA, nested_dataset: bool = True, filter_kb: bool = 1,
+                 use_ids: bool = False, threads: int = 1):
         """
         - `dataset_config`: dict, dataset config, example in `dataset-config` folder
+        (default: DBpedia)
         - `dates`: list of two strings, start and end dates of the event
         - `default_pred`: list of strings, predicates for rdf:type and dates
-        - `folder_hdt`: string, path to the HDT dataset
+        - `folder_hdt`: string, path to the HDT dataset, documents are opened on first
+        use and shared by all interfaces of the process
         - `nested_dataset`: boolean, whether the dataset is chunked down in folders
         - `filter_kb`: boolean, whether to exclude some types of predicates or not
+        - `use_ids`: boolean, whether to query HDT with the integer IDs of its dictionary,
+        triples are then only converted to strings once filtered on their predicate
+        - `threads`: int, number of threads querying the documents of a nested dataset
         """
         Interface.__init__(self, dataset_config=dataset_config, dates=dates,
                            default_pred=default_pred, filter_kb=filter_kb)
 
-        if nested_dataset:
-            dirs = [os.path.join(folder_hdt, file) for file in os.listdir(folder_hdt)]
-            dirs = [elt for elt in dirs if not elt.split('/')[-1].startswith(".")]
-            dirs = [os.path.join(old_dir, new_dir, "hdt") \
-                for old_dir in dirs for new_dir in os.listdir(old_dir)]
-            dirs = [elt for elt in dirs if not elt.split('/')[-2].startswith(".")]
-            dirs = [elt for elt in dirs if os.path.exists(elt)]
-            self.docs = [HDTDocument(file) for file in dirs]
-        else:
-            files = [os.path.join(folder_hdt, file) for file in os.listdir(folder_hdt) \
-                        if fnmatch.fnmatch(file, "*.hdt")]
-            self.docs = [HDTDocument(file) for file in files]
+        self.docs = HDTDocuments(paths=get_hdt_paths(folder_hdt=folder_hdt,
+                                                     nested_dataset=nested_dataset))
+
+        self.use_ids = use_ids
+        # Per document: predicate -> ID, ID -> predicate
+        self.predicate_ids = [{} for _ in range(len(self.docs))]
+        self.predicates = [{} for _ in range(len(self.docs))]
+        # (document, term, position) -> ID (0 if not in the document), last terms looked up
+        self.get_term_id = lru_cache(maxsize=TERM_CACHE_SIZE)(self._get_term_id)
+
+        self.threads = threads
+        self.executor = None
+        self.lock = threading.Lock()
+        # Triples skipped when keeping predicates, from HDT cardinalities (not iterated over),
+        # which can be estimates for some patterns
+        self.skipped_estimate = 0
+
+    def _get_predicate_id(self, doc_index: int, predicate: str) -> int:
+        """ ID of a predicate in the dictionary of a document (0 if not in it), cached """
+        if predicate not in self.predicate_ids[doc_index]:
+            self.predicate_ids[doc_index][predicate] = self.docs[doc_index].convert_term(
+                predicate, IdentifierPosition.Predicate)
+        return self.predicate_ids[doc_index][predicate]
+
+    def _get_predicate(self, doc_index: int, predicate_id: int) -> str:
+        """ Predicate from its ID in a document, cached (few distinct predicates) """
+        if predicate_id not in self.predicates[doc_index]:
+            self.predicates[doc_index][predicate_id] = self.docs[doc_index].convert_id(
+                predicate_id, IdentifierPosition.Predicate)
+        return self.predicates[doc_index][predicate_id]
+
+    def _get_term_id(self, doc_index: int, term: str, position: IdentifierPosition) -> int:
+        """ ID of a subject/object in the dictionary of a document (0 if not in it),
+        cached in `get_term_id` """
+        return self.docs[doc_index].convert_term(term, position)
+
+    def _get_ids(self, doc_index: int, subject_t: str, predicate_t: str, object_t: str):
+        """ IDs of the terms of a pattern in a document (0 = variable),
+        None if one of the terms is not in the document (no triple can match) """
+        ids = (self.get_term_id(doc_index, subject_t, IdentifierPosition.Subject) \
+                if subject_t else 0,
+               self._get_predicate_id(doc_index, predicate_t) if predicate_t else 0,
+               self.get_term_id(doc_index, object_t, IdentifierPosition.Object) \
+                if object_t else 0)
+        if any(term and not term_id for term, term_id in \
+            zip((subject_t, predicate_t, object_t), ids)):
+            return None
+        return ids
+
+    def _to_str(self, doc_index: int, triple: (int, int, int)) -> (str, str, str):
+        """ Integer triple of a document to string triple """
+        doc = self.docs[doc_index]
+        return (doc.convert_id(triple[0], IdentifierPosition.Subject),
+                self._get_predicate(doc_index, triple[1]),
+                doc.convert_id(triple[2], IdentifierPosition.Object))
+
+    def _has_terms(self, doc_index: int, subject_t: str, predicate_t: str,
+                   object_t: str) -> bool:
+        """ Whether all terms of a pattern are in the dictionary of a document,
+        if not, no triple of the document can match
+        Only checked with `use_ids`, the IDs being then reused to query the document.
+        Without it, the document is not opened: its search does the lookup itself """
+        if not self.use_ids:
+            return True
+        return self._get_ids(doc_index, subject_t, predicate_t, object_t) is not None
+
+    def _get_docs(self, subject_t: str = "", predicate_t: str = "",
+                  object_t: str = "") -> list[int]:
+        """ Documents that may have triples matching the pattern
+        (exact dictionary lookups with `use_ids`, all documents if only one) """
+        if len(self.docs) == 1:
+            return [0]
+        return [doc_index for doc_index in range(len(self.docs)) \
+            if self._has_terms(doc_index, subject_t, predicate_t, object_t)]
+
+    def _map_docs(self, func, doc_indexes: list[int]) -> list:
+        """ `func` applied to each document, in parallel threads if `threads` > 1 """
+        if self.threads > 1 and len(doc_indexes) > 1:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(max_workers=self.threads)
+            return list(self.executor.map(func, doc_indexes))
+        return [func(doc_index) for doc_index in doc_indexes]
+
+    @staticmethod
+    def _merge(results: list[list[(str, str, str)]]) -> list[(str, str, str)]:
+        """ Concatenating the triples of several documents, without duplicates """
+        if len(results) == 1:
+            return results[0]
+        return list(dict.fromkeys(triple for triples in results for triple in triples))
+
+    def _add_skipped(self, nb_skipped: int, estimate: bool = False):
+        with self.lock:
+            if estimate:
+                self.skipped_estimate += nb_skipped
+            else:
+                self.skipped += nb_skipped
+
+    def get_pushdown_stats(self) -> dict:
+        """ Counters of the predicate filter: triples skipped while iterating (exact),
+        and estimated from the cardinalities of HDT patterns (see `_iter_keeping`) """
+        return {"skipped": self.skipped, "skipped_estimate": self.skipped_estimate}
+
+    def _search(self, doc_index: int, subject_t: str, predicate_t: str,
+                object_t: str) -> (Iterator[tuple[str, str, str]], int):
+        """ Triples of a document matching the pattern, and their number
+        (estimated by HDT for some patterns)
+        With `use_ids`, documents lacking one of the terms are not searched
+        (IDs cached, already looked up in `_get_docs`) """
+        doc = self.docs[doc_index]
+        if not self.use_ids:
+            return doc.search_triples(subject_t, predicate_t, object_t)
+        ids = self._get_ids(doc_index, subject_t, predicate_t, object_t)
+        if ids is None:
+            return iter(()), 0
+        triples, cardinality = doc.search_triples_ids(*ids)
+        return (self._to_str(doc_index, triple) for triple in triples), cardinality
+
+    def _iter_search(self, doc_index: int, subject_t: str, predicate_t: str,
+                     object_t: str) -> Iterator[tuple[str, str, str]]:
+        """ Triples of a document matching the pattern """
+        return self._search(doc_index, subject_t, predicate_t, object_t)[0]
+
+    def _iter_excluding(self, doc_index: int, subject_t: str, object_t: str,
+                        excluded: set[str]) -> Iterator[tuple[str, str, str]]:
+        """ Triples of a document matching (s, ?, o), except those whose predicate is
+        in `excluded` (counted in `skipped`, also if the iteration is stopped before the end)
+        With `use_ids`, predicates are compared as integers, and only the triples
+        kept are converted to strings """
+        doc = self.docs[doc_index]
+        nb_skipped = 0
+        try:
+            if not self.use_ids:
+                for triple in doc.search_triples(subject_t, "", object_t)[0]:
+                    if triple[1] in excluded:
+                        nb_skipped += 1
+                    else:
+                        yield triple
+                return
+
+            ids = self._get_ids(doc_index, subject_t, "", object_t)
+            if ids is None:
+                return
+            excluded = {self._get_predicate_id(doc_index, pred) for pred in excluded}
+            for triple in doc.search_triples_ids(*ids)[0]:
+                if triple[1] in excluded:
+                    nb_skipped += 1
+                else:
+                    yield self._to_str(doc_index, triple)
+        finally:
+            self._add_skipped(nb_skipped)
+
+    def _iter_keeping(self, doc_index: int, subject_t: str, object_t: str,
+                      kept: list[str]) -> Iterator[tuple[str, str, str]]:
+        """ Triples of a document matching (s, p, o) for p in `kept`, with one index
+        lookup per predicate, the other triples are never iterated over: they are
+        counted (in `skipped_estimate`) before iterating, from the cardinalities of the
+        patterns, which HDT may only estimate """
+        searches = [self._search(doc_index, subject_t, predicate, object_t) \
+            for predicate in kept]
+        nb_skipped = self._get_cardinality(doc_index, subject_t, "", object_t) - \
+            sum(cardinality for _, cardinality in searches)
+        self._add_skipped(max(nb_skipped, 0), estimate=True)
+        for triples, _ in searches:
+            yield from triples
+
+    def _get_cardinality(self, doc_index: int, subject_t: str, predicate_t: str,
+                         object_t: str) -> int:
+        """ Number of triples of a document matching the pattern, without iterating
+        (estimated by HDT for some patterns) """
+        return self._search(doc_index, subject_t, predicate_t, object_t)[1]
 
     def get_triples(self, **params: dict) -> list[(str, str, str)]:
         """ Querying HDT dataset """
@@ -63,14 +279,79 @@ class HDTInterface(Interface):
         predicate_t = params["predicate"] if "predicate" in params else ""
         object_t = params["object"] if "object" in params else ""
 
-        triples = []
-        for doc in self.docs:
-            curr_triples, _ = doc.search_triples(subject_t, predicate_t, object_t)
-            triples += list(curr_triples)
+        return self._merge(self._map_docs(
+            lambda doc_index: list(self._iter_search(doc_index, subject_t,
+                                                     predicate_t, object_t)),
+            self._get_docs(subject_t, predicate_t, object_t)))
+
+    def _iter_filtered_doc(self, doc_index: int, params: dict[str, str], filter_pred: dict,
+                           filter_keep: bool) -> Iterator[tuple[str, str, str]]:
+        """ Predicate filter pushed down to HDT, for one document
+        - keeping: one index lookup per kept predicate (see `_iter_keeping`)
+        - removing: triples with a removed predicate are counted while iterating,
+        but never stored """
+        if filter_keep:
+            return self._iter_keeping(doc_index, params.get("subject", ""),
+                                      params.get("object", ""), kept=filter_pred)
+        return self._iter_excluding(doc_index, params.get("subject", ""),
+                                    params.get("object", ""), excluded=filter_pred)
+
+    def get_triples_filtered(self, params: dict[str, str], filter_pred: list,
+                             filter_keep: bool) -> list[(str, str, str)]:
+        """ Predicate filter pushed down to HDT (see `_iter_filtered_doc`) """
+        if params.get("predicate"):
+            return Interface.get_triples_filtered(
+                self, params=params, filter_pred=filter_pred, filter_keep=filter_keep)
+        filter_pred = dict.fromkeys(filter_pred)
+        return self._merge(self._map_docs(
+            lambda doc_index: list(self._iter_filtered_doc(doc_index, params, filter_pred,
+                                                           filter_keep)),
+            self._get_docs(params.get("subject", ""), "", params.get("object", ""))))
+
+    def iter_triples_filtered(self, params: dict[str, str], filter_pred: list,
+                              filter_keep: bool, chunk_size: int) \
+                                -> Iterator[list[(str, str, str)]]:
+        """ Iterating over HDT, one document after the other:
+        at most `chunk_size` triples in memory at once
+        Triples also in a previous document are skipped (looked up in these documents,
+        no set of the triples already returned) """
+        if params.get("predicate"):
+            return Interface.iter_triples_filtered(
+                self, params=params, filter_pred=filter_pred, filter_keep=filter_keep,
+                chunk_size=chunk_size)
+        filter_pred = dict.fromkeys(filter_pred)
+        doc_indexes = self._get_docs(params.get("subject", ""), "", params.get("object", ""))
+        return self._chunk(
+            (triple for position, doc_index in enumerate(doc_indexes) \
+                for triple in self._iter_filtered_doc(doc_index, params, filter_pred,
+                                                      filter_keep) \
+                    if not self._in_docs(triple, doc_indexes[:position])),
+            chunk_size)
 
-        return triples
+    def _in_docs(self, triple: (str, str, str), doc_indexes: list[int]) -> bool:
+        """ Whether one of the documents has the triple (exact lookup) """
+        return any(self._get_cardinality(doc_index, *triple) > 0 for doc_index in doc_indexes)
 
+    def get_triples_many(self, subjects: list[str], predicates: list[str]) \
+        -> list[(str, str, str)]:
+        """ Batched lookup: one (s, p, ?) index lookup per subject/predicate pair,
+        instead of materialising all outgoing triples of each subject
+        Each document only looks up the subjects in its dictionary """
+        def search_doc(doc_index: int) -> list[(str, str, str)]:
+            triples = []
+            for subject in subjects:
+                if len(self.docs) > 1 and not self._has_terms(doc_index, str(subject), "", ""):
+                    continue
+                for predicate in predicates:
+                    triples += self._iter_search(doc_index, str(subject), str(predicate), "")
+            return triples
+        return self._merge(self._map_docs(search_doc, list(range(len(self.docs)))))
 
+    def close(self):
+        """ Stopping the threads querying the documents """
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
 
 if __name__ == '__main__':
     NODE = "http://dbpedia.org/resource/André_Masséna"
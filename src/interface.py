@@ -4,12 +4,14 @@ Interface to query the data
 Generic interface that cannot be used alone
 Classes that will inherit that class (eg HDT, SPARQL)
 """
-import os
-import yaml
-from tqdm import tqdm
+from itertools import islice
+from typing import Iterable, Iterator
 import pandas as pd
 from pandas.core.frame import DataFrame
-from settings import FOLDER_PATH
+from src.superclass_resolver import SuperclassResolver
+from src.node_filter import get_dataset_node_filter
+from src.registry import get_dataset_config
+from src.profiler import NULL_PROFILER
 
 DEFAULT_PRED = \
     ["http://www.w3.org/1999/02/22-rdf-syntax-ns#type",
@@ -19,16 +21,16 @@ DEFAULT_PRED = \
      "http://dbpedia.org/property/birthDate",
      "http://dbpedia.org/property/deathDate"]
 
-with open(os.path.join(FOLDER_PATH, "dataset-config", "dbpedia.yaml"),
-          encoding='utf-8') as file:
-    dbpedia_dataset_config = yaml.load(file, Loader=yaml.FullLoader)
 
 class Interface:
     """ Querying the KG """
-    def __init__(self, dataset_config: dict = dbpedia_dataset_config,
+    def __init__(self, dataset_config: dict = None,
                  dates: list[str] = [None, None], default_pred: list[str] = DEFAULT_PRED,
                  filter_kb: bool = 1):
+        """ `dataset_config`: dict, dataset config (default: DBpedia, see `src.registry`) """
         self.pred = default_pred
+        if dataset_config is None:
+            dataset_config = get_dataset_config("dbpedia")
 
         self.start_date = dates[0]
         self.end_date = dates[1]
@@ -37,52 +39,118 @@ class Interface:
         self.dataset_config = dataset_config
         self.dataset_type = dataset_config["config_type"]
 
+        self.superclass_resolver = SuperclassResolver(get_parent=self._get_parent_class)
+        self.node_filter = get_dataset_node_filter(dataset_config=dataset_config,
+                                                   filter_kb=filter_kb)
+        # Triples matching a request but excluded by its predicate filter
+        self.skipped = 0
+        # Timings of the requests (see `src.profiler`), set by the search framework
+        self.profiler = NULL_PROFILER
+
     def get_triples(self, **params: dict) -> list:
         """ Will be inherited by subclassses """
         return []
 
+    def get_triples_many(self, subjects: list[str], predicates: list[str]) \
+        -> list[(str, str, str)]:
+        """ Batched lookup: all triples (s, p, o) s.t. s in `subjects` and p in `predicates`
+        Default implementation runs one request per subject,
+        subclasses that can query several patterns at once should override it """
+        triples = []
+        for subject in subjects:
+            triples += self.run_request(params=dict(subject=str(subject)),
+                                        filter_pred=predicates, filter_keep=True)
+        return triples
+
     def run_request(self, params: dict[str, str], filter_pred: list,
                     filter_keep: bool) -> list[(str, str, str)]:
         """ Returning triples corresponding to query """
+        return self.get_triples_filtered(params=params, filter_pred=filter_pred,
+                                         filter_keep=filter_keep)
+
+    def get_triples_filtered_many(self, list_params: list[dict[str, str]], filter_pred: list,
+                                  filter_keep: bool) -> list[list[(str, str, str)]]:
+        """ Same as `run_request` for each params of `list_params`
+        Default implementation runs the requests one after the other,
+        subclasses that can send several requests at once should override it """
+        return [self.run_request(params=params, filter_pred=filter_pred,
+                                 filter_keep=filter_keep) for params in list_params]
+
+    def get_triples_filtered(self, params: dict[str, str], filter_pred: list,
+                             filter_keep: bool) -> list[(str, str, str)]:
+        """ Triples matching `params`, keeping (or removing) those whose predicate
+        is in `filter_pred`
+        Default implementation filters after fetching all triples,
+        subclasses that can push the filter down to the KG should override it """
         triples = self.get_triples(**params)
+        res = self._filter_pred(triples=triples, filter_pred=filter_pred,
+                                filter_keep=filter_keep)
+        self.skipped += len(triples) - len(res)
+        return res
+
+    def iter_triples_filtered(self, params: dict[str, str], filter_pred: list,
+                              filter_keep: bool, chunk_size: int) \
+                                -> Iterator[list[(str, str, str)]]:
+        """ Same triples as `get_triples_filtered`, in lists of at most `chunk_size` triples
+        Default implementation fetches all triples first,
+        subclasses that can iterate over the KG should override it """
+        return self._chunk(self.get_triples_filtered(
+            params=params, filter_pred=filter_pred, filter_keep=filter_keep), chunk_size)
+
+    @staticmethod
+    def _chunk(triples: Iterable, chunk_size: int) -> Iterator[list[(str, str, str)]]:
+        """ Consecutive lists of at most `chunk_size` triples """
+        triples = iter(triples)
+        while True:
+            chunk = list(islice(triples, chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+    def get_pushdown_stats(self) -> dict:
+        """ Counters of the predicate filter """
+        return {"skipped": self.skipped}
+
+    @staticmethod
+    def _filter_pred(triples: list[(str, str, str)], filter_pred: list,
+                     filter_keep: bool) -> list[(str, str, str)]:
+        """ Keeping (or removing) triples whose predicate is in `filter_pred` """
         if filter_keep:
             return [(a, b, c) for (a, b, c) in triples if b in filter_pred]
         return [(a, b, c) for (a, b, c) in triples if b not in filter_pred]
 
-    def get_superclass(self, node: str) -> str:
-        """ Superclass of a node
-        Most ancient ancestor before owl:Thing """
+    def _get_parent_class(self, node: str) -> str:
+        """ Direct superclass of a node, None if no superclass or if owl:Thing """
         info = self.run_request(
             params=dict(subject=str(node)),
             filter_pred=self.dataset_config["sub_class_of"],
             filter_keep=True)
 
         if not info:
-            return node
+            return None
         if str(info[0][2]) == self.dataset_config["owl_thing"]:
-            return node
-        return self.get_superclass(str(info[0][2]))
+            return None
+        return str(info[0][2])
+
+    def get_superclass(self, node: str) -> str:
+        """ Superclass of a node
+        Most ancient ancestor before owl:Thing (memoised) """
+        return self.superclass_resolver(str(node))
 
     def _get_all_results(self, node: str, predicate: list[str]) \
         -> (DataFrame, DataFrame, DataFrame):
-        """ ingoing, outgoing, specific outgoing """
-        ingoing = self._get_ingoing(node, predicate)
-        outgoing = self._get_outgoing(node, predicate)
+        """ ingoing, outgoing, specific outgoing
+        Ingoing and outgoing triples are requested together (see `get_triples_filtered_many`),
+        then specific outgoing ones in one batch (see `get_triples_many`) """
+        with self.profiler.stage("get_triples"):
+            ingoing, outgoing = self.get_triples_filtered_many(
+                list_params=[dict(object=str(node)), dict(subject=str(node))],
+                filter_pred=predicate, filter_keep=False)
+        self.profiler.add("get_triples", triples=len(ingoing) + len(outgoing))
+        ingoing, outgoing = self._filter_kb(ingoing), self._filter_kb(outgoing)
         return ingoing, outgoing, self._filter_specific(
             self._get_specific_outgoing(ingoing=ingoing, outgoing=outgoing))
 
-    def _filter_namespace(self, triples: list[(str, str, str)]):
-        """ Filters nodes that start with a regexed value """
-
-        def filter_f(x_val):
-            return x_val.startswith(self.dataset_config["start_uri"]) or \
-                not any(x_val.startswith(elt) for elt in ["http", '"'])
-
-        triples = [elt for elt in triples if filter_f(elt[2])]
-        triples = [elt for elt in triples if filter_f(elt[0])]
-
-        return triples
-
     @staticmethod
     def pre_process_date(x_date: str) -> str:
         """ Pre processing date (to be format comparable later) """
@@ -97,18 +165,6 @@ class Interface:
         else:
             return x_date
 
-    def _filter_node(self, triples: list[(str, str, str)], filter_out: list[str]) \
-        -> list[(str, str, str)]:
-        """ Filtering nodes based on starting patterns/regexs"""
-        triples = self._filter_namespace(triples)
-        triples = [elt for elt in triples if \
-            not any(elt[0].startswith(pattern) for pattern in filter_out)]
-        triples = [elt for elt in triples if \
-            not any(elt[2].startswith(pattern) for pattern in filter_out)]
-        triples = [elt for elt in triples if \
-            not any(elt[2].endswith(pattern) for pattern in [".svg"])]
-        return triples
-
     def _filter_specific(self, triples: list[(str, str, str)]) \
         -> list[(str, str, str)]:
         """ Filtering objects of triples based on value """
@@ -134,33 +190,29 @@ class Interface:
                                  filter_keep: bool) \
                                     -> list[(str, str, str)]:
         """ Filtering 1-hop neighbours depending on dataset """
-        triples = self.run_request(params=params,
-                                   filter_pred=predicate, filter_keep=filter_keep)
-        if self.filter_kb  and self.dataset_config['config_type'] == "dbpedia":
-            return self._filter_node(triples=triples, filter_out=[self.dataset_config["category"]])
-        if self.dataset_config['config_type'] == "wikidata":
-            return self._filter_node(triples=triples,
-                                     filter_out=self.dataset_config["start_stop_uri"])
-        return triples
+        with self.profiler.stage("get_triples"):
+            triples = self.run_request(params=params,
+                                       filter_pred=predicate, filter_keep=filter_keep)
+        self.profiler.add("get_triples", triples=len(triples))
+        return self._filter_kb(triples=triples)
+
+    def _filter_kb(self, triples: list[(str, str, str)]) -> list[(str, str, str)]:
+        """ Removing nodes depending on dataset (e.g. categories for DBpedia) """
+        if self.node_filter is None:
+            return triples
+        return self.node_filter(triples)
 
     def _get_specific_outgoing(self, ingoing: list[tuple], outgoing: list[tuple]) \
         -> list[(str, str, str)]:
-        """ Returning specific outgoing nodes, e.g. rdf:type and dates """
-        temp_res = []
-
-        for i in tqdm(range(len(ingoing))):
-            subject = ingoing[i][0]
-            temp_res += self.run_request(params=dict(subject=str(subject)),
-                                             filter_pred=self.pred,
-                                             filter_keep=True)
-
-        for i in tqdm(range(len(outgoing))):
-            object_t = outgoing[i][2]
-            temp_res += self.run_request(params=dict(subject=str(object_t)),
-                                                         filter_pred=self.pred,
-                                                         filter_keep=True)
-
-        return temp_res
+        """ Returning specific outgoing nodes, e.g. rdf:type and dates
+        Subjects of ingoing and objects of outgoing are de-duplicated
+        and queried in one batch """
+        subjects = list(dict.fromkeys(
+            [str(elt[0]) for elt in ingoing] + [str(elt[2]) for elt in outgoing]))
+        with self.profiler.stage("specific_outgoing"):
+            triples = self.get_triples_many(subjects=subjects, predicates=self.pred)
+        self.profiler.add("specific_outgoing", subjects=len(subjects), triples=len(triples))
+        return triples
 
     @staticmethod
     def _get_df(list_triples: list[tuple], type_df: str) -> DataFrame:
@@ -170,6 +222,32 @@ class Interface:
                              "object": [str(row[2]) for row in list_triples],
                              "type_df": [type_df] * len(list_triples)}).drop_duplicates()
 
+    def iter_chunks(self, node: str, predicate: list[str], chunk_size: int) \
+        -> Iterator[tuple[DataFrame, DataFrame, DataFrame]]:
+        """ Same triples as __call__, streamed by chunks of at most `chunk_size`
+        ingoing (then outgoing) triples: (ingoing, outgoing, specific outgoing) per chunk,
+        specific outgoing triples being the ones of the nodes of the chunk
+        Only the current chunk is kept in memory: `iter_triples_filtered` should not return
+        a triple twice (e.g. in several documents of a dataset),
+        empty dataframes are returned once if the node has no triple """
+        nb_chunks = 0
+        for params, type_df in [(dict(object=str(node)), "ingoing"),
+                                (dict(subject=str(node)), "outgoing")]:
+            for triples in self.iter_triples_filtered(params=params, filter_pred=predicate,
+                                                      filter_keep=False, chunk_size=chunk_size):
+                triples = list(dict.fromkeys(self._filter_kb(triples)))
+                if not triples:
+                    continue
+                ingoing, outgoing = (triples, []) if type_df == "ingoing" else ([], triples)
+                nb_chunks += 1
+                yield self._get_df(ingoing, type_df="ingoing"), \
+                    self._get_df(outgoing, type_df="outgoing"), \
+                    self._get_df(self._filter_specific(self._get_specific_outgoing(
+                        ingoing=ingoing, outgoing=outgoing)), type_df="spec. outgoing")
+        if not nb_chunks:
+            yield self._get_df([], type_df="ingoing"), self._get_df([], type_df="outgoing"), \
+                self._get_df([], type_df="spec. outgoing")
+
     def __call__(self, node: str, predicate: list[str]) \
         -> (DataFrame, DataFrame, DataFrame):
         ingoing, outgoing, types = self._get_all_results(node=node, predicate=predicate)
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+Filtering out nodes of the KG that are not relevant for the search
+(other namespaces, categories, Wikidata statements, images)
+
+All prefix/suffix checks of one node position (subject or object) are compiled
+into a single regex, built once per dataset config, so that each triple is
+classified in one pass
+"""
+import re
+from functools import lru_cache
+from typing import Union
+
+# Prefixes of nodes from another KG (unless they start with the `start_uri` of the dataset)
+EXTERNAL_PREFIXES = ["http", '"']
+SUFFIXES = [".svg"]
+
+
+def _alternatives(values: list[str]) -> str:
+    return "|".join(re.escape(val) for val in values)
+
+
+class NodeFilter:
+    """
+    Triple (s, p, o) kept iff:
+    - s and o start with `start_uri`, or are not URIs/literals from another namespace
+    - s and o don't start with any of `filter_out`
+    - o doesn't end with any of `suffixes`
+    """
+    def __init__(self, start_uri: Union[str, None], filter_out: tuple[str],
+                 suffixes: tuple[str] = tuple(SUFFIXES)):
+        """
+        - `start_uri`: namespace of the dataset, None to skip the namespace check
+        - `filter_out`: prefixes of nodes to remove (e.g. DBpedia categories)
+        - `suffixes`: suffixes of objects to remove (e.g. images)
+        """
+        self.start_uri = start_uri
+        self.filter_out = tuple(filter_out)
+        self.suffixes = tuple(suffixes)
+
+        self.subject_regex = re.compile(self._get_pattern(suffixes=[]), re.DOTALL)
+        self.object_regex = re.compile(self._get_pattern(suffixes=self.suffixes), re.DOTALL)
+
+    def _get_pattern(self, suffixes: list[str]) -> str:
+        """ Lookaheads only, hence the regex matches (empty string) iff node is kept """
+        pattern = ""
+        if self.start_uri is not None:
+            pattern += f"(?={re.escape(self.start_uri)}|(?!{_alternatives(EXTERNAL_PREFIXES)}))"
+        if self.filter_out:
+            pattern += f"(?!{_alternatives(self.filter_out)})"
+        if suffixes:
+            pattern += f"(?!.*(?:{_alternatives(suffixes)})\\Z)"
+        return pattern
+
+    def keep_subject(self, node: str) -> bool:
+        """ Whether node can be kept as subject of a triple """
+        return self.subject_regex.match(node) is not None
+
+    def keep_object(self, node: str) -> bool:
+        """ Whether node can be kept as object of a triple """
+        return self.object_regex.match(node) is not None
+
+    def __call__(self, triples: list[(str, str, str)]) -> list[(str, str, str)]:
+        """ Triples to keep, in one pass """
+        subject_match, object_match = self.subject_regex.match, self.object_regex.match
+        return [triple for triple in triples if \
+            subject_match(str(triple[0])) and object_match(str(triple[2]))]
+
+
+@lru_cache(maxsize=None)
+def get_node_filter(start_uri: Union[str, None], filter_out: tuple[str],
+                    suffixes: tuple[str] = tuple(SUFFIXES)) -> NodeFilter:
+    """ Compiled filter, shared by all interfaces using the same parameters """
+    return NodeFilter(start_uri=start_uri, filter_out=filter_out, suffixes=suffixes)
+
+
+def get_dataset_node_filter(dataset_config: dict, filter_kb: bool) \
+    -> Union[NodeFilter, None]:
+    """ Filter depending on dataset, None if no node is filtered out
+    - DBpedia: categories removed (if `filter_kb`)
+    - Wikidata: statements and references removed """
+    if filter_kb and dataset_config["config_type"] == "dbpedia":
+        return get_node_filter(dataset_config["start_uri"], (dataset_config["category"],))
+    if dataset_config["config_type"] == "wikidata":
+        return get_node_filter(dataset_config["start_uri"],
+                               tuple(dataset_config["start_stop_uri"]))
+    return None
@@ -3,13 +3,12 @@
 Ordering class: ordering with domain and range
 """
 import os
-import json
-from copy import deepcopy
+import numpy as np
 import pandas as pd
 from pandas.core.frame import DataFrame
-from pandas.core.series import Series
 from tqdm import tqdm
 from settings import FOLDER_PATH
+from src.registry import DOMAIN_RANGE_INFO, get_domain_range_info
 
 
 class Ordering:
@@ -45,21 +44,9 @@ class Ordering:
         self.prefix_prop_direct = interface.dataset_config["prefix_constraint_direct"] \
             if "prefix_constraint_direct" in interface.dataset_config else None
 
-        info_folder = os.path.join(FOLDER_PATH, "domain-range-pred")
-
-        self.info = {}
-
-        with open(os.path.join(info_folder, f"{self.dataset_type}-superclasses.json"),
-                  "r", encoding="utf-8") as openfile:
-            self.info["superclasses"] = json.load(openfile)
-
-        with open(os.path.join(info_folder, f"{self.dataset_type}-domain.json"),
-                  "r", encoding="utf-8") as openfile:
-            self.info["domain"] = json.load(openfile)
-
-        with open(os.path.join(info_folder, f"{self.dataset_type}-range.json"),
-                  "r", encoding="utf-8") as openfile:
-            self.info["range"] = json.load(openfile)
+        # Shared with other instances (see `src.registry`): read-only
+        self.info = {name: get_domain_range_info(self.dataset_type, name) \
+            for name in DOMAIN_RANGE_INFO}
 
         self.type_node_to_pred = {
             "ingoing": "domain", "outgoing": "range"
@@ -113,6 +100,8 @@ class Ordering:
         1. Counting number of ingoing/outgoing edges,
         2. Counting number of triples with superclass info
         3. Counting number of triples with correct superclass info
+        The superclass column depends on the predicate only (see `add_superclass_to_df`):
+        superclass info is checked once per distinct predicate
         """
         if iteration not in info:
             info[iteration] = {
@@ -124,53 +113,59 @@ class Ordering:
                 "outgoing_range_relevant": 0
             }
 
-        triple_df.to_csv(f"{type_node}.csv")
+        codes, _ = self._factorize_predicates(triple_df=triple_df)
+        _, first_rows, counts = np.unique(codes, return_index=True, return_counts=True)
+        superclasses = triple_df.superclass.values[first_rows]
 
-        def filter_null(row: Series):
-            return len(row.superclass) > 0
+        focus = [""] + self.focus_pred
+        with_superclass = np.array([len(elt) > 0 for elt in superclasses], dtype=bool)
+        relevant = np.array([any(x in elt for x in focus) for elt in superclasses],
+                            dtype=bool)
 
         info[iteration][f"{type_node}"] += triple_df.shape[0]
         info[iteration][f"{type_node}_{self.type_node_to_pred[type_node]}"] += \
-            triple_df[triple_df.apply(filter_null, axis=1)].shape[0]
-
-        def filter_func(row):
-            return any(x in row.superclass for x in [""] + self.focus_pred)
-        triple_df_filter = deepcopy(triple_df[triple_df.apply(filter_null, axis=1)])
-
+            int(counts[with_superclass].sum())
         info[iteration][f"{type_node}_{self.type_node_to_pred[type_node]}_relevant"] += \
-            triple_df_filter[triple_df_filter.apply(filter_func, axis=1)].shape[0]
+            int(counts[with_superclass & relevant].sum())
 
         return triple_df, info
 
-
-    def add_superclass_to_df(self, triple_df: DataFrame, type_node: str) \
-        -> DataFrame:
-        """ Adding col in df to add superclass of domain/range predicates"""
-
-        def helper_func(x_input, lookup):
+    @staticmethod
+    def _factorize_predicates(triple_df: DataFrame) -> (np.ndarray, np.ndarray):
+        """ Code of the predicate of each row (-1 if missing),
+        distinct predicates (first appearance order) """
+        return pd.factorize(triple_df.predicate.astype(str))
+
+    def _get_superclass(self, predicate: str, lookup: dict) -> list[str]:
+        """ Superclasses of the domain/range classes of one predicate """
+        if self.prefix_entity and self.prefix_prop_direct:
+            predicate = predicate.replace(self.prefix_prop_direct, self.prefix_entity)
+            if predicate not in lookup:
+                return []
             res = []
-            x_input = str(x_input).replace(self.prefix_prop_direct, self.prefix_entity)
-            if x_input in lookup:
-                for elt in [var for var in lookup[x_input] if var in self.info["superclasses"]]:
-                    res += self.info["superclasses"][elt] + [elt]
+            for elt in [var for var in lookup[predicate] if var in self.info["superclasses"]]:
+                res += self.info["superclasses"][elt] + [elt]
             return res
 
-        def get_superclass_func(lookup):
-            if self.prefix_entity and self.prefix_prop_direct:
-                return lambda x: helper_func(x, lookup)
-
-            return lambda x: \
-                    [y for elt in lookup[x] for y in self.info["superclasses"][elt]] if \
-                        str(x) in lookup else []
-
-        if type_node == "ingoing":  # self.info["domain"]
-            triple_df["superclass"] = triple_df["predicate"].apply(
-                get_superclass_func(lookup=self.info["domain"])
-            )
-        else:  # type_node == "outgoing" | self.info["range"]
-            triple_df["superclass"] = triple_df["predicate"].apply(
-                get_superclass_func(lookup=self.info["range"])
-            )
+        if predicate not in lookup:
+            return []
+        return [y for elt in lookup[predicate] for y in self.info["superclasses"][elt]]
+
+    def add_superclass_to_df(self, triple_df: DataFrame, type_node: str) \
+        -> DataFrame:
+        """ Adding col in df to add superclass of domain/range predicates
+        Computed once per distinct predicate, then copied to rows
+        (one list per row, updating one doesn't change the others) """
+        lookup = self.info[self.type_node_to_pred[type_node]]
+        codes, predicates = self._factorize_predicates(triple_df=triple_df)
+
+        # Last one for missing predicates (code -1)
+        superclasses = np.empty(len(predicates) + 1, dtype=object)
+        for index, predicate in enumerate(predicates):
+            superclasses[index] = self._get_superclass(predicate=predicate, lookup=lookup)
+        superclasses[-1] = []
+        triple_df["superclass"] = pd.Series([list(elt) for elt in superclasses[codes]],
+                                            index=triple_df.index, dtype=object)
         return triple_df
 
     @staticmethod
@@ -195,6 +190,8 @@ class Ordering:
 
         Adds superclasses
         """
+        # Copies before updating, since loaded info is shared
+        self.info = {name: dict(info) for name, info in self.info.items()}
         domain_pred = "http://www.w3.org/2000/01/rdf-schema#domain"
         range_pred = "http://www.w3.org/2000/01/rdf-schema#range"
 
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+Parallel node expansion for the HDT interface
+
+Each worker of the pool opens the HDT documents once, when it starts
+(HDT files and domain/range binary files are memory-mapped, hence shared by the OS
+between workers),
+and then expands the shards of nodes it receives
+
+Hit/miss counters of the caches of the workers are sent back with each output,
+and summed in `ParallelExpansion.stats`
+"""
+import multiprocessing as mp
+from math import ceil
+
+from src.expansion import NodeExpansion
+from src.hdt_interface import HDTInterface
+from src.cache_interface import CachedInterface
+
+NODE_EXPANDER = None
+
+
+def _init_worker(args_interface: dict, args_expansion: dict, cache: dict):
+    """ Run once per worker: opening the HDT documents """
+    global NODE_EXPANDER
+    interface = HDTInterface(**args_interface)
+    if cache:
+        interface = CachedInterface(interface=interface, **cache)
+    NODE_EXPANDER = NodeExpansion(interface=interface, **args_expansion)
+
+
+def _get_cache_stats() -> dict:
+    """ Hit/miss counters of the caches of the worker """
+    stats = {}
+    if isinstance(NODE_EXPANDER.interface, CachedInterface):
+        stats["cache"] = NODE_EXPANDER.interface.get_stats()
+    if NODE_EXPANDER.expansion_cache is not None:
+        stats["expansion_cache"] = NODE_EXPANDER.expansion_cache.get_stats()
+    return stats
+
+
+def _expand_one_node(args: dict):
+    """ Output of the expansion, and cache counters added by it """
+    before = _get_cache_stats()
+    output = NODE_EXPANDER(args=args, dates=args["dates"])
+    return output, {name: {key: val - before[name][key] for key, val in counters.items()} \
+        for name, counters in _get_cache_stats().items()}
+
+
+class ParallelExpansion:
+    """
+    Pool of long-lived workers expanding nodes with HDTInterface
+    """
+    def __init__(self, workers: int, args_interface: dict, args_expansion: dict,
+                 cache: dict = None):
+        """
+        - `workers`: int, number of processes
+        - `args_interface`: params to instantiate HDTInterface in each worker
+        - `args_expansion`: params to instantiate NodeExpansion (except interface)
+        - `cache`: params of CachedInterface (except interface), None if no cache
+        """
+        self.workers = workers
+        # Cache name -> hit/miss counters of all workers
+        self.stats = {}
+        self.pool = mp.get_context("spawn").Pool(
+            processes=workers, initializer=_init_worker,
+            initargs=(args_interface, args_expansion, cache))
+
+    def __call__(self, list_args: list[dict], dates: list[str]) -> list:
+        """ Expanding nodes, output in the same order as `list_args` """
+        if not list_args:
+            return []
+        chunksize = max(1, ceil(len(list_args) / (4 * self.workers)))
+        results = self.pool.map(_expand_one_node,
+                                [dict(args, dates=dates) for args in list_args],
+                                chunksize=chunksize)
+        for _, stats in results:
+            for name, counters in stats.items():
+                for key, val in counters.items():
+                    self.stats.setdefault(name, {}).setdefault(key, 0)
+                    self.stats[name][key] += val
+        return [output for output, _ in results]
+
+    def close(self):
+        """ Stopping workers """
+        self.pool.close()
+        self.pool.join()
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+Per-stage timings of the search
+
+Wall time and call counts of each stage of an iteration (selecting nodes, KG queries,
+specific outgoing fan-out, filtering, ordering, occurrence update, ranking, merge,
+disk writes), with counters (triples, bytes written), and per expanded node.
+Stages can be nested (e.g. `get_triples` is part of `kg_query`, itself part of
+`expansion`), their times should not be summed.
+
+Saved in `timings.json`:
+{
+    "total": {<stage>: {"time": .., "calls": .., <counter>: ..}},
+    "iterations": {<iteration>: {"time": .., "stages": {..}, "nodes": {<node>: {..}}}}
+}
+
+When profiling is disabled, NULL_PROFILER is used instead: its methods do nothing.
+"""
+import json
+from time import perf_counter
+from contextlib import contextmanager, nullcontext
+
+
+class Profiler:
+    """ Recording timings and counters of the stages of the search """
+    enabled = True
+
+    def __init__(self):
+        self.iterations = {}
+        self.current = self._new_entry()
+        self.iterations["setup"] = self.current
+        self.start = None
+
+    @staticmethod
+    def _new_entry() -> dict:
+        return {"time": 0, "stages": {}, "nodes": {}}
+
+    def start_iteration(self, iteration: int):
+        """ Following stages are recorded in `iteration` """
+        self.current = self._new_entry()
+        self.iterations[str(iteration)] = self.current
+        self.start = perf_counter()
+
+    def end_iteration(self):
+        """ Wall time of the current iteration """
+        if self.start is not None:
+            self.current["time"] = perf_counter() - self.start
+            self.start = None
+
+    @staticmethod
+    def _add(entry: dict, counters: dict):
+        for key, val in counters.items():
+            entry[key] = entry.get(key, 0) + val
+
+    def add(self, name: str, **counters):
+        """ Adding counters (e.g. `triples`, `bytes`) to stage `name` """
+        self._add(self.current["stages"].setdefault(name, {}), counters)
+
+    def add_node(self, node: str, **counters):
+        """ Adding counters to expanded node `node` """
+        self._add(self.current["nodes"].setdefault(str(node), {}), counters)
+
+    @contextmanager
+    def stage(self, name: str):
+        """ Timing one call of stage `name` """
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time=perf_counter() - start, calls=1)
+
+    @contextmanager
+    def node(self, node: str):
+        """ Timing the expansion of `node` (also counted in stage `expansion`) """
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            duration = perf_counter() - start
+            self.add("expansion", time=duration, calls=1)
+            self.add_node(node, time=duration)
+
+    def get_report(self) -> dict:
+        """ Timings of all iterations, and total per stage """
+        total = {}
+        for entry in self.iterations.values():
+            for name, counters in entry["stages"].items():
+                self._add(total.setdefault(name, {}), counters)
+        iterations = {key: entry for key, entry in self.iterations.items() \
+            if key != "setup" or entry["stages"]}
+        return {"total": total, "iterations": iterations}
+
+    def save(self, path: str):
+        """ Saving the report in a JSON file """
+        with open(path, "w", encoding="utf-8") as openfile:
+            json.dump(self.get_report(), openfile, indent=4)
+
+
+class NullProfiler:
+    """ Profiling disabled: nothing recorded """
+    enabled = False
+
+    def __init__(self):
+        self.context = nullcontext()
+
+    def start_iteration(self, iteration: int):
+        """ Nothing recorded """
+
+    def end_iteration(self):
+        """ Nothing recorded """
+
+    def add(self, name: str, **counters):
+        """ Nothing recorded """
+
+    def add_node(self, node: str, **counters):
+        """ Nothing recorded """
+
+    def stage(self, name: str) -> nullcontext:
+        """ Nothing recorded """
+        return self.context
+
+    def node(self, node: str) -> nullcontext:
+        """ Nothing recorded """
+        return self.context
+
+    def get_report(self) -> dict:
+        """ Nothing recorded """
+        return {}
+
+    def save(self, path: str):
+        """ Nothing recorded """
+
+
+NULL_PROFILER = NullProfiler()
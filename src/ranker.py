@@ -1,8 +1,202 @@
 # -*- coding: utf-8 -*-
 """
 Ranking paths depending on the chosen metric, and returning the highest scored one
+
+Path counts are kept in `PathOccurrences`, a dict that maintains its own ranking
+structure as counts are incremented/decremented/removed,
+hence the best path is retrieved without re-sorting all paths at each iteration
 """
-from math import log
+import heapq
+from bisect import bisect_left, bisect_right
+from math import log, e
+
+
+class _Tier:
+    """
+    Paths sharing the same priority prefix (`1-`, `2-`, `3-` or other)
+    - `counts`: sorted list of distinct counts
+    - `buckets`: count -> (heap of (insertion number, path), {path: insertion number})
+    """
+    def __init__(self):
+        self.counts = []
+        self.buckets = {}
+        self.size = 0
+
+    def add(self, path: str, count: int, seq: int):
+        """ Adding path with its count """
+        if count not in self.buckets:
+            self.buckets[count] = ([], {})
+            self.counts.insert(bisect_left(self.counts, count), count)
+        heap, members = self.buckets[count]
+        heapq.heappush(heap, (seq, path))
+        members[path] = seq
+        self.size += 1
+
+    def remove(self, path: str, count: int):
+        """ Removing path (heap entries are removed lazily) """
+        heap, members = self.buckets[count]
+        del members[path]
+        self.size -= 1
+        if not members:
+            del self.buckets[count]
+            del self.counts[bisect_left(self.counts, count)]
+        elif len(heap) > 2 * len(members) + 16:  # compacting stale entries
+            self.buckets[count] = ([(seq, path) for path, seq in members.items()], members)
+            heapq.heapify(self.buckets[count][0])
+
+    def first(self, count: int) -> (int, str):
+        """ First inserted path among paths with `count` occurrences """
+        heap, members = self.buckets[count]
+        while members.get(heap[0][1]) != heap[0][0]:
+            heapq.heappop(heap)
+        return heap[0]
+
+
+class PathOccurrences(dict):
+    """
+    Path -> count, with ranking structure maintained incrementally
+    Can be used as a regular dict (missing paths have count 0)
+    """
+    def __init__(self, *args, **kwargs):
+        dict.__init__(self)
+        self.seq = {}
+        self.nb_inserted = 0
+        self.total = 0
+        self.tiers = {}
+        # keys touched since last `pop_journal`, None if not recorded (see `Checkpoint`)
+        self.journal = None
+        self.update(*args, **kwargs)
+
+    def __reduce__(self):
+        return (self.__class__, (dict(self),))
+
+    def __missing__(self, key: str) -> int:
+        return 0
+
+    @staticmethod
+    def get_tier(path: str) -> str:
+        """ Priority of path, based on its prefix """
+        return path[0] if path[:1] in ["1", "2", "3"] else ""
+
+    def __setitem__(self, key: str, value: int):
+        if key in self:
+            self._remove_from_tier(key)
+        else:
+            self.seq[key] = self.nb_inserted
+            self.nb_inserted += 1
+        if self.journal is not None:
+            self.journal.add(key)
+        dict.__setitem__(self, key, value)
+        self.total += value
+        self.tiers.setdefault(self.get_tier(key), _Tier()).add(key, value, self.seq[key])
+
+    def _remove_from_tier(self, key: str):
+        value = dict.__getitem__(self, key)
+        self.total -= value
+        self.tiers[self.get_tier(key)].remove(key, value)
+
+    def __delitem__(self, key: str):
+        self._remove_from_tier(key)
+        dict.__delitem__(self, key)
+        del self.seq[key]
+        if self.journal is not None:
+            self.journal.add(key)
+
+    def pop(self, key: str, *default):
+        if key not in self:
+            if default:
+                return default[0]
+            raise KeyError(key)
+        value = dict.__getitem__(self, key)
+        del self[key]
+        return value
+
+    def setdefault(self, key: str, default: int = 0) -> int:
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def clear(self):
+        if self.journal is not None:
+            self.journal.update(self)
+        dict.clear(self)
+        self.seq, self.nb_inserted, self.total, self.tiers = {}, 0, 0, {}
+
+    def pop_journal(self) -> set:
+        """ Keys touched since last call (recording starts at first call) """
+        journal, self.journal = self.journal, set()
+        return journal or set()
+
+    def increment(self, path: str, count: int = 1):
+        """ Adding `count` occurrences to `path` """
+        self[path] += count
+
+    def decrement(self, path: str, count: int = 1):
+        """ Removing `count` occurrences from `path`, path removed if count reaches 0 """
+        if path not in self:
+            return
+        if self[path] <= count:
+            del self[path]
+        else:
+            self[path] -= count
+
+    def remove(self, path: str):
+        """ Removing path """
+        if path in self:
+            del self[path]
+
+    def _get_tier_to_rank(self) -> _Tier:
+        """ Highest priority tier with paths: 1, then 2, then 3, then others """
+        for order in ["1", "2", "3", ""]:
+            if order in self.tiers and self.tiers[order].size > 0:
+                return self.tiers[order]
+        return None
+
+    def get_best(self, reverse: bool, low: int = None, high: int = None):
+        """ Best path depending on its count, within (low, high) if possible
+        - `reverse`: True for highest count, False for lowest count
+        Ties: first inserted path """
+        tier = self._get_tier_to_rank()
+        if tier is None:
+            return None, None
+        counts = tier.counts
+
+        count = None
+        if low is not None and high is not None:
+            if reverse:
+                index = bisect_left(counts, high) - 1
+                if index >= 0 and counts[index] > low:
+                    count = counts[index]
+            else:
+                index = bisect_right(counts, low)
+                if index < len(counts) and counts[index] < high:
+                    count = counts[index]
+        if count is None:
+            count = counts[-1] if reverse else counts[0]
+        return tier.first(count)[1], count
+
+    def get_best_entropy(self):
+        """ Path with highest entropy score: -(count/tot) * log(count/tot)
+        The score is unimodal in count (max for count = tot/e),
+        hence only the two distinct counts closest to tot/e are compared """
+        tier = self._get_tier_to_rank()
+        if tier is None:
+            return None, None
+        counts = tier.counts
+        index = bisect_left(counts, self.total / e)
+
+        best = None
+        for count in counts[max(index-1, 0):index+1]:
+            score = - (count / self.total) * log(count / self.total)
+            seq, path = tier.first(count)
+            if best is None or score > best[0] or (score == best[0] and seq < best[1]):
+                best = (score, seq, path)
+        return best[2], best[0]
+
 
 class Ranker:
     """
@@ -27,42 +221,6 @@ class Ranker:
         self.low_thresold = low_thresold
         self.high_threshold = high_threshold
 
-
-    @staticmethod
-    def filter_dict(dico: str) -> str:
-        """ Ordering dico based on path info
-        If starts by 1: highest priority, then descending order """
-        for order in ["1", "2", "3"]:
-            if any(k.startswith(order) for k in dico.keys()):
-                return {k: v for k, v in dico.items() if k.startswith(order)}
-        return dico
-
-    def _sort_dict(self, dico: str, reverse, filter_items: bool =True) -> (str, str):
-        dico = self.filter_dict(dico=dico)
-        sorted_filtered_items = []
-        if filter_items:
-            sorted_filtered_items = \
-                list({k: v for k, v in sorted(dico.items(),
-                    key=lambda item: item[1], reverse=reverse) if
-                        self.low_thresold < v < self.high_threshold}.items())
-        if not (filter_items and sorted_filtered_items):
-            sorted_filtered_items = \
-                list({k: v for k, v in sorted(dico.items(),
-                    key=lambda item: item[1], reverse=reverse)}.items())
-
-        if sorted_filtered_items:
-            return sorted_filtered_items[0][0], sorted_filtered_items[0][1]
-        return None, None
-
-
-    @staticmethod
-    def _add_entropy_score(dico: str) -> str:
-        new_dico = {}
-        tot = sum(nb for _, nb in dico.items())
-        for path, count in dico.items():
-            new_dico[path] = - (count / tot) * log(count / tot)
-        return new_dico
-
     def __call__(self, occurences: dict) -> dict:
         """
         sorted values with superclass info
@@ -70,14 +228,17 @@ class Ranker:
         2. manually selected predicates + score (N/A)
         3. Only score
         """
+        if not isinstance(occurences, PathOccurrences):
+            occurences = PathOccurrences(occurences)
+
         if "pred" in self.type:
             if "inverse" in self.type:
-                return self._sort_dict(dico=occurences, reverse=False)
+                return occurences.get_best(reverse=False, low=self.low_thresold,
+                                           high=self.high_threshold)
             if "entropy" in self.type:
-                dico = self._add_entropy_score(dico=occurences)
-                return self._sort_dict(dico=dico, reverse=True,
-                                       filter_items=False)
-            return self._sort_dict(dico=occurences, reverse=True)
+                return occurences.get_best_entropy()
+            return occurences.get_best(reverse=True, low=self.low_thresold,
+                                       high=self.high_threshold)
 
         raise ValueError("Not implemented")
 
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""
+Process-wide registry of the files shared by the components of the search
+
+Dataset configs (`dataset-config` folder) and domain/range/superclasses info
+(`domain-range-pred` folder) are parsed on first use only, and then shared by all
+interfaces, NodeExpansion, Ordering and GraphSearchFramework instances of the process.
+Returned objects are shared: they should not be modified.
+
+Domain/range/superclasses info is read from the binary file `{dataset}-domain-range.bin`
+if it exists (memory-mapped, see `src.domain_range_store`), else from the JSON files.
+"""
+import os
+import json
+from collections.abc import Mapping
+from functools import lru_cache
+from typing import Union
+
+import yaml
+from settings import FOLDER_PATH
+from src.domain_range_store import DomainRangeStore
+
+DOMAIN_RANGE_INFO = ["superclasses", "domain", "range"]
+
+
+@lru_cache(maxsize=None)
+def get_dataset_config(dataset_type: str) -> dict:
+    """ Config of a dataset, e.g. `dbpedia` -> content of `dataset-config/dbpedia.yaml` """
+    with open(os.path.join(FOLDER_PATH, "dataset-config", f"{dataset_type}.yaml"),
+              encoding="utf-8") as openfile:
+        return yaml.load(openfile, Loader=yaml.FullLoader)
+
+
+def get_domain_range_path(dataset_type: str) -> str:
+    """ Path to the binary domain/range/superclasses file of a dataset """
+    return os.path.join(FOLDER_PATH, "domain-range-pred", f"{dataset_type}-domain-range.bin")
+
+
+@lru_cache(maxsize=None)
+def get_domain_range_store(dataset_type: str) -> Union[DomainRangeStore, None]:
+    """ Memory-mapped domain/range/superclasses info, None if no binary file """
+    path = get_domain_range_path(dataset_type)
+    return DomainRangeStore(path) if os.path.exists(path) else None
+
+
+@lru_cache(maxsize=None)
+def get_domain_range_info(dataset_type: str, name: str) -> Mapping:
+    """ Info on predicates/classes of a dataset, `name` in DOMAIN_RANGE_INFO,
+    e.g. (`dbpedia`, `range`) -> content of `domain-range-pred/dbpedia-range.json` """
+    if name not in DOMAIN_RANGE_INFO:
+        raise ValueError(f"`name` should be one of {DOMAIN_RANGE_INFO}")
+    store = get_domain_range_store(dataset_type)
+    if store is not None:
+        return store[name]
+    with open(os.path.join(FOLDER_PATH, "domain-range-pred", f"{dataset_type}-{name}.json"),
+              "r", encoding="utf-8") as openfile:
+        return json.load(openfile)
+
+
+def clear():
+    """ Forgetting all loaded files (e.g. if they were modified on disk) """
+    get_dataset_config.cache_clear()
+    get_domain_range_store.cache_clear()
+    get_domain_range_info.cache_clear()
@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""
+Scheduler for sweeps of searches (e.g. grid search over events and configs)
+
+- Jobs (one search = one config) are run by a small pool of long-lived workers,
+HDT documents, dataset configs and caches opened by one search are reused by the next
+ones of the same worker (see `src.registry` and `src.hdt_interface`)
+- Jobs are queued longest first (estimated cost), and each idle worker takes the next
+job of the shared queue: short searches fill the gaps left by long ones. Costs come from
+the durations in the ledger; before any job is done, from a prior (by default the
+number of events in the gold standard of the search)
+- Each job has its own timeout (alarm signal in the worker): a search that takes too long
+is stopped, and its worker moves on to the next job. The signal is only handled between
+Python instructions: a long call to the C library of HDT (e.g. iterating over the
+triples of a hub) delays the timeout until it returns
+- Each finished job is appended to a ledger (JSON lines), done jobs are skipped on rerun
+
+Jobs already use one process each: `workers` should not be set in their configs.
+"""
+import os
+import json
+import time
+import signal
+import hashlib
+import multiprocessing as mp
+from copy import deepcopy
+from datetime import datetime
+from typing import Callable
+
+from src.framework import GraphSearchFramework
+
+
+class JobTimeout(BaseException):
+    """ Raised in a worker when its current job exceeds the timeout
+    (not an Exception: not caught by the error handling of the search) """
+
+
+def _raise_timeout(signum, frame):
+    raise JobTimeout()
+
+
+def run_search(config: dict, walk: str) -> dict:
+    """ Running one search, info to save in the ledger """
+    framework = GraphSearchFramework(config=deepcopy(config), walk=walk)
+    framework()  # workers of the parallel expansion stopped even if it fails
+    return {"save_folder": framework.save_folder}
+
+
+def get_gold_standard_size(config: dict) -> int:
+    """ Number of events in the gold standard(s) of a search (or of a sweep of searches,
+    see `src.sweep`), 0 if none """
+    size = 0
+    for curr_config in config.get("sweep", [config]):
+        path = curr_config.get("gold_standard")
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as openfile:
+                size += max(sum(1 for line in openfile if line.strip()) - 1, 0)
+    return size
+
+
+def _init_worker():
+    signal.signal(signal.SIGALRM, _raise_timeout)
+
+
+def _run_job(args: tuple[dict, Callable]) -> dict:
+    job, run_job = args
+    start = time.time()
+    record = {key: job[key] for key in ["job_id", "group", "walk", "iterations"]}
+    signal.alarm(job["timeout"] or 0)
+    try:
+        record.update(run_job(job["config"], job["walk"]) or {})
+        record["status"] = "done"
+    except JobTimeout:
+        record["status"] = "timeout"
+    except Exception as error:  # pylint: disable=broad-except
+        record.update(status="error", error=repr(error))
+    finally:
+        signal.alarm(0)
+    record.update(duration=time.time() - start, end=str(datetime.now()))
+    return record
+
+
+class Scheduler:
+    """
+    Running a set of searches in parallel, with a ledger of finished ones
+    """
+    def __init__(self, workers: int, ledger_path: str, timeout: int = None,
+                 run_job: Callable = run_search):
+        """
+        - `workers`: int, number of processes running searches
+        - `ledger_path`: path to the ledger (JSON lines, created if it doesn't exist)
+        - `timeout`: int, max number of seconds per job, None for no limit
+        - `run_job`: function (config, walk) -> dict of info to save in the ledger
+        (module-level, to be sent to workers)
+        """
+        self.workers = workers
+        self.ledger_path = ledger_path
+        self.timeout = timeout
+        self.run_job = run_job
+
+        self.ledger = self._read_ledger()
+        self.done = {record["job_id"] for record in self.ledger if record["status"] == "done"}
+        self.jobs = []
+
+    def _read_ledger(self) -> list[dict]:
+        if not os.path.exists(self.ledger_path):
+            return []
+        with open(self.ledger_path, "r", encoding="utf-8") as openfile:
+            return [json.loads(line) for line in openfile if line.strip()]
+
+    def _write_record(self, record: dict):
+        folder = os.path.dirname(self.ledger_path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+        with open(self.ledger_path, "a", encoding="utf-8") as openfile:
+            openfile.write(json.dumps(record) + "\n")
+        self.ledger.append(record)
+
+    @staticmethod
+    def get_job_id(config: dict, walk: str) -> str:
+        """ Hash of a search (same config and walk = same job) """
+        return hashlib.sha1(json.dumps({"config": config, "walk": walk}, sort_keys=True,
+                                       default=str).encode("utf-8")).hexdigest()
+
+    def add(self, config: dict, walk: str, group: str, prior: float = None) -> bool:
+        """ Adding a search to run, False if it was already done
+        - `group`: jobs with similar cost (e.g. same starting event), for cost estimates
+        - `prior`: relative cost per iteration, used while no job of the ledger is done
+        (e.g. degree of the start node), default: size of the gold standard """
+        job_id = self.get_job_id(config=config, walk=walk)
+        if job_id in self.done or any(job["job_id"] == job_id for job in self.jobs):
+            return False
+        if prior is None:
+            prior = get_gold_standard_size(config) or 1
+        self.jobs.append({"job_id": job_id, "config": config, "walk": walk, "group": group,
+                          "iterations": config.get("iterations", 1), "timeout": self.timeout,
+                          "prior": prior})
+        return True
+
+    def estimate_cost(self, job: dict) -> float:
+        """ Estimated duration: iterations x mean duration per iteration of the previous
+        jobs of the same group (of all previous jobs if none in the group)
+        If no job is done yet: iterations x prior of the job """
+        per_iteration = {}
+        for record in self.ledger:
+            if record["status"] == "done":
+                per_iteration.setdefault(record["group"], []).append(
+                    record["duration"] / max(record["iterations"], 1))
+        durations = per_iteration.get(job["group"]) or \
+            [val for vals in per_iteration.values() for val in vals] or [job.get("prior", 1)]
+        return job["iterations"] * sum(durations) / len(durations)
+
+    def __call__(self) -> list[dict]:
+        """ Running all jobs added, longest first, returns their ledger records """
+        jobs = sorted(self.jobs, key=self.estimate_cost, reverse=True)
+        records = []
+        if not jobs:
+            return records
+        with mp.get_context("spawn").Pool(processes=min(self.workers, len(jobs)),
+                                          initializer=_init_worker) as pool:
+            for record in pool.imap_unordered(
+                    _run_job, [(job, self.run_job) for job in jobs], chunksize=1):
+                print(f"[{record['status']}] {record['group']} ({record['duration']:.0f}s)")
+                self._write_record(record)
+                records.append(record)
+                if record["status"] == "done":
+                    self.done.add(record["job_id"])
+        self.jobs = []
+        return records
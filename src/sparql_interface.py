@@ -1,13 +1,11 @@
 """
 #TO DO: add documentation on this script
 """
-import os
 import urllib.request
 from urllib.parse import quote_plus
-import yaml
 from pandas.core.frame import DataFrame
 from SPARQLWrapper import SPARQLWrapper, RDFXML
-from settings import AGENT, FOLDER_PATH
+from settings import AGENT
 from src.interface import Interface
 
 DEFAULT_PRED = \
@@ -18,9 +16,9 @@ DEFAULT_PRED = \
      "http://dbpedia.org/property/birthDate",
      "http://dbpedia.org/property/deathDate"]
 
-with open(os.path.join(FOLDER_PATH, "dataset-config", "dbpedia.yaml"),
-          encoding='utf-8') as file:
-    dbpedia_dataset_config = yaml.load(file, Loader=yaml.FullLoader)
+# Characters kept as is in URIs (e.g. `#` in rdf:type, brackets in DBpedia resources)
+IRI_SAFE = "/:#()',!*;=&?@$+%~"
+
 
 class SPARQLQuery:
     """
@@ -39,20 +37,37 @@ class SPARQLQuery:
         <VALUES-unique-predicate>
         <VALUES-unique-object>
         ?s ?p ?o .
+        <FILTER-predicate>
             }
         """
         return query
 
-    def __call__(self, params: dict[str, str]) -> str:
+    @staticmethod
+    def _format_values(values, sep: str = " ") -> str:
+        """ One or several URIs to put in a VALUES block (or a FILTER list) """
+        if isinstance(values, str):
+            values = [values]
+        return sep.join("<" + quote_plus(val, safe=IRI_SAFE) + ">" for val in values)
+
+    def __call__(self, params: dict) -> str:
+        """ Each param value can be either a single URI or a list of URIs
+        `predicate_not_in`: predicates to exclude, with a FILTER clause """
         query = self.query_template
         for name, abbr in [("subject", "s"), ("predicate", "p"), ("object", "o")]:
             if name in params and params[name]:
                 query = query.replace(
                     f"<VALUES-unique-{name}>",
-                    "VALUES ?" + abbr + " { <" + quote_plus(params[name], safe='/:') + "> } "
+                    "VALUES ?" + abbr + " { " + self._format_values(params[name]) + " } "
                 )
             else:
                 query = query.replace(f"<VALUES-unique-{name}>", "")
+        if params.get("predicate_not_in"):
+            query = query.replace(
+                "<FILTER-predicate>",
+                "FILTER(?p NOT IN (" + \
+                    self._format_values(params["predicate_not_in"], sep=", ") + ")) ")
+        else:
+            query = query.replace("<FILTER-predicate>", "")
         return query
 
 
@@ -60,19 +75,56 @@ class SPARQLInterface(Interface):
     """
     #TO DO: add documentation on this script
     """
-    def __init__(self, dataset_config: dict = dbpedia_dataset_config,
+    def __init__(self, dataset_config: dict = None,
                  dates: list[str] = [None, None], default_pred: list[str] = DEFAULT_PRED,
                  filter_kb: bool = 1, sparql_endpoint: str = "http://dbpedia.org/sparql",
-                 agent: str = AGENT):
+                 agent: str = AGENT, batch_size: int = 100):
+        """
+        - `batch_size`: int, max number of subjects in one VALUES block
+        for batched lookups (`get_triples_many`)
+        """
         Interface.__init__(self, dataset_config=dataset_config, dates=dates,
                            default_pred=default_pred, filter_kb=filter_kb)
         self.sparql = SPARQLWrapper(sparql_endpoint, agent=agent)
         self.sparql_query = SPARQLQuery()
+        self.batch_size = batch_size
 
     def get_triples(self, **params: dict[str, str]) -> list[(str, str, str)]:
         query = self.sparql_query(params=params)
         return self.call_endpoint(query=query)
 
+    def get_triples_filtered(self, params: dict[str, str], filter_pred: list,
+                             filter_keep: bool) -> list[(str, str, str)]:
+        """ Predicate filter pushed down to the endpoint:
+        kept predicates in a VALUES block, removed ones in a FILTER clause """
+        if params.get("predicate"):
+            return Interface.get_triples_filtered(
+                self, params=params, filter_pred=filter_pred, filter_keep=filter_keep)
+        if filter_keep:
+            if not filter_pred:
+                return []
+            return self.get_triples(**params, predicate=filter_pred)
+        return self.get_triples(**params, predicate_not_in=filter_pred)
+
+    def get_pushdown_stats(self) -> dict:
+        """ Triples excluded by the FILTER clause are never sent by the endpoint,
+        they cannot be counted: no counters """
+        return {}
+
+    def get_triples_many(self, subjects: list[str], predicates: list[str]) \
+        -> list[(str, str, str)]:
+        """ Batched lookup: one CONSTRUCT query per chunk of `batch_size` subjects,
+        with subjects and predicates in VALUES blocks
+        (literals are skipped, they cannot be subjects) """
+        if not predicates:
+            return []
+        subjects = [str(elt) for elt in subjects if str(elt).startswith("http")]
+        triples = []
+        for i in range(0, len(subjects), self.batch_size):
+            triples += self.get_triples(subject=subjects[i:i+self.batch_size],
+                                        predicate=predicates)
+        return [(a, b, c) for (a, b, c) in triples if b in predicates]
+
     def call_endpoint(self, query: str) -> DataFrame:
         """ Querying KG through SPARQL endpoint """
         proxy_support = urllib.request.ProxyHandler({})
@@ -85,7 +137,7 @@ class SPARQLInterface(Interface):
             results = self.sparql.query().convert()
             return [(str(triple[0]), str(triple[1]), str(triple[2])) \
                 for triple in list(set(results))]
-        except:
+        except Exception:  # pylint: disable=broad-except
             return []
 
 
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""
+Columnar store for the subgraph built during the search
+
+Triples are appended as integer columns: URIs (and literals) are interned once
+in a shared vocabulary, `type_df` is stored as a category code.
+Small appends are buffered and concatenated into chunks of `chunk_size` rows,
+hence adding the output of one expanded node is O(rows added),
+and the dataframe is only materialised when it is asked for.
+"""
+import numpy as np
+import pandas as pd
+from pandas.core.frame import DataFrame
+
+COLUMNS = ["subject", "predicate", "object", "type_df", "iteration"]
+URI_COLUMNS = ["subject", "predicate", "object"]
+TYPE_DF = ["ingoing", "outgoing", "spec. outgoing"]
+
+
+class SubgraphStore:
+    """
+    Dictionary-encoded triples (subject, predicate, object, type_df, iteration)
+    """
+    def __init__(self, chunk_size: int = 65536):
+        """
+        - `chunk_size`: int, number of rows buffered before being merged in one chunk
+        """
+        self.chunk_size = chunk_size
+
+        self.vocab = {}  # value -> id
+        self.values = []  # id -> value
+        self.type_df = {elt: i for i, elt in enumerate(TYPE_DF)}
+
+        self.chunks = []
+        self.buffer = []
+        self.buffer_size = 0
+        self.size = 0
+        self.cached_df = None
+
+    def __len__(self):
+        return self.size
+
+    def _get_ids(self, values: pd.Series) -> np.ndarray:
+        """ Interning values, each distinct value of the column looked up once """
+        codes, uniques = pd.factorize(values.astype(str))
+        ids = np.empty(len(uniques), dtype=np.int32)
+        for i, value in enumerate(uniques):
+            if value not in self.vocab:
+                self.vocab[value] = len(self.values)
+                self.values.append(value)
+            ids[i] = self.vocab[value]
+        return ids[codes]
+
+    def _get_type_df_codes(self, values: pd.Series) -> np.ndarray:
+        codes, uniques = pd.factorize(values.astype(str))
+        for value in uniques:
+            if value not in self.type_df:
+                self.type_df[value] = len(self.type_df)
+        return np.array([self.type_df[value] for value in uniques], dtype=np.int8)[codes]
+
+    def append(self, triple_df: DataFrame, iteration: int):
+        """ Adding triples (subject, predicate, object, type_df) found at `iteration` """
+        if triple_df.shape[0] == 0:
+            return
+        chunk = {col: self._get_ids(triple_df[col]) for col in URI_COLUMNS}
+        chunk["type_df"] = self._get_type_df_codes(triple_df["type_df"])
+        chunk["iteration"] = np.full(triple_df.shape[0], iteration, dtype=np.int32)
+
+        self.buffer.append(chunk)
+        self.buffer_size += triple_df.shape[0]
+        self.size += triple_df.shape[0]
+        self.cached_df = None
+        if self.buffer_size >= self.chunk_size:
+            self._flush()
+
+    @staticmethod
+    def _concat(chunks: list[dict]) -> dict:
+        return {col: np.concatenate([chunk[col] for chunk in chunks]) for col in COLUMNS}
+
+    def _flush(self):
+        """ Merging buffered rows into one chunk """
+        if self.buffer:
+            self.chunks.append(self._concat(self.buffer))
+            self.buffer, self.buffer_size = [], 0
+
+    def get_columns(self) -> dict:
+        """ All rows as encoded columns (chunks merged into one) """
+        self._flush()
+        if not self.chunks:
+            return {col: np.array([], dtype=np.int32) for col in COLUMNS}
+        if len(self.chunks) > 1:
+            self.chunks = [self._concat(self.chunks)]
+        return self.chunks[0]
+
+    def get_delta(self, start: int, start_value: int) -> dict:
+        """ Rows from row number `start`, and values interned from id `start_value`
+        (only the chunks containing these rows are read) """
+        parts, offset = [], 0
+        for chunk in self.chunks + self.buffer:
+            nb_rows = chunk["iteration"].shape[0]
+            if offset + nb_rows > start:
+                parts.append({col: arr[max(start - offset, 0):] for col, arr in chunk.items()})
+            offset += nb_rows
+        columns = self._concat(parts) if parts else \
+            {col: np.array([], dtype=np.int32) for col in COLUMNS}
+        return {"values": self.values[start_value:], "type_df": list(self.type_df.keys()),
+                "columns": columns}
+
+    def extend(self, delta: dict):
+        """ Adding rows from `get_delta` of another store """
+        for value in delta["values"]:
+            self.vocab[value] = len(self.values)
+            self.values.append(value)
+        self.type_df = {elt: i for i, elt in enumerate(delta["type_df"])}
+        nb_rows = delta["columns"]["iteration"].shape[0]
+        if nb_rows:
+            self.buffer.append(delta["columns"])
+            self.buffer_size += nb_rows
+            self.size += nb_rows
+            self.cached_df = None
+            if self.buffer_size >= self.chunk_size:
+                self._flush()
+
+    def get_events(self) -> list[str]:
+        """ Unique subjects of ingoing triples, then unique objects of outgoing ones
+        (same order as in the materialised dataframe) """
+        columns = self.get_columns()
+        ingoing = pd.unique(columns["subject"][columns["type_df"] == self.type_df["ingoing"]])
+        outgoing = pd.unique(columns["object"][columns["type_df"] == self.type_df["outgoing"]])
+        return [self.values[i] for i in ingoing] + [self.values[i] for i in outgoing]
+
+    def nbytes(self) -> int:
+        """ Approximate memory used by the encoded columns and vocabulary """
+        columns = self.get_columns()
+        return sum(arr.nbytes for arr in columns.values()) + \
+            sum(len(value) for value in self.values)
+
+    def to_df(self, categorical: bool = False) -> DataFrame:
+        """ Materialising the subgraph
+        - `categorical`: if True, URI columns are categories (dictionary kept),
+        else strings """
+        if self.cached_df is not None and not categorical:
+            return self.cached_df
+        columns = self.get_columns()
+        type_df = list(self.type_df.keys())
+        data = {"type_df": pd.Categorical.from_codes(columns["type_df"], categories=type_df),
+                "iteration": columns["iteration"]}
+        if categorical:
+            for col in URI_COLUMNS:
+                data[col] = pd.Categorical.from_codes(columns[col], categories=self.values)
+        else:
+            values = np.array(self.values, dtype=object)
+            for col in URI_COLUMNS:
+                data[col] = values[columns[col]]
+        output = pd.DataFrame(data, columns=COLUMNS)
+        if not categorical:
+            self.cached_df = output
+        return output
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""
+Memoised superclass resolution
+
+Walking rdfs:subClassOf one hop at a time is costly (one KG call per hop),
+and many classes share the same chain of ancestors.
+Once a chain is walked, every node on it is cached with its root (path compression),
+hence each class is only queried once.
+"""
+from collections import OrderedDict
+from typing import Callable, Optional
+
+
+class SuperclassResolver:
+    """
+    Most ancient ancestor of a class, with a bounded LRU cache
+    """
+    def __init__(self, get_parent: Callable[[str], Optional[str]],
+                 max_size: int = 100000):
+        """
+        - `get_parent`: function returning the direct superclass of a node,
+        None if the node has no superclass (or if it is the root, e.g. owl:Thing)
+        - `max_size`: int, max number of classes in the cache
+        """
+        self.get_parent = get_parent
+        self.max_size = max_size
+        self.cache = OrderedDict()
+
+    def _get_cached(self, node: str) -> Optional[str]:
+        if node in self.cache:
+            self.cache.move_to_end(node)
+            return self.cache[node]
+        return None
+
+    def _set_cached(self, node: str, root: str):
+        self.cache[node] = root
+        self.cache.move_to_end(node)
+        if len(self.cache) > self.max_size:
+            self.cache.popitem(last=False)
+
+    def __call__(self, node: str) -> str:
+        chain = [node]
+        root = self._get_cached(node)
+        while root is None:
+            parent = self.get_parent(chain[-1])
+            if parent is None or parent in chain:  # root found (or cycle)
+                root = chain[-1]
+            else:
+                chain.append(parent)
+                root = self._get_cached(parent)
+
+        for elt in chain:
+            self._set_cached(elt, root)
+        return root
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+Running several configurations of the search on the same start node as one sweep
+
+Configurations of a grid (e.g. `type_ranking` x `filtering`) often expand the same nodes:
+all of them expand `start` at iteration 1, and many keep on choosing the same nodes
+until their rankings diverge. The searches of a sweep are run step by step, one
+iteration each in turn, and the KG queries of node expansions are shared between searches
+on the same KG (dataset, KB filters, default predicates): within an iteration, the triples
+of a node are retrieved once, then filtered by each search expanding it with its own
+filtering settings (`filtering`, `rdf_type`, dates).
+
+Only the outputs of the current iteration are kept in memory.
+"""
+import json
+from typing import Iterator
+
+from pandas.core.frame import DataFrame
+
+from src.framework import GraphSearchFramework
+
+
+class SharedExpansion:
+    """
+    Wrapper around the NodeExpansion of one search, outputs shared with other searches
+    """
+    def __init__(self, node_expander, key: str, memo: dict, stats: dict):
+        """
+        - `node_expander`: NodeExpansion of the search
+        - `key`: KG settings of the search, same key = same (unfiltered) triples
+        - `memo`: unfiltered triples shared by all searches of the sweep
+        - `stats`: hit/miss counters shared by all searches of the sweep
+        """
+        self.node_expander = node_expander
+        self.key = key
+        self.memo = memo
+        self.stats = stats
+
+    def __getattr__(self, name: str):
+        """ Other attributes of the NodeExpansion (e.g. `iter_chunks`) """
+        if name == "node_expander":
+            raise AttributeError(name)
+        return getattr(self.node_expander, name)
+
+    def __call__(self, args: dict, dates: list[str, str]) \
+        -> (DataFrame, DataFrame, DataFrame, DataFrame, list[str]):
+        key = (self.key, str(args["node"]), tuple(args["predicate"]))
+        profiler = self.node_expander.profiler
+        if key in self.memo:
+            self.stats["hits"] += 1
+        else:
+            self.stats["misses"] += 1
+            with profiler.stage("kg_query"):
+                self.memo[key] = self.node_expander.get_output_triples(
+                    node=args["node"], predicate=args["predicate"])
+            profiler.add("kg_query", triples=sum(triple_df.shape[0] \
+                for triple_df in self.memo[key]))
+        # Filtering does not modify the triples and returns new dataframes
+        ingoing, outgoing, types_date = self.memo[key]
+        with profiler.stage("filtering"):
+            return self.node_expander.filter_sub_graph(types_date, ingoing, outgoing, dates)
+
+
+class Sweep:
+    """
+    Searches of several configurations run step by step with shared node expansions
+    """
+    def __init__(self, configs: list[dict], walk: str = "informed"):
+        """
+        - `configs`: configs of the searches (see `GraphSearchFramework`),
+        `workers` and `chunk_size` are not supported
+        - `walk`: type of walk of all searches, `informed` or `random`
+        """
+        if any(config.get("workers", 1) > 1 or config.get("chunk_size") for config in configs):
+            raise ValueError("Configs of a sweep should not use `workers` nor `chunk_size`")
+        self.frameworks = [GraphSearchFramework(config=config, walk=walk) \
+            for config in configs]
+
+        self.memo = {}
+        self.stats = {"hits": 0, "misses": 0}
+        for framework in self.frameworks:
+            framework.node_expander = SharedExpansion(
+                node_expander=framework.node_expander, key=self.get_expansion_key(framework),
+                memo=self.memo, stats=self.stats)
+
+    @staticmethod
+    def get_expansion_key(framework: GraphSearchFramework) -> str:
+        """ Settings on which the triples retrieved by node expansions depend,
+        filtering settings excluded (applied by each search) """
+        config = framework.config
+        return json.dumps({
+            "type_interface": framework.type_interface,
+            "dataset": config.get("dataset_path", config.get("sparql_endpoint")),
+            "dataset_type": framework.dataset_type,
+            "filter_kb": framework.interface.filter_kb,
+            "default_pred": framework.interface.pred,
+        }, sort_keys=True, default=str)
+
+    def iter_sweep(self, end_node: str = "") -> Iterator[int]:
+        """ Running one iteration of each unfinished search in turn,
+        yielding the number of searches still running after each round """
+        searches = [framework.iter_search(end_node=end_node) for framework in self.frameworks]
+        while searches:
+            searches = [search for search in searches if next(search, None) is not None]
+            self.memo.clear()
+            yield len(searches)
+
+    def __call__(self, end_node: str = "") -> dict:
+        """ Running all searches, returns hit/miss counters of shared expansions """
+        for _ in self.iter_sweep(end_node=end_node):
+            pass
+        return self.stats
+
+
+def run_sweep(config: dict, walk: str) -> dict:
+    """ Job of `src.scheduler`: `config` = {"sweep": list of configs} """
+    sweep = Sweep(configs=config["sweep"], walk=walk)
+    stats = sweep()
+    return {"save_folder": [framework.save_folder for framework in sweep.frameworks],
+            "shared_expansions": stats}
@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+"""
+Synthetic DBpedia-like KGs, for benchmarks (see `src.benchmark`)
+
+- Nodes are events (with an event class and dates), people (with birth/death dates),
+places and other resources, with DBpedia URIs and predicates
+- Edges are drawn between nodes with a Zipf-like popularity: with `alpha` = 0 all nodes
+are as likely to be linked to, with `alpha` >= 1 a handful of hubs (e.g. countries in
+DBpedia) gather a large share of the ingoing edges
+- Triples are saved as N-Triples, and converted to HDT with hdt-cpp (`rdf2hdt`),
+in one document, or split in several ones as a nested dataset
+
+Same parameters and seed = same KG.
+"""
+import os
+import json
+import subprocess
+import numpy as np
+import pandas as pd
+
+DBR = "http://dbpedia.org/resource/"
+DBO = "http://dbpedia.org/ontology/"
+DBP = "http://dbpedia.org/property/"
+RDF_TYPE = "http://www.w3.org/1999/02/22-rdf-syntax-ns#type"
+XSD_DATE = "<http://www.w3.org/2001/XMLSchema#date>"
+
+# Kind of node -> (share of nodes, classes)
+NODE_KINDS = {
+    "event": (0.2, [f"{DBO}Event", f"{DBO}MilitaryConflict"]),
+    "person": (0.3, [f"{DBO}Person"]),
+    "place": (0.1, [f"{DBO}Place", f"{DBO}Location"]),
+    "other": (0.4, [f"{DBO}Work"]),
+}
+
+# (predicate, kind of subject, kind of object), None = any kind
+EDGES = [
+    (f"{DBO}isPartOfMilitaryConflict", "event", "event"),
+    (f"{DBO}commander", "event", "person"),
+    (f"{DBO}place", "event", "place"),
+    (f"{DBP}combatant", "event", "other"),
+    (f"{DBO}birthPlace", "person", "place"),
+    (f"{DBO}country", "place", "place"),
+    (f"{DBO}author", "other", "person"),
+    (f"{DBO}wikiPageWikiLink", None, None),
+]
+
+
+def get_node_uri(kind: str, index: int) -> str:
+    """ URI of the `index`-th node of a kind, e.g. http://dbpedia.org/resource/Event_3 """
+    return f"{DBR}{kind.capitalize()}_{index}"
+
+
+def get_date(year: int, day: int) -> str:
+    """ Date literal, as returned by HDT """
+    return f'"{year:04d}-{day // 28 % 12 + 1:02d}-{day % 28 + 1:02d}"^^{XSD_DATE}'
+
+
+def generate_triples(nb_nodes: int, mean_degree: float = 5, alpha: float = 1.0,
+                     years: tuple[int, int] = (1700, 1900), seed: int = 23) \
+                        -> list[(str, str, str)]:
+    """ Triples of a synthetic KG (de-duplicated, sorted)
+    - `nb_nodes`: number of nodes (resources)
+    - `mean_degree`: mean number of edges between resources per node
+    - `alpha`: exponent of the popularity of nodes as objects (0 = uniform)
+    - `years`: dates of events and people are drawn in [years[0], years[1]]
+    - `seed`: random seed """
+    rng = np.random.default_rng(seed)
+    kinds = list(NODE_KINDS)
+    node_kinds = rng.choice(len(kinds), size=nb_nodes,
+                            p=[NODE_KINDS[kind][0] for kind in kinds])
+    nodes = {kind: [get_node_uri(kind, i) for i in range((node_kinds == nb).sum())] \
+        for nb, kind in enumerate(kinds)}
+    # Popularity as object: random ranks, weight = rank^-alpha
+    weights = {kind: (rng.permutation(len(uris)) + 1.0) ** -alpha \
+        for kind, uris in nodes.items()}
+    all_nodes = [uri for kind in kinds for uri in nodes[kind]]
+    all_weights = np.concatenate([weights[kind] for kind in kinds])
+
+    triples = []
+    for kind, uris in nodes.items():
+        for uri in uris:
+            triples += [(uri, RDF_TYPE, class_uri) for class_uri in \
+                NODE_KINDS[kind][1][:rng.integers(1, len(NODE_KINDS[kind][1]) + 1)]]
+    for uri in nodes["event"]:
+        year, length, day = rng.integers(years[0], years[1] + 1), rng.integers(0, 5), \
+            rng.integers(0, 336)
+        if length == 0:
+            triples.append((uri, f"{DBO}date", get_date(year, day)))
+        else:
+            triples += [(uri, f"{DBO}startDate", get_date(year, day)),
+                        (uri, f"{DBO}endDate", get_date(year + length - 1, day))]
+    for uri in nodes["person"]:
+        year, length = rng.integers(years[0] - 80, years[1] + 1), rng.integers(20, 90)
+        triples += [(uri, f"{DBP}birthDate", get_date(year, 0)),
+                    (uri, f"{DBP}deathDate", get_date(year + length, 0))]
+
+    nb_edges = rng.multinomial(int(nb_nodes * mean_degree), [1 / len(EDGES)] * len(EDGES))
+    for (predicate, kind_sub, kind_obj), nb_edge in zip(EDGES, nb_edges):
+        subjects = nodes[kind_sub] if kind_sub else all_nodes
+        objects, obj_weights = (nodes[kind_obj], weights[kind_obj]) if kind_obj \
+            else (all_nodes, all_weights)
+        if not (subjects and objects and nb_edge):
+            continue
+        sub_index = rng.integers(0, len(subjects), size=nb_edge)
+        obj_index = rng.choice(len(objects), size=nb_edge, p=obj_weights / obj_weights.sum())
+        triples += [(subjects[i], predicate, objects[j]) \
+            for i, j in zip(sub_index, obj_index) if subjects[i] != objects[j]]
+    return sorted(set(triples))
+
+
+def get_ntriples_term(term: str) -> str:
+    """ N-Triples serialisation of a term (URI or literal, as returned by HDT) """
+    return term if term.startswith('"') else f"<{term}>"
+
+
+def write_ntriples(triples: list[(str, str, str)], path: str):
+    """ Saving triples as N-Triples """
+    with open(path, "w", encoding="utf-8") as openfile:
+        for triple in triples:
+            openfile.write(" ".join(get_ntriples_term(term) for term in triple) + " .\n")
+
+
+def convert_to_hdt(nt_path: str, hdt_path: str, rdf2hdt: str):
+    """ Converting N-Triples to HDT with hdt-cpp (`rdf2hdt`: path to the binary) """
+    subprocess.run([rdf2hdt, "-f", "ntriples", nt_path, hdt_path], check=True)
+
+
+def get_events(triples: list[(str, str, str)], years: tuple[int, int]) -> list[str]:
+    """ Events with a date in [years[0], years[1]] (gold standard of a search) """
+    df_triples = pd.DataFrame(triples, columns=["subject", "predicate", "object"])
+    df_triples = df_triples[df_triples.predicate.isin(
+        [f"{DBO}date", f"{DBO}startDate", f"{DBO}endDate"])]
+    year = df_triples.object.str[1:5].astype(int)
+    return sorted(df_triples[(year >= years[0]) & (year <= years[1])].subject.unique())
+
+
+def get_degrees(triples: list[(str, str, str)]) -> pd.Series:
+    """ Number of edges between resources of each node, highest first """
+    df_triples = pd.DataFrame(triples, columns=["subject", "predicate", "object"])
+    df_triples = df_triples[df_triples.object.str.startswith(DBR)]
+    return pd.concat([df_triples.subject, df_triples.object]).value_counts()
+
+
+def build_synthetic_kg(folder: str, nb_nodes: int, mean_degree: float = 5,
+                       alpha: float = 1.0, seed: int = 23, rdf2hdt: str = "rdf2hdt",
+                       years: tuple[int, int] = (1700, 1900),
+                       gs_years: tuple[int, int] = (1750, 1850)) -> dict:
+    """ Synthetic KG saved in `folder` (skipped if already built with the same parameters):
+    - `kg.nt` and `hdt/kg.hdt` (not nested)
+    - `gs_events.csv` and `referents.json`: events dated in `gs_years`, for metrics
+    - `info.json`: parameters, number of triples, hubs (nodes with highest degree)
+    Returns the content of `info.json` """
+    params = {"nb_nodes": nb_nodes, "mean_degree": mean_degree, "alpha": alpha,
+              "seed": seed, "years": list(years), "gs_years": list(gs_years)}
+    info_path = os.path.join(folder, "info.json")
+    if os.path.exists(info_path):
+        with open(info_path, "r", encoding="utf-8") as openfile:
+            info = json.load(openfile)
+        if info["params"] == params:
+            return info
+
+    if not os.path.exists(os.path.join(folder, "hdt")):
+        os.makedirs(os.path.join(folder, "hdt"))
+    triples = generate_triples(nb_nodes=nb_nodes, mean_degree=mean_degree, alpha=alpha,
+                               years=years, seed=seed)
+    write_ntriples(triples=triples, path=os.path.join(folder, "kg.nt"))
+    convert_to_hdt(nt_path=os.path.join(folder, "kg.nt"),
+                   hdt_path=os.path.join(folder, "hdt", "kg.hdt"), rdf2hdt=rdf2hdt)
+
+    events = get_events(triples=triples, years=gs_years)
+    pd.DataFrame({"linkDBpediaEn": events}).to_csv(os.path.join(folder, "gs_events.csv"))
+    with open(os.path.join(folder, "referents.json"), "w", encoding="utf-8") as openfile:
+        json.dump({event: event for event in events}, openfile, indent=4)
+
+    degrees = get_degrees(triples=triples)
+    info = {"params": params, "nb_triples": len(triples), "nb_events": len(events),
+            "max_degree": int(degrees.iloc[0]) if degrees.shape[0] else 0,
+            "hubs": list(degrees.index[:10])}
+    with open(info_path, "w", encoding="utf-8") as openfile:
+        json.dump(info, openfile, indent=4)
+    return info
+
+
+def split_triples(triples: list[(str, str, str)], nb_docs: int) -> list[list[(str, str, str)]]:
+    """ Triples split in (at most) `nb_docs` consecutive blocks of the same size:
+    outgoing triples of a node are in one or two documents, while its ingoing triples
+    are spread over the documents """
+    size = max(-(-len(triples) // nb_docs), 1)
+    return [triples[i:i+size] for i in range(0, len(triples), size)]
+
+
+def build_nested_hdt(folder: str, nb_docs: int, rdf2hdt: str = "rdf2hdt") -> str:
+    """ Synthetic KG of `folder` (see `build_synthetic_kg`) split in `nb_docs` HDT documents,
+    saved as a nested dataset: `<folder>/nested-<nb_docs>/<i>/0/hdt`
+    (skipped if already built for the same KG). Returns the folder of the dataset """
+    with open(os.path.join(folder, "info.json"), "r", encoding="utf-8") as openfile:
+        params = json.load(openfile)["params"]
+    folder_nested = os.path.join(folder, f"nested-{nb_docs}")
+    params_path = os.path.join(folder_nested, ".params.json")  # hidden: not a document
+    if os.path.exists(params_path):
+        with open(params_path, "r", encoding="utf-8") as openfile:
+            if json.load(openfile) == params:
+                return folder_nested
+
+    triples = generate_triples(nb_nodes=params["nb_nodes"], mean_degree=params["mean_degree"],
+                               alpha=params["alpha"], years=tuple(params["years"]),
+                               seed=params["seed"])
+    for index, triples_doc in enumerate(split_triples(triples=triples, nb_docs=nb_docs)):
+        folder_doc = os.path.join(folder_nested, str(index), "0")
+        os.makedirs(folder_doc, exist_ok=True)
+        write_ntriples(triples=triples_doc, path=os.path.join(folder_doc, "kg.nt"))
+        convert_to_hdt(nt_path=os.path.join(folder_doc, "kg.nt"),
+                       hdt_path=os.path.join(folder_doc, "hdt"), rdf2hdt=rdf2hdt)
+        os.remove(os.path.join(folder_doc, "kg.nt"))
+    with open(params_path, "w", encoding="utf-8") as openfile:
+        json.dump(params, openfile, indent=4)
+    return folder_nested
+
+
+if __name__ == '__main__':
+    import argparse
+    ap = argparse.ArgumentParser()
+    ap.add_argument("-f", "--folder", required=True,
+                    help="Folder to save the KG in")
+    ap.add_argument("-n", "--nb_nodes", required=True, type=int,
+                    help="Number of nodes")
+    ap.add_argument("-d", "--mean_degree", default=5, type=float,
+                    help="Mean number of edges per node")
+    ap.add_argument("-a", "--alpha", default=1.0, type=float,
+                    help="Exponent of the popularity of nodes (0 = uniform, >= 1 = hubs)")
+    ap.add_argument("-s", "--seed", default=23, type=int,
+                    help="Random seed")
+    ap.add_argument("-r", "--rdf2hdt", default="rdf2hdt",
+                    help="Path to the `rdf2hdt` binary of hdt-cpp")
+    args_main = vars(ap.parse_args())
+    print(build_synthetic_kg(**args_main))
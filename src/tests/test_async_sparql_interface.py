@@ -0,0 +1,196 @@
+"""
+Unittest of file `async_sparql_interface.py`, class AsyncSPARQLInterface
+Queries are sent to a local SPARQL endpoint (rdflib graph behind an HTTP server)
+python -m unittest -v test_async_sparql_interface.py
+"""
+import re
+import time
+import asyncio
+import threading
+import unittest
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import parse_qs, unquote_plus
+
+from rdflib import Graph, URIRef
+from src.async_sparql_interface import AsyncSPARQLInterface, SPARQLEndpointError
+from src.cache_interface import CachedInterface
+
+DATASET_CONFIG = {"config_type": "dbpedia", "category": "http://dbpedia.org/resource/Category:",
+                  "start_uri": "http://dbpedia.org"}
+DBR = "http://dbpedia.org/resource/"
+DBO = "http://dbpedia.org/ontology/"
+RDF_TYPE = "http://www.w3.org/1999/02/22-rdf-syntax-ns#type"
+DATA = f"""
+<{DBR}French_Revolution> <{DBO}place> <{DBR}Paris_(France)> .
+<{DBR}Storming_of_the_Bastille> <{DBO}isPartOf> <{DBR}French_Revolution> .
+<{DBR}French_Revolution> <{DBO}wikiPageWikiLink> <{DBR}Napoleon> .
+<{DBR}Paris_(France)> <{RDF_TYPE}> <{DBO}City> .
+<{DBR}Storming_of_the_Bastille> <{RDF_TYPE}> <{DBO}Event> .
+<{DBR}Storming_of_the_Bastille> <{DBO}date> "1789-07-14" .
+"""
+
+
+def construct(graph: Graph, query: str) -> Graph:
+    """ Evaluating the CONSTRUCT template of `SPARQLQuery`
+    (VALUES blocks and FILTER on predicates only) """
+    values = {}
+    for var, uris in re.findall(r"VALUES \?(\w) \{ ([^}]*) \}", query):
+        values[var] = [URIRef(unquote_plus(uri)) for uri in re.findall(r"<([^>]*)>", uris)]
+    excluded = set()
+    for uris in re.findall(r"FILTER\(\?p NOT IN \(([^)]*)\)\)", query):
+        excluded.update(URIRef(unquote_plus(uri)) for uri in re.findall(r"<([^>]*)>", uris))
+    res = Graph()
+    for sub in values.get("s", [None]):
+        for pred in values.get("p", [None]):
+            for obj in values.get("o", [None]):
+                for triple in graph.triples((sub, pred, obj)):
+                    if triple[1] not in excluded:
+                        res.add(triple)
+    return res
+
+
+class Endpoint(BaseHTTPRequestHandler):
+    """ CONSTRUCT queries on an rdflib graph, first `nb_fail` requests fail with `status`,
+    each answer takes at least `delay` seconds (max number of requests in flight recorded) """
+    graph = Graph().parse(data=DATA, format="nt")
+    nb_fail, status = 0, 503
+    nb_requests = 0
+    delay, in_flight, max_in_flight = 0, 0, 0
+    lock = threading.Lock()
+
+    def do_POST(self):
+        """ Answering a query """
+        body = self.rfile.read(int(self.headers["Content-Length"])).decode("utf-8")
+        with self.lock:
+            Endpoint.nb_requests += 1
+            fail = Endpoint.nb_fail > 0
+            Endpoint.nb_fail -= 1
+            Endpoint.in_flight += 1
+            Endpoint.max_in_flight = max(Endpoint.max_in_flight, Endpoint.in_flight)
+        time.sleep(self.delay)
+        with self.lock:
+            Endpoint.in_flight -= 1
+        if fail:
+            self.send_response(self.status)
+            self.end_headers()
+            self.wfile.write(b"error")
+            return
+        query = parse_qs(body)["query"][0]
+        content = construct(self.graph, query).serialize(format="nt", encoding="utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/n-triples")
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestAsyncSPARQLInterface(unittest.TestCase):
+    """
+    Test class for AsyncSPARQLInterface
+    """
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), Endpoint)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.endpoint = f"http://127.0.0.1:{cls.server.server_address[1]}/sparql"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        Endpoint.nb_fail, Endpoint.status, Endpoint.nb_requests = 0, 503, 0
+        Endpoint.delay, Endpoint.max_in_flight = 0, 0
+        self.interface = AsyncSPARQLInterface(
+            dataset_config=DATASET_CONFIG, default_pred=[RDF_TYPE, f"{DBO}date"],
+            sparql_endpoint=self.endpoint, batch_size=1, backoff=0.01, timeout=5)
+
+    def tearDown(self):
+        self.interface.close()
+
+    def test_call(self):
+        """ Test __call__: ingoing, outgoing and specific outgoing """
+        ingoing, outgoing, types = self.interface(
+            node=f"{DBR}French_Revolution", predicate=[f"{DBO}wikiPageWikiLink"])
+        self.assertEqual(ingoing[["subject", "predicate", "object"]].values.tolist(),
+                         [[f"{DBR}Storming_of_the_Bastille", f"{DBO}isPartOf",
+                           f"{DBR}French_Revolution"]])
+        self.assertEqual(outgoing[["subject", "predicate", "object"]].values.tolist(),
+                         [[f"{DBR}French_Revolution", f"{DBO}place", f"{DBR}Paris_(France)"]])
+        self.assertEqual(
+            sorted(types[["subject", "predicate", "object"]].values.tolist()),
+            [[f"{DBR}Paris_(France)", RDF_TYPE, f"{DBO}City"],
+             [f"{DBR}Storming_of_the_Bastille", f"{DBO}date", "1789-07-14"],
+             [f"{DBR}Storming_of_the_Bastille", RDF_TYPE, f"{DBO}Event"]])
+        # ingoing + outgoing + one query per subject (batch_size=1)
+        self.assertEqual(Endpoint.nb_requests, 4)
+
+    def test_concurrent(self):
+        """ Test ingoing and outgoing requests in flight at the same time,
+        also through the cache (only missing patterns are requested) """
+        Endpoint.delay = 0.2
+        self.interface.batch_size = 100  # specific outgoing: one request
+        node, predicate = f"{DBR}French_Revolution", [f"{DBO}wikiPageWikiLink"]
+        expected = self.interface(node=node, predicate=predicate)
+        self.assertEqual(Endpoint.max_in_flight, 2)
+
+        Endpoint.nb_requests, Endpoint.max_in_flight = 0, 0
+        cached = CachedInterface(interface=self.interface, cache_path=":memory:")
+        for _ in range(2):
+            res = cached(node=node, predicate=predicate)
+            for df_res, df_expected in zip(res, expected):
+                self.assertEqual(sorted(df_res.values.tolist()),
+                                 sorted(df_expected.values.tolist()))
+        self.assertEqual(Endpoint.max_in_flight, 2)
+        self.assertEqual(Endpoint.nb_requests, 3)
+
+    def test_running_loop(self):
+        """ Test synchronous calls from a running event loop, with one semaphore """
+        semaphore = self.interface.semaphore
+
+        async def main():
+            return self.interface.get_triples(subject=f"{DBR}Paris_(France)")
+        for _ in range(2):
+            self.assertEqual(asyncio.run(main()),
+                             [(f"{DBR}Paris_(France)", RDF_TYPE, f"{DBO}City")])
+        self.assertIs(self.interface.semaphore, semaphore)
+
+    def test_predicate_filter(self):
+        """ Test predicate filter pushed down to the endpoint """
+        node, link = f"{DBR}French_Revolution", f"{DBO}wikiPageWikiLink"
+        query = self.interface.sparql_query(params=dict(subject=node, predicate_not_in=[link]))
+        self.assertIn(f"FILTER(?p NOT IN (<{link}>))", query)
+
+        self.assertEqual(self.interface.run_request(
+            params=dict(subject=node), filter_pred=[link], filter_keep=False),
+                         [(node, f"{DBO}place", f"{DBR}Paris_(France)")])
+        self.assertEqual(self.interface.run_request(
+            params=dict(subject=node), filter_pred=[link], filter_keep=True),
+                         [(node, link, f"{DBR}Napoleon")])
+        self.assertEqual(Endpoint.nb_requests, 2)
+
+    def test_retry(self):
+        """ Server errors are retried """
+        Endpoint.nb_fail = 2
+        triples = self.interface.get_triples(subject=f"{DBR}Paris_(France)")
+        self.assertEqual(triples, [(f"{DBR}Paris_(France)", RDF_TYPE, f"{DBO}City")])
+        self.assertEqual(Endpoint.nb_requests, 3)
+
+    def test_error(self):
+        """ Client errors, and server errors after all retries, are raised """
+        Endpoint.nb_fail, Endpoint.status = 1, 400
+        with self.assertRaises(SPARQLEndpointError):
+            self.interface.get_triples(subject=f"{DBR}Paris_(France)")
+        self.assertEqual(Endpoint.nb_requests, 1)
+
+        Endpoint.nb_fail, Endpoint.status = 10, 500
+        with self.assertRaises(SPARQLEndpointError):
+            self.interface.get_triples(subject=f"{DBR}Paris_(France)")
+        self.assertEqual(Endpoint.nb_requests, 1 + self.interface.max_retries + 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+"""
+Unittest of file `benchmark.py`, timing and comparison of results
+python -m unittest -v test_benchmark.py
+"""
+import unittest
+
+from src.benchmark import time_func, compare_results
+
+
+class TestBenchmark(unittest.TestCase):
+    """ Test class for benchmark helpers """
+    def test_time_func(self):
+        """ Test number of calls and stats """
+        calls = []
+        result = time_func(func=lambda: calls.append(1), repeat=3, warmup=2, number=10)
+        self.assertEqual(len(calls), 32)
+        self.assertEqual(len(result["times"]), 3)
+        self.assertLessEqual(result["min"], result["median"])
+
+    def test_compare_results(self):
+        """ Test ratios and regressions, only for benchmarks in both results """
+        previous = {"results": {"a": {"median": 1.0}, "b": {"median": 2.0},
+                                "c": {"median": 1.0}}}
+        current = {"results": {"a": {"median": 1.05}, "b": {"median": 3.0},
+                               "d": {"median": 1.0}}}
+        comparison = compare_results(previous=previous, current=current, threshold=0.1)
+        self.assertEqual(sorted(comparison), ["a", "b"])
+        self.assertFalse(comparison["a"]["regression"])
+        self.assertTrue(comparison["b"]["regression"])
+        self.assertAlmostEqual(comparison["b"]["ratio"], 1.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
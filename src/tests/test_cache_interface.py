@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+Unittest of file `cache_interface.py`, class CachedInterface
+python -m unittest -v test_cache_interface.py
+"""
+import os
+import unittest
+from tempfile import TemporaryDirectory
+
+from src.interface import Interface
+from src.cache_interface import CachedInterface
+
+TRIPLES = [
+    ("ex:a", "ex:type", "ex:Event"),
+    ("ex:a", "ex:date", "1789"),
+    ("ex:b", "ex:type", "ex:Person"),
+    ("ex:c", "ex:link", "ex:a"),
+]
+
+class CountingInterface(Interface):
+    """ Interface over an in-memory list of triples, counting KG calls """
+    def __init__(self):
+        Interface.__init__(self, default_pred=["ex:type", "ex:date"])
+        self.calls = 0
+
+    def get_triples(self, **params: dict) -> list:
+        self.calls += 1
+        return [(a, b, c) for (a, b, c) in TRIPLES if \
+            params.get("subject", a) == a and params.get("predicate", b) == b and \
+                params.get("object", c) == c]
+
+
+class TestCachedInterface(unittest.TestCase):
+    """ Test class for CachedInterface """
+    def test_get_triples(self):
+        """ Same pattern hits the KG once, including across instances """
+        with TemporaryDirectory() as folder:
+            cache_path = os.path.join(folder, "cache.db")
+            kg_interface = CountingInterface()
+            interface = CachedInterface(interface=kg_interface, cache_path=cache_path)
+            self.assertEqual(interface.get_triples(subject="ex:a"), TRIPLES[:2])
+            self.assertEqual(interface.get_triples(subject="ex:a"), TRIPLES[:2])
+            self.assertEqual(kg_interface.calls, 1)
+            self.assertEqual(interface.get_stats(), {"hits": 1, "misses": 1})
+
+            other = CachedInterface(interface=kg_interface, cache_path=cache_path)
+            self.assertEqual(other.get_triples(subject="ex:a"), TRIPLES[:2])
+            self.assertEqual(kg_interface.calls, 1)
+
+    def test_get_triples_many(self):
+        """ Batched lookup cached per (subject, predicate) pattern """
+        with TemporaryDirectory() as folder:
+            kg_interface = CountingInterface()
+            interface = CachedInterface(interface=kg_interface,
+                                        cache_path=os.path.join(folder, "cache.db"))
+            output = interface.get_triples_many(subjects=["ex:a", "ex:b"],
+                                                predicates=interface.pred)
+            self.assertEqual(set(output), set(TRIPLES[:3]))
+            calls = kg_interface.calls
+            output = interface.get_triples_many(subjects=["ex:a", "ex:b"],
+                                                predicates=interface.pred)
+            self.assertEqual(set(output), set(TRIPLES[:3]))
+            self.assertEqual(kg_interface.calls, calls)
+
+    def test_get_triples_filtered(self):
+        """ Pattern cached together with its predicate filter """
+        with TemporaryDirectory() as folder:
+            kg_interface = CountingInterface()
+            interface = CachedInterface(interface=kg_interface,
+                                        cache_path=os.path.join(folder, "cache.db"))
+            for _ in range(2):
+                self.assertEqual(interface.run_request(
+                    params=dict(subject="ex:a"), filter_pred=["ex:date"], filter_keep=False),
+                                 [TRIPLES[0]])
+            self.assertEqual(kg_interface.calls, 1)
+            self.assertEqual(interface.get_pushdown_stats(), {"skipped": 1})
+
+            self.assertEqual(interface.run_request(
+                params=dict(subject="ex:a"), filter_pred=["ex:date"], filter_keep=True),
+                             [TRIPLES[1]])
+            self.assertEqual(kg_interface.calls, 2)
+
+    def test_eviction(self):
+        """ Least recently used patterns removed when cache is full """
+        with TemporaryDirectory() as folder:
+            kg_interface = CountingInterface()
+            interface = CachedInterface(interface=kg_interface, max_size=100,
+                                        cache_path=os.path.join(folder, "cache.db"))
+            interface.get_triples(subject="ex:b")
+            interface.get_triples(subject="ex:c")
+            interface.get_triples(subject="ex:b")
+            self.assertEqual(kg_interface.calls, 2)
+
+            # Adding `ex:a` exceeds `max_size`, `ex:c` is the least recently used
+            interface.get_triples(subject="ex:a")
+            interface.get_triples(subject="ex:b")
+            self.assertEqual(kg_interface.calls, 3)
+            interface.get_triples(subject="ex:c")
+            self.assertEqual(kg_interface.calls, 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
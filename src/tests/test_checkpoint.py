@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+Unittest of file `checkpoint.py`, class Checkpoint
+python -m unittest -v test_checkpoint.py
+"""
+import os
+import shutil
+import tempfile
+import unittest
+import pandas as pd
+from src.checkpoint import Checkpoint
+from src.frontier import Frontier
+from src.ranker import PathOccurrences
+from src.subgraph_store import SubgraphStore
+
+def get_triples(subjects: list[str], objects: list[str], type_df: str) -> pd.DataFrame:
+    """ Triples with predicate ex:partOf """
+    return pd.DataFrame({"subject": subjects, "predicate": ["ex:partOf"] * len(subjects),
+                         "object": objects, "type_df": [type_df] * len(subjects)})
+
+
+class TestCheckpoint(unittest.TestCase):
+    """ Test class for Checkpoint """
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.path = os.path.join(self.folder, "checkpoint.bin")
+        self.store, self.frontier = SubgraphStore(), Frontier()
+        self.checkpoint = Checkpoint(path=self.path, frontier=self.frontier)
+        self.occurences = PathOccurrences()
+        self.occurences.pop_journal()
+        self.expanded = pd.DataFrame(columns=["iteration", "path_expanded"])
+
+        # Iteration 1: expanding ex:war
+        self.frontier.set_expanded(["ex:war"])
+        self.store.append(get_triples(["ex:battle1"], ["ex:war"], "ingoing"), iteration=1)
+        self.frontier.add(get_triples(["ex:battle1", "ex:battle2"], ["ex:war"] * 2, "ingoing"),
+                          type_node="ingoing")
+        self.occurences.increment("ex:partOf", 2)
+        self._write(iteration=1, metrics={"f1": 0.5})
+
+        # Iteration 2: expanding ex:battle1
+        self.frontier.set_expanded(["ex:battle1"])
+        self.store.append(get_triples(["ex:battle1"], ["ex:bigger_war"], "outgoing"),
+                          iteration=2)
+        self.frontier.add(get_triples(["ex:battle1"], ["ex:person"], "outgoing"),
+                          type_node="outgoing")
+        self.expanded.loc[0] = [1, "ex:partOf"]
+        self.occurences.decrement("ex:partOf")
+        self.occurences.increment("ex:place")
+        self._write(iteration=2, metrics={"f1": 0.7})
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def _write(self, iteration: int, metrics: dict):
+        self.checkpoint.write(
+            iteration=iteration, subgraph_store=self.store, frontier=self.frontier,
+            tables={"expanded": self.expanded},
+            dicts={"occurences": (self.occurences, self.occurences.pop_journal())},
+            metrics=metrics)
+
+    def test_read_last(self):
+        """ Test read: state at last iteration """
+        state = Checkpoint.read(self.path)
+        self.assertEqual(state["iteration"], 2)
+        self.assertTrue(state["subgraph_store"].to_df().equals(self.store.to_df()))
+        self.assertEqual(state["frontier"].get_candidates(), {"ex:battle2", "ex:person"})
+        self.assertEqual(state["dicts"]["occurences"], {"ex:partOf": 1, "ex:place": 1})
+        self.assertEqual(state["tables"]["expanded"].values.tolist(), [[1, "ex:partOf"]])
+        self.assertEqual(state["metrics"], {1: {"f1": 0.5}, 2: {"f1": 0.7}})
+
+    def test_read_iteration(self):
+        """ Test read: state at a previous iteration """
+        state = Checkpoint.read(self.path, iteration=1)
+        self.assertEqual(state["iteration"], 1)
+        self.assertEqual(len(state["subgraph_store"]), 1)
+        self.assertEqual(state["frontier"].get_candidates(), {"ex:battle1", "ex:battle2"})
+        self.assertEqual(state["dicts"]["occurences"], {"ex:partOf": 2})
+        self.assertEqual(state["tables"]["expanded"].shape[0], 0)
+
+    def test_delta_only(self):
+        """ Test each record only contains what changed """
+        records = list(Checkpoint.iter_records(self.path))
+        self.assertEqual([it for it, _ in records], [1, 2])
+        delta = records[1][1]
+        self.assertEqual(delta["subgraph"]["values"], ["ex:bigger_war"])
+        self.assertEqual(delta["subgraph"]["columns"]["iteration"].tolist(), [2])
+        self.assertEqual(delta["dicts"]["occurences"],
+                         {"set": {"ex:partOf": 1, "ex:place": 1}, "removed": []})
+
+    def test_delta_keys_touched(self):
+        """ Test only the keys touched during the iteration are recorded """
+        self.occurences.increment("ex:date")
+        self.occurences.remove("ex:place")
+        self._write(iteration=3, metrics=None)
+        delta = list(Checkpoint.iter_records(self.path))[2][1]
+        self.assertEqual(delta["dicts"]["occurences"],
+                         {"set": {"ex:date": 1}, "removed": ["ex:place"]})
+        self.assertEqual(Checkpoint.read(self.path)["dicts"]["occurences"],
+                         {"ex:partOf": 1, "ex:date": 1})
+
+    def test_incomplete_record(self):
+        """ Test incomplete last record (e.g. process killed) is ignored """
+        with open(self.path, "rb") as openfile:
+            content = openfile.read()
+        with open(self.path, "wb") as openfile:
+            openfile.write(content[:-10])
+        self.assertEqual(Checkpoint.read(self.path)["iteration"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+Unittest of file `domain_range_store.py`
+python -m unittest -v test_domain_range_store.py
+"""
+import os
+import unittest
+from tempfile import TemporaryDirectory
+
+from src.domain_range_store import DomainRangeStore, write_domain_range_store, \
+    keys_with_any_value
+
+DBO = "http://dbpedia.org/ontology/"
+TABLES = {
+    "superclasses": {
+        f"{DBO}MilitaryConflict": [f"{DBO}Event"],
+        f"{DBO}Event": [f"{DBO}Event"],
+        f"{DBO}Person": [f"{DBO}Person", f"{DBO}Agent"],
+        f"{DBO}Empty": [],
+        f"{DBO}Lieu_été": [f"{DBO}Place"],
+    },
+    "domain": {f"{DBO}commander": [f"{DBO}MilitaryConflict"]},
+    "range": {},
+}
+
+
+class TestDomainRangeStore(unittest.TestCase):
+    """ Test class for the binary domain/range/superclasses format """
+    def setUp(self):
+        self.folder = TemporaryDirectory()
+        path = os.path.join(self.folder.name, "dbpedia-domain-range.bin")
+        write_domain_range_store(path=path, tables=TABLES)
+        self.store = DomainRangeStore(path)
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def test_lookups(self):
+        """ Test that tables are read as the dicts they were built from """
+        for name, table in TABLES.items():
+            self.assertEqual(dict(self.store[name].items()), table)
+            self.assertEqual(len(self.store[name]), len(table))
+        superclasses = self.store["superclasses"]
+        self.assertIn(f"{DBO}Lieu_été", superclasses)
+        self.assertNotIn(f"{DBO}Place", superclasses)
+        self.assertNotIn(f"{DBO}Unknown", superclasses)
+        self.assertIsNone(superclasses.get(f"{DBO}Unknown"))
+        with self.assertRaises(KeyError):
+            _ = self.store["domain"][f"{DBO}Event"]
+
+    def test_keys_with_any_value(self):
+        """ Test reverse lookup, same output as on dict """
+        values = [f"{DBO}Event", f"{DBO}Agent", f"{DBO}Unknown"]
+        for table in [self.store["superclasses"], TABLES["superclasses"]]:
+            self.assertEqual(
+                sorted(keys_with_any_value(table, values)),
+                sorted([f"{DBO}MilitaryConflict", f"{DBO}Event", f"{DBO}Person"]))
+        self.assertEqual(keys_with_any_value(self.store["range"], values), [])
+
+    def test_wrong_file(self):
+        """ Test error on a file with another format """
+        path = os.path.join(self.folder.name, "wrong.bin")
+        with open(path, "wb") as openfile:
+            openfile.write(b"{}")
+        with self.assertRaises(ValueError):
+            DomainRangeStore(path)
+
+
+if __name__ == '__main__':
+    unittest.main()
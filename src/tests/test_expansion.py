@@ -6,17 +6,44 @@ python -m unittest -v test_expansion.py
 
 import os
 import unittest
+from tempfile import TemporaryDirectory
 import yaml
 
 import pandas as pd
 from settings import FOLDER_PATH
 from src.expansion import NodeExpansion
+from src.expansion_cache import ExpansionCache
 from src.hdt_interface import HDTInterface
+from src.profiler import Profiler
+from src.synthetic_kg import generate_triples, get_degrees, DBR, DBO, RDF_TYPE
+from src.tests.test_framework import ListInterface
 
 def clean_df(df_pd):
     """ Only 3 cols """
     return df_pd[['subject', 'object', 'predicate']]
 
+def get_triples(output) -> list:
+    """ Triples of the 4 dataframes of an output (or concatenated outputs of chunks),
+    and nodes discarded """
+    if isinstance(output, list):
+        return [sorted(triple for chunk in output for triple in \
+            chunk[i][["subject", "predicate", "object"]].values.tolist()) \
+                for i in range(4)] + [set(x for chunk in output for x in chunk[4])]
+    return [sorted(output[i][["subject", "predicate", "object"]].values.tolist()) \
+        for i in range(4)] + [set(output[4])]
+
+
+class StreamCountInterface(ListInterface):
+    """ Counting the number of times the triples of a node are streamed """
+    def __init__(self, triples: list[(str, str, str)], **kwargs):
+        ListInterface.__init__(self, triples=triples, **kwargs)
+        self.nb_streams = 0
+
+    def iter_chunks(self, node: str, predicate: list[str], chunk_size: int):
+        self.nb_streams += 1
+        return ListInterface.iter_chunks(self, node=node, predicate=predicate,
+                                         chunk_size=chunk_size)
+
 def get_args_filtering():
     """ Getting param filtering dict for instantiating NodeExpansion class """
     with open(
@@ -127,6 +154,72 @@ class TestNodeExpansion(unittest.TestCase):
                            (path_outgoing, path_outgoing_expected)]:
             merged = df1.merge(
                 df2, how='left',
-                on=["subject", "object", "predicate", "regex_helper"])
+                on=["subject", "object", "predicate"])
             self.assertTrue(merged.shape == df1.shape)
             self.assertTrue(merged.shape == df2.shape)
+
+    def test_iter_chunks(self):
+        """ Test iter_chunks: same output as __call__, streamed by chunks """
+        rdf_type = [("event", "http://dbpedia.org/ontology/Event")]
+        expansion = NodeExpansion(rdf_type=rdf_type, args_filtering=ARGS_FILTERING,
+                                  interface=HDTInterface())
+        args = {"node": "http://dbpedia.org/resource/French_Revolution",
+                "predicate": ["http://dbpedia.org/ontology/wikiPageWikiLink"]}
+        dates = ["1789-01-01", "1804-12-31"]
+
+        output = expansion(args=args, dates=dates)
+        chunks = list(expansion.iter_chunks(args=args, dates=dates, chunk_size=50))
+        self.assertTrue(len(chunks) > 1)
+        for i in range(4):
+            self.assertEqual(
+                pd.concat([chunk[i] for chunk in chunks])[["subject", "predicate", "object"]] \
+                    .values.tolist(),
+                output[i][["subject", "predicate", "object"]].values.tolist())
+        self.assertEqual(set(x for chunk in chunks for x in chunk[4]), set(output[4]))
+
+    def test_iter_chunks_held(self):
+        """ Test iter_chunks when the first neighbours have no type/date info:
+        chunks held, then streamed again past `max_held` chunks """
+        node = f"{DBR}French_Revolution"
+        triples = [(f"{DBR}Person_{i}", f"{DBO}wikiPageWikiLink", node) for i in range(5)] + \
+            [(node, f"{DBO}place", f"{DBR}Paris"), (f"{DBR}Paris", RDF_TYPE, f"{DBO}Place")]
+        args = {"node": node, "predicate": []}
+        dates = ["1789-01-01", "1804-12-31"]
+        rdf_type = [("event", f"{DBO}Event")]
+        for triples_node, max_held, nb_streams in [(triples, 10, 1), (triples, 2, 2),
+                                                   (triples[:-1], 2, 2)]:
+            interface = StreamCountInterface(triples=triples_node)
+            expansion = NodeExpansion(rdf_type=rdf_type, args_filtering=ARGS_FILTERING,
+                                      interface=interface)
+            output = expansion(args=args, dates=dates)
+            chunks = list(expansion.iter_chunks(args=args, dates=dates, chunk_size=1,
+                                                max_held=max_held))
+            self.assertEqual(get_triples(chunks), get_triples(output))
+            self.assertEqual(interface.nb_streams, nb_streams)
+        # No type/date info: all neighbours discarded
+        self.assertEqual(set(output[4]), {f"{DBR}Person_{i}" for i in range(5)} | {f"{DBR}Paris"})
+
+    def test_iter_chunks_cache(self):
+        """ Test iter_chunks with an expansion cache: node streamed once, then read from
+        the cache, same output as __call__, KG queries timed """
+        triples = generate_triples(nb_nodes=200)
+        args = {"node": get_degrees(triples=triples).index[0], "predicate": []}
+        dates = ["1750-01-01", "1850-12-31"]
+        interface = StreamCountInterface(triples=triples)
+        with TemporaryDirectory() as folder:
+            expansion = NodeExpansion(
+                rdf_type=[("event", f"{DBO}Event")], args_filtering=ARGS_FILTERING,
+                interface=interface,
+                expansion_cache=ExpansionCache(folder=folder, dataset="test",
+                                               interface=interface))
+            expansion.profiler = Profiler()
+            outputs = [get_triples(list(expansion.iter_chunks(
+                args=args, dates=dates, chunk_size=7))) for _ in range(2)]
+            self.assertEqual(interface.nb_streams, 1)
+            self.assertEqual(expansion.expansion_cache.get_stats(), {"hits": 1, "misses": 1})
+            self.assertEqual(outputs[0], outputs[1])
+            self.assertEqual(outputs[0], get_triples(expansion(args=args, dates=dates)))
+
+        stage = expansion.profiler.get_report()["total"]["kg_query"]
+        self.assertTrue(stage["calls"] > 2)
+        self.assertTrue(stage["triples"] > 0)
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+Unittest of file `expansion_cache.py`, class ExpansionCache
+python -m unittest -v test_expansion_cache.py
+"""
+import unittest
+from tempfile import TemporaryDirectory
+
+import pandas as pd
+from src.interface import Interface
+from src.expansion_cache import ExpansionCache
+
+TRIPLES = [
+    ("ex:a", "ex:type", "ex:Event"),
+    ("ex:a", "ex:date", '"1789"'),
+    ("ex:b", "ex:link", "ex:a"),
+    ("ex:b", "ex:label", '"Révolution"@fr'),
+    ("ex:a", "ex:link", "ex:c"),
+]
+
+
+class ListInterface(Interface):
+    """ Interface over an in-memory list of triples """
+    def __init__(self, default_pred: list[str]):
+        Interface.__init__(self, default_pred=default_pred, filter_kb=0)
+
+    def get_triples(self, **params: dict) -> list:
+        return [(a, b, c) for (a, b, c) in TRIPLES if \
+            params.get("subject", a) == a and params.get("predicate", b) == b and \
+                params.get("object", c) == c]
+
+
+class TestExpansionCache(unittest.TestCase):
+    """ Test class for ExpansionCache """
+    def setUp(self):
+        self.folder = TemporaryDirectory()
+        self.interface = ListInterface(default_pred=["ex:type", "ex:date"])
+        self.cache = ExpansionCache(folder=self.folder.name, dataset="ex",
+                                    interface=self.interface)
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def test_get_set(self):
+        """ Test that cached dataframes are the ones computed by the interface """
+        self.assertIsNone(self.cache.get(node="ex:a", predicate=["ex:label"]))
+        output = self.interface(node="ex:a", predicate=["ex:label"])
+        self.cache.set(node="ex:a", predicate=["ex:label"], output=output)
+
+        cached = self.cache.get(node="ex:a", predicate=["ex:label"])
+        for expected, triple_df in zip(output, cached):
+            pd.testing.assert_frame_equal(triple_df, expected, check_index_type=False)
+        self.assertEqual(self.cache.get_stats(), {"hits": 1, "misses": 1})
+
+    def test_key(self):
+        """ Test that keys depend on node, predicate filter and interface settings """
+        key = self.cache.get_key(node="ex:a", predicate=["ex:label", "ex:link"])
+        self.assertEqual(key, self.cache.get_key(node="ex:a", predicate=["ex:link", "ex:label"]))
+        self.assertNotEqual(key, self.cache.get_key(node="ex:b", predicate=["ex:label", "ex:link"]))
+        self.assertNotEqual(key, self.cache.get_key(node="ex:a", predicate=["ex:label"]))
+
+        other = ExpansionCache(folder=self.folder.name, dataset="ex",
+                               interface=ListInterface(default_pred=["ex:type"]))
+        self.assertNotEqual(key, other.get_key(node="ex:a", predicate=["ex:label", "ex:link"]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -123,3 +123,64 @@ class TestFiltering(unittest.TestCase):
         discarded = set(["subject1", "subject2"])
         to_discard = filtering.get_to_discard_location(df_pd=df_pd)
         self.assertTrue(discarded == set(to_discard))
+
+
+    def test_parse_dates(self):
+        """ Test parse_dates: partial dates cover the whole year/month """
+        values = pd.Series(["1789-07-14", "1789", "1789-07", "Unknown",
+                            '"1795"^^<http://www.w3.org/2001/XMLSchema#gYear>'])
+        earliest, latest = Filtering.parse_dates(values)
+        self.assertEqual(earliest.tolist()[:3], [17890714, 17890101, 17890701])
+        self.assertEqual(latest.tolist()[:3], [17890714, 17891231, 17890731])
+        self.assertTrue(pd.isna(earliest[3]) and pd.isna(latest[3]))
+        self.assertEqual((earliest[4], latest[4]), (17950101, 17951231))
+
+        earliest, latest = Filtering.parse_dates(pd.Series(["-0500", "-0044-03-15"]))
+        self.assertTrue((earliest < 0).all() and (latest < 0).all())
+        self.assertLess(earliest[0], earliest[1])
+
+    def test_get_to_discard_date_partial(self):
+        """ Test get_to_discard_date on year-only literals and years BCE
+        Dates used to be compared as strings, now as date ranges:
+        - a year-only literal covers the whole year: end date `1789` is no longer
+        discarded for a search starting on 1789-01-01 (`"1789" < "1789-01-01"`)
+        - years BCE (`-0500`) are still discarded when ending before the search """
+        dates = ["1789-01-01", "1804-12-31"]
+        filtering = Filtering(args=ARGS_FILTERING)
+        date = "http://dbpedia.org/ontology/date"
+        start_date = "http://dbpedia.org/ontology/startDate"
+        end_date = "http://dbpedia.org/ontology/endDate"
+        df_pd = pd.DataFrame({
+            "subject": ["end_year", "point_year", "start_year_after", "end_bce",
+                        "point_bce", "start_bce"],
+            "predicate": [end_date, date, start_date, end_date, date, start_date],
+            "object": ["1789", '"1789"^^<http://www.w3.org/2001/XMLSchema#gYear>', "1805",
+                       "-0500", '"-0500"^^<http://www.w3.org/2001/XMLSchema#gYear>',
+                       "-0500-01-01"]})
+
+        to_discard = filtering.get_to_discard_date(date_df=df_pd, dates=dates)
+        self.assertEqual(set(to_discard), {"start_year_after", "end_bce", "point_bce"})
+
+
+    def test_call(self):
+        """ Test __call__: all filters, input dataframes not modified """
+        dates = ["1789-01-01", "1804-12-31"]
+        filtering = Filtering(args=ARGS_FILTERING)
+        ingoing = pd.DataFrame({"subject": ["1999_legendary", "legendary"],
+                                "predicate": ["p", "p"], "object": ["node", "node"]})
+        outgoing = pd.DataFrame({"subject": ["node"], "predicate": ["p"],
+                                 "object": ["1795_legendary"]})
+        type_date = pd.DataFrame({
+            "subject": ["place", "event1", "event2", "event3"],
+            "predicate": ["http://www.w3.org/1999/02/22-rdf-syntax-ns#type",
+                          "http://dbpedia.org/ontology/endDate",
+                          "http://dbpedia.org/ontology/endDate",
+                          "http://dbpedia.org/ontology/date"],
+            "object": ["http://dbpedia.org/ontology/Place", "1788-12-31", "1789", "1805"]})
+        inputs = [df.copy() for df in [ingoing, outgoing, type_date]]
+
+        to_discard = filtering(ingoing=ingoing, outgoing=outgoing,
+                               type_date=type_date, dates=dates)
+        self.assertEqual(set(to_discard), {"place", "event1", "event3", "1999_legendary"})
+        for df_input, df_copy in zip([ingoing, outgoing, type_date], inputs):
+            self.assertTrue(df_input.equals(df_copy))
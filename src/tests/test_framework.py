@@ -13,11 +13,21 @@ Different types of ranking strategies:
 """
 
 import os
+import json
+import random
+import shutil
 import unittest
+from ast import literal_eval
+from collections import defaultdict
+from tempfile import TemporaryDirectory
 
 import pandas as pd
 from settings import FOLDER_PATH
 from src.framework import GraphSearchFramework
+from src.interface import Interface
+from src.checkpoint import Checkpoint
+from src.frontier import Frontier
+from src.synthetic_kg import DBO, generate_triples, get_events, get_degrees
 
 def get_occ_pred(type_ranking, ingoing, outgoing):
     """ Get expected occurences """
@@ -38,59 +48,240 @@ def get_occ_pred(type_ranking, ingoing, outgoing):
     return occ
 
 
+class ListInterface(Interface):
+    """ Interface over triples kept in memory (e.g. a synthetic KG) """
+    def __init__(self, triples: list[(str, str, str)], **kwargs):
+        Interface.__init__(self, **kwargs)
+        self.triples = triples
+
+    def get_triples(self, **params: dict) -> list[(str, str, str)]:
+        return [triple for triple in self.triples \
+            if all(params.get(key, "") in ["", triple[index]] \
+                for index, key in enumerate(["subject", "predicate", "object"]))]
+
+
+def get_synthetic_framework(folder: str, triples: list[(str, str, str)], name_exp: str,
+                            resume_from: str = None, **config) -> GraphSearchFramework:
+    """ Search over `triples`, starting from the node with highest degree,
+    gold standard and referents saved in `folder` """
+    if not os.path.exists(os.path.join(folder, "gs_events.csv")):
+        events = get_events(triples=triples, years=(1750, 1850))
+        pd.DataFrame({"linkDBpediaEn": events}).to_csv(os.path.join(folder, "gs_events.csv"))
+        with open(os.path.join(folder, "referents.json"), "w", encoding="utf-8") as openfile:
+            json.dump({event: event for event in events}, openfile)
+    config = {
+        "rdf_type": [("event", f"{DBO}Event")], "predicate_filter": [],
+        "start": get_degrees(triples=triples).index[0],
+        "iterations": 5, "type_ranking": "pred_object_freq",
+        "type_interface": "hdt", "dataset_type": "dbpedia", "dataset_path": folder,
+        "nested_dataset": 0, "type_metrics": ["precision", "recall", "f1"],
+        "gold_standard": os.path.join(folder, "gs_events.csv"),
+        "referents": os.path.join(folder, "referents.json"),
+        "name_exp": name_exp, **config}
+    framework = GraphSearchFramework(config=config, resume_from=resume_from)
+    # No HDT document is opened before the search: switching to triples in memory
+    framework.interface = ListInterface(triples=triples)
+    framework.node_expander.interface = framework.interface
+    framework.ordering.interface = framework.interface
+    return framework
+
+
+class TestSearchSaving(unittest.TestCase):
+    """ Test class for the files saved during the search """
+    def setUp(self):
+        self.folder = TemporaryDirectory()
+        self.triples = generate_triples(nb_nodes=300, mean_degree=4)
+        self.save_folders = []
+
+    def tearDown(self):
+        for save_folder in self.save_folders:
+            shutil.rmtree(save_folder)
+        self.folder.cleanup()
+
+    def _get_framework(self, name_exp: str, **config) -> GraphSearchFramework:
+        framework = get_synthetic_framework(folder=self.folder.name, triples=self.triples,
+                                            name_exp=name_exp, **config)
+        self.save_folders.append(framework.save_folder)
+        return framework
+
+    def test_checkpoint(self):
+        """ Test binary checkpoint: reading it back gives the state at the end of the search,
+        including the last rows of `expanded` """
+        framework = self._get_framework(name_exp="test_checkpoint",
+                                        checkpoint_format="binary")
+        random.seed(23)
+        framework()
+        state = Checkpoint.read(os.path.join(framework.save_folder, "checkpoint.bin"))
+
+        self.assertEqual(state["iteration"], framework.last_iteration)
+        self.assertTrue(state["subgraph_store"].to_df().equals(
+            framework.subgraph_store.to_df()))
+        self.assertEqual(state["frontier"].get_candidates(),
+                         framework.frontier.get_candidates())
+        self.assertEqual(state["frontier"].expanded, framework.frontier.expanded)
+        expanded = state["tables"]["expanded"]
+        self.assertEqual(expanded.shape[0], framework.expanded.shape[0])
+        self.assertEqual(list(expanded.path_expanded), list(framework.expanded.path_expanded))
+        self.assertEqual(expanded.iteration.max(), framework.last_iteration)
+        self.assertEqual(state["dicts"]["occurences"], dict(framework.occurence))
+        self.assertEqual(state["dicts"]["paths"], dict(framework.path_node_to_start))
+        self.assertEqual(sorted(state["metrics"]), list(range(1, framework.last_iteration + 1)))
+
+    def _check_resume(self, name_exp: str, removed: list[str], **config):
+        """ Search stopped after 2 iterations then resumed = search run at once
+        `removed`: files removed before resuming """
+        framework = self._get_framework(name_exp=f"{name_exp}_once", **config)
+        random.seed(23)
+        framework()
+
+        stopped = self._get_framework(name_exp=f"{name_exp}_stopped", **config)
+        random.seed(23)
+        search = stopped.iter_search()
+        for _ in range(2):
+            next(search)
+        search.close()
+        for name in removed:
+            os.remove(os.path.join(stopped.save_folder, name))
+        resumed = get_synthetic_framework(folder=self.folder.name, triples=self.triples,
+                                          name_exp=f"{name_exp}_stopped",
+                                          resume_from=stopped.save_folder, **config)
+        random.seed(0)
+        resumed()
+
+        self.assertEqual(resumed.last_iteration, framework.last_iteration)
+        self.assertTrue(resumed.subgraph_store.to_df().equals(
+            framework.subgraph_store.to_df()))
+        self.assertEqual(resumed.frontier.get_candidates(), framework.frontier.get_candidates())
+        self.assertEqual(resumed.nodes_expanded, framework.nodes_expanded)
+        self.assertEqual(list(resumed.expanded.path_expanded),
+                         list(framework.expanded.path_expanded))
+        self.assertEqual(dict(resumed.occurence), dict(framework.occurence))
+        self.assertEqual(resumed.metrics_data, framework.metrics_data)
+        return resumed
+
+    def test_resume_csv(self):
+        """ Test resuming a search saved as csv, stopped while saving iteration 3
+        (files of iteration 2 already removed) """
+        resumed = self._check_resume(
+            name_exp="test_resume_csv", checkpoint_format="csv",
+            removed=["2-subgraph.csv", "2-pending_nodes_ingoing.csv",
+                     "2-pending_nodes_outgoing.csv", "2-occurences.json"])
+        self.assertEqual(len(resumed.metrics_data), resumed.last_iteration)
+
+    def test_resume_binary(self):
+        """ Test resuming a search with a binary checkpoint: state rebuilt from it """
+        resumed = self._check_resume(name_exp="test_resume_binary", removed=[],
+                                     checkpoint_format="binary")
+        state = Checkpoint.read(os.path.join(resumed.save_folder, "checkpoint.bin"))
+        self.assertEqual(sorted(state["metrics"]), list(range(1, resumed.last_iteration + 1)))
+        self.assertEqual(state["tables"]["expanded"].shape[0], resumed.expanded.shape[0])
+
+
 class TestGraphSearchFramework(unittest.TestCase):
     """ Test class for GraphSearchFramework class """
 
-    # def test_update_occurence_iter_1(self):
-    #     """ Test update_occurence """
-        # config = {
-        #     "rdf_type": [("event", "http://dbpedia.org/ontology/Event"),],
-        #     "predicate_filter": [],
-        #     "start": "http://dbpedia.org/resource/Category:French_Revolution",
-        #     "iterations": 1,
-        #     "start_date": "1765-01-01",
-        #     "end_date": "1783-12-31",
-        #     "type_interface": "hdt",
-        #     "type_metrics": ["precision", "recall", "f1"],
-        #     "gold_standard": os.path.join(
-        #         FOLDER_PATH, "sample-data", "French_Revolution_gs_events.csv"),
-        #     "referents": os.path.join(
-        #         FOLDER_PATH, "sample-data", "French_Revolution_referents.json"),
-        #     "name_exp": "French_Revolution",
-        #     "dataset_type": "dbpedia",
-        #     "dataset_path": os.path.join(
-        #         FOLDER_PATH, "dbpedia-snapshot-2021-09"),
-        # }
-
-    #     folder = os.path.join(FOLDER_PATH, "src/tests/data")
-    #     pending_ingoing_iter_1 = pd.read_csv(
-    #         os.path.join(folder, "hdt_ingoing_superclass_expected.csv")).fillna("")
-    #     pending_outgoing_iter_1 = pd.read_csv(
-    #         os.path.join(folder, "hdt_outgoing_superclass_expected.csv")).fillna("")
-
-    #     for type_ranking in ['pred_freq', 'entropy_pred_freq', 'inverse_pred_freq',
-    #         'pred_object_freq', 'entropy_pred_object_freq', 'inverse_pred_object_freq']:
-
-    #         time.sleep(1)
-    #         framework = GraphSearchFramework(config=dict(**config,
-    #                                                      **dict(type_ranking=type_ranking)))
-    #         print(f"TYPE RANKING TESTED: {framework.type_ranking}")
-
-    #         occurences_output = framework.update_occurence(ingoing=pending_ingoing_iter_1,
-    #                                                        outgoing=pending_outgoing_iter_1,
-    #                                                        occurence=defaultdict(int))
-
-    #         def f_process(x_input):
-    #             return x_input[2:].replace("outgoing-", "").replace("ingoing-", "")
-
-    #         occurences_output = {f_process(k): v \
-    #             for k, v in occurences_output.items()}
-
-    #         occurences_expected_pred = get_occ_pred(type_ranking,
-    #                                                 pending_ingoing_iter_1,
-    #                                                 pending_outgoing_iter_1)
-
-    #         self.assertTrue(occurences_expected_pred == occurences_output)
+    @staticmethod
+    def _get_synthetic_framework(name_exp: str) -> GraphSearchFramework:
+        """ Framework on a small synthetic KG, nothing saved """
+        with TemporaryDirectory() as tmp_folder:
+            framework = get_synthetic_framework(
+                folder=tmp_folder, triples=generate_triples(nb_nodes=50), name_exp=name_exp)
+            if os.path.exists(framework.save_folder):
+                shutil.rmtree(framework.save_folder)
+        return framework
+
+    def test_check_config_sparql(self):
+        """ Test SPARQL settings: at least one request in flight, retries can be disabled """
+        framework = self._get_synthetic_framework(name_exp="test_check_config")
+        config = dict(framework.config, type_interface="async_sparql_endpoint",
+                      sparql_endpoint="http://localhost:8890/sparql")
+        framework._check_config(config=dict(config, sparql_max_concurrency=1,
+                                            sparql_max_retries=0), walk="informed")
+        for key, value in [("sparql_max_concurrency", 0), ("sparql_max_retries", -1),
+                           ("sparql_max_concurrency", "8")]:
+            with self.assertRaises(TypeError):
+                framework._check_config(config=dict(config, **{key: value}), walk="informed")
+
+    def test_extract_paths_from_candidates(self):
+        """ Test paths of randomly sampled nodes: ingoing or outgoing path of the node
+        for nodes in both ingoing and outgoing triples of the frontier """
+        framework = self._get_synthetic_framework(name_exp="test_extract_paths")
+        framework.frontier = Frontier()
+        framework.frontier.add(triple_df=pd.DataFrame({
+            "subject": ["ex:battle1", "ex:person1"], "predicate": ["ex:partOf", "ex:participant"],
+            "object": ["ex:war", "ex:war"]}), type_node="ingoing")
+        framework.frontier.add(triple_df=pd.DataFrame({
+            "subject": ["ex:war", "ex:war"], "predicate": ["ex:place", "ex:partOf"],
+            "object": ["ex:battle1", "ex:bigger_war"]}), type_node="outgoing")
+
+        random.seed(23)
+        paths = [framework._extract_paths_from_candidates(
+            nodes=["ex:battle1", "ex:person1", "ex:bigger_war"]) for _ in range(20)]
+        self.assertEqual(set(path[1] for path in paths), {"ingoing-ex:participant;ex:war"})
+        self.assertEqual(set(path[2] for path in paths), {"outgoing-ex:war;ex:partOf"})
+        self.assertEqual(set(path[0] for path in paths),
+                         {"ingoing-ex:partOf;ex:war", "outgoing-ex:war;ex:place"})
+
+    def test_extract_paths_distribution(self):
+        """ Test paths of a node in both ingoing and outgoing triples: direction drawn
+        first (1/2 each, same draw as the first implementation), then a triple of that
+        direction: outgoing paths are no longer replaced by ingoing ones """
+        framework = self._get_synthetic_framework(name_exp="test_extract_paths_distribution")
+        framework.frontier = Frontier()
+        framework.frontier.add(triple_df=pd.DataFrame({
+            "subject": ["ex:battle1", "ex:battle1"], "predicate": ["ex:partOf", "ex:partOf"],
+            "object": ["ex:war", "ex:campaign"]}), type_node="ingoing")
+        framework.frontier.add(triple_df=pd.DataFrame({
+            "subject": ["ex:war"], "predicate": ["ex:place"], "object": ["ex:battle1"]}),
+            type_node="outgoing")
+
+        random.seed(23)
+        paths = [framework._extract_paths_from_candidates(nodes=["ex:battle1"])[0] \
+            for _ in range(4000)]
+        # Pinned draws: a change here changes the paths of seeded random walks
+        self.assertEqual(paths[:8], [
+            "outgoing-ex:war;ex:place", "ingoing-ex:partOf;ex:war",
+            "outgoing-ex:war;ex:place", "outgoing-ex:war;ex:place",
+            "ingoing-ex:partOf;ex:war", "outgoing-ex:war;ex:place",
+            "ingoing-ex:partOf;ex:war", "ingoing-ex:partOf;ex:campaign"])
+        frequencies = pd.Series(paths).value_counts(normalize=True).to_dict()
+        for path, expected in [("ingoing-ex:partOf;ex:campaign", 0.25),
+                               ("ingoing-ex:partOf;ex:war", 0.25),
+                               ("outgoing-ex:war;ex:place", 0.5)]:
+            self.assertAlmostEqual(frequencies[path], expected, delta=0.03)
+
+    def test_update_occurence(self):
+        """ Test update_occurence: same counts, in the same order, as counting the paths
+        row by row (first implementation), on the ingoing/outgoing nodes of
+        French_Revolution """
+        folder = os.path.join(FOLDER_PATH, "src/tests/data")
+        ingoing, outgoing = [pd.read_csv(
+            os.path.join(folder, f"hdt_{type_df}_superclass_expected.csv"),
+            index_col=0).fillna("") for type_df in ["ingoing", "outgoing"]]
+        for triple_df in [ingoing, outgoing]:
+            triple_df["superclass"] = triple_df.superclass.apply(literal_eval)
+
+        framework = self._get_synthetic_framework(name_exp="test_update_occurence")
+        focus = [y[1] for y in framework.rdf_type]
+        for type_ranking in ['pred_freq', 'entropy_pred_freq', 'inverse_pred_freq',
+                             'pred_object_freq', 'entropy_pred_object_freq',
+                             'inverse_pred_object_freq']:
+            framework.type_ranking = type_ranking
+            expected = defaultdict(int)
+            for type_df, triple_df in [("ingoing", ingoing), ("outgoing", outgoing)]:
+                for _, row in triple_df.iterrows():
+                    nb_order = "1" if any(x in row.superclass for x in focus) else "3"
+                    if "object" not in type_ranking:
+                        expected[f"{nb_order}-{row.predicate}"] += 1
+                    elif type_df == "ingoing":
+                        expected[f"{nb_order}-ingoing-{row.predicate};{row.object}"] += 1
+                    else:
+                        expected[f"{nb_order}-outgoing-{row.subject};{row.predicate}"] += 1
+
+            output = framework.update_occurence(ingoing=ingoing, outgoing=outgoing,
+                                                occurence=defaultdict(int))
+            self.assertEqual(list(output.items()), list(expected.items()))
+            self.assertTrue(any(key.startswith("1-") for key in output))
 
     def test_select_nodes_to_expand_iter_1(self):
         """ Test selecting next nodes to expand """
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+Unittest of file `frontier.py`, class Frontier
+python -m unittest -v test_frontier.py
+"""
+import unittest
+import pandas as pd
+from src.frontier import Frontier
+
+INGOING = pd.DataFrame({
+    "subject": ["ex:battle1", "ex:battle2", "ex:person1"],
+    "predicate": ["ex:partOf", "ex:partOf", "ex:participant"],
+    "object": ["ex:war", "ex:war", "ex:war"],
+    "superclass": [["ex:Event"], ["ex:Event"], []]
+})
+
+OUTGOING = pd.DataFrame({
+    "subject": ["ex:war", "ex:war"],
+    "predicate": ["ex:partOf", "ex:place"],
+    "object": ["ex:bigger_war", "ex:battle1"],
+    "superclass": [["ex:Event"], []]
+})
+
+class TestFrontier(unittest.TestCase):
+    """ Test class for Frontier """
+    def setUp(self):
+        self.frontier = Frontier()
+        self.frontier.add(triple_df=INGOING, type_node="ingoing")
+        self.frontier.add(triple_df=OUTGOING, type_node="outgoing")
+
+    def test_get_nodes(self):
+        """ Resolving paths to candidate nodes """
+        self.assertEqual(self.frontier.get_nodes_ingoing(predicate="ex:partOf"),
+                         {"ex:battle1", "ex:battle2"})
+        self.assertEqual(self.frontier.get_nodes_ingoing(predicate="ex:partOf",
+                                                         object_t="ex:war"),
+                         {"ex:battle1", "ex:battle2"})
+        self.assertEqual(self.frontier.get_nodes_outgoing(predicate="ex:partOf",
+                                                          subject="ex:war"),
+                         {"ex:bigger_war"})
+        self.assertEqual(self.frontier.get_nodes_ingoing(predicate="ex:unknown"), set())
+
+    def test_set_expanded(self):
+        """ Expanded nodes removed from frontier, and not added again """
+        self.frontier.set_expanded(nodes=["ex:battle1"])
+        self.assertEqual(self.frontier.get_nodes_ingoing(predicate="ex:partOf"),
+                         {"ex:battle2"})
+        self.assertEqual(self.frontier.get_candidates(),
+                         {"ex:battle2", "ex:person1", "ex:bigger_war"})
+        self.assertEqual(len(self.frontier), 3)
+
+        self.frontier.add(triple_df=OUTGOING, type_node="outgoing")
+        self.assertEqual(len(self.frontier), 3)
+
+    def test_to_df(self):
+        """ Materialising frontier as dataframe """
+        output = self.frontier.to_df(type_node="ingoing")
+        self.assertEqual(list(output.columns), ["subject", "predicate", "object", "superclass"])
+        self.assertEqual(output.shape[0], 3)
+
+        self.frontier.reset(triple_df=INGOING[INGOING.subject == "ex:person1"],
+                            type_node="ingoing")
+        self.assertEqual(list(self.frontier.to_df(type_node="ingoing").subject),
+                         ["ex:person1"])
+
+
+if __name__ == '__main__':
+    unittest.main()
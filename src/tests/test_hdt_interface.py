@@ -6,15 +6,28 @@ python -m unittest -v test_hdt_interface.py
 import os
 import json
 import unittest
+from tempfile import TemporaryDirectory
 import pandas as pd
 from settings import FOLDER_PATH
 from src.hdt_interface import HDTInterface
+from src.synthetic_kg import DBO, DBR, RDF_TYPE, write_ntriples, convert_to_hdt
 
 with open(os.path.join(
     FOLDER_PATH, "sample-data", "French_Revolution_referents.json"),
     encoding="utf-8") as openfile:
     REFERENTS = json.load(openfile)
 
+def build_nested_dataset(folder: str, docs: list[list[(str, str, str)]]) -> str:
+    """ Nested HDT dataset with one document per list of triples
+    (converted with the `rdf2hdt` binary of hdt-cpp) """
+    for index, triples in enumerate(docs):
+        folder_doc = os.path.join(folder, str(index), "0")
+        os.makedirs(folder_doc)
+        write_ntriples(triples=triples, path=os.path.join(folder_doc, "kg.nt"))
+        convert_to_hdt(nt_path=os.path.join(folder_doc, "kg.nt"),
+                       hdt_path=os.path.join(folder_doc, "hdt"), rdf2hdt="rdf2hdt")
+    return folder
+
 def reorder_df(df_pd):
     """ Reordering df rows and columns for comparison """
     df_pd = df_pd[['subject', 'object', 'predicate', 'type_df']] \
@@ -65,3 +78,122 @@ class TestHDTInterface(unittest.TestCase):
             merged = df1.merge(df2, how='left', on=["subject", "object", "predicate", "type_df"])
             self.assertTrue(merged.shape == df1.shape)
             self.assertTrue(merged.shape == df2.shape)
+
+    def test_get_triples_many(self):
+        """ Test get_triples_many: same triples as one request per subject """
+        subjects = ["http://dbpedia.org/resource/Storming_of_the_Bastille",
+                    "http://dbpedia.org/resource/Day_of_Daggers",
+                    "http://dbpedia.org/resource/Storming_of_the_Bastille"]
+        interface = HDTInterface()
+
+        expected = []
+        for subject in set(subjects):
+            expected += interface.run_request(params=dict(subject=subject),
+                                              filter_pred=interface.pred, filter_keep=True)
+        output = interface.get_triples_many(subjects=list(set(subjects)),
+                                            predicates=interface.pred)
+        self.assertEqual(set(output), set(expected))
+
+    def test_get_triples_filtered(self):
+        """ Test predicate filter pushed down to HDT: same triples as filtering after,
+        skipped triples counted (estimated from cardinalities when keeping predicates) """
+        params = dict(subject="http://dbpedia.org/resource/French_Revolution")
+        filter_pred = ["http://dbpedia.org/ontology/wikiPageWikiLink"]
+        interface = HDTInterface()
+        triples = interface.get_triples(**params)
+
+        for filter_keep in [True, False]:
+            interface.skipped, interface.skipped_estimate = 0, 0
+            output = interface.get_triples_filtered(
+                params=params, filter_pred=filter_pred, filter_keep=filter_keep)
+            self.assertEqual(set(output), set(interface._filter_pred(
+                triples=triples, filter_pred=filter_pred, filter_keep=filter_keep)))
+            stats = interface.get_pushdown_stats()
+            key = "skipped_estimate" if filter_keep else "skipped"
+            self.assertEqual(stats[key], len(triples) - len(output))
+            self.assertEqual(sum(stats.values()), stats[key])
+
+    def test_use_ids(self):
+        """ Test querying with integer IDs: same output as with strings """
+        node = "http://dbpedia.org/resource/French_Revolution"
+        predicate = ["http://dbpedia.org/ontology/wikiPageWikiLink"]
+        interface, interface_ids = HDTInterface(), HDTInterface(use_ids=True)
+        for df1, df2 in zip(interface(node=node, predicate=predicate),
+                            interface_ids(node=node, predicate=predicate)):
+            self.assertTrue(reorder_df(df1).equals(reorder_df(df2)))
+        self.assertEqual(interface.skipped, interface_ids.skipped)
+
+    def test_threads(self):
+        """ Test documents queried in parallel: same triples, without duplicates,
+        documents lacking the node skipped """
+        node = "http://dbpedia.org/resource/French_Revolution"
+        interface, interface_threads = HDTInterface(), HDTInterface(threads=4)
+        triples = interface_threads.get_triples(subject=node)
+        self.assertEqual(len(triples), len(set(triples)))
+        self.assertEqual(set(triples), set(interface.get_triples(subject=node)))
+        self.assertTrue(set(interface.get_triples(subject=node)).issubset(
+            {triple for doc_index in interface._get_docs(subject_t=node) \
+                for triple in interface._iter_search(doc_index, node, "", "")}))
+        interface_threads.close()
+
+    def test_get_docs(self):
+        """ Test documents lacking the node: skipped with `use_ids` (one cached lookup per
+        document, IDs reused to query), not opened to be checked otherwise """
+        node = f"{DBR}French_Revolution"
+        triples = [(f"{DBR}Battle_{i}", f"{DBO}isPartOfMilitaryConflict", node) \
+            for i in range(3)]
+        with TemporaryDirectory() as folder:
+            build_nested_dataset(folder=folder, docs=[triples, [(node, RDF_TYPE, f"{DBO}Event")],
+                                                      triples[1:]])
+            interface = HDTInterface(folder_hdt=folder, nested_dataset=True)
+            self.assertEqual(interface._get_docs(object_t=node), [0, 1, 2])
+            self.assertEqual(interface.docs.docs, [None] * 3)
+
+            interface = HDTInterface(folder_hdt=folder, nested_dataset=True, use_ids=True)
+            self.assertEqual(sorted(interface.docs.paths[doc_index].split(os.sep)[-3] \
+                for doc_index in interface._get_docs(object_t=node)), ["0", "2"])
+            self.assertEqual(interface.get_term_id.cache_info().misses, 3)
+            self.assertEqual(len(interface.get_triples(object=node)), 3)
+            self.assertEqual(interface.get_term_id.cache_info().misses, 3)
+
+    def test_iter_triples_filtered_nested(self):
+        """ Test streaming a nested dataset: triples in several documents returned once,
+        same triples as `get_triples_filtered` """
+        node, link = f"{DBR}French_Revolution", f"{DBO}wikiPageWikiLink"
+        triples = [(f"{DBR}Battle_{i}", f"{DBO}isPartOfMilitaryConflict", node) \
+            for i in range(10)] + [(f"{DBR}Person_{i}", link, node) for i in range(5)]
+        with TemporaryDirectory() as folder:
+            build_nested_dataset(folder=folder, docs=[triples[:8], triples[4:], triples[2:6]])
+            for use_ids in [False, True]:
+                interface = HDTInterface(folder_hdt=folder, nested_dataset=True,
+                                         use_ids=use_ids)
+                for filter_keep in [False, True]:
+                    chunks = list(interface.iter_triples_filtered(
+                        params=dict(object=node), filter_pred=[link],
+                        filter_keep=filter_keep, chunk_size=3))
+                    self.assertTrue(all(len(chunk) <= 3 for chunk in chunks))
+                    output = [triple for chunk in chunks for triple in chunk]
+                    self.assertEqual(len(output), len(set(output)))
+                    self.assertEqual(set(output), set(interface.get_triples_filtered(
+                        params=dict(object=node), filter_pred=[link],
+                        filter_keep=filter_keep)))
+                    self.assertEqual(len(output), 5 if filter_keep else 10)
+
+    def test_pushdown_stats_stopped(self):
+        """ Test skipped triples counted when the stream is closed after the first chunk """
+        node, abstract = f"{DBR}French_Revolution", f"{DBO}abstract"
+        triples = [(node, abstract, f'"Revolution {i}"') for i in range(4)] + \
+            [(node, f"{DBO}place", f"{DBR}Place_{i}") for i in range(3)]
+        with TemporaryDirectory() as folder:
+            build_nested_dataset(folder=folder, docs=[triples])
+            for use_ids in [False, True]:
+                interface = HDTInterface(folder_hdt=folder, nested_dataset=True,
+                                         use_ids=use_ids)
+                for filter_keep, key in [(False, "skipped"), (True, "skipped_estimate")]:
+                    chunks = interface.iter_triples_filtered(
+                        params=dict(subject=node), filter_pred=[abstract] if not filter_keep \
+                            else [f"{DBO}place"], filter_keep=filter_keep, chunk_size=1)
+                    self.assertEqual(next(chunks), [(node, f"{DBO}place", f"{DBR}Place_0")])
+                    chunks.close()
+                    self.assertEqual(interface.get_pushdown_stats()[key], 4)
+
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""
+Unittest of file `interface.py`, class Interface
+(triples generated on the fly, no data needed)
+python -m unittest -v test_interface.py
+"""
+import unittest
+import tracemalloc
+
+from src.interface import Interface
+from src.synthetic_kg import DBO, DBR
+
+
+class GeneratedInterface(Interface):
+    """ Node `node` with `degree` ingoing triples, generated when iterated over
+    (never stored), no other triple """
+    def __init__(self, node: str, degree: int, **kwargs):
+        Interface.__init__(self, **kwargs)
+        self.node = node
+        self.degree = degree
+
+    def get_triples(self, **params: dict) -> list[(str, str, str)]:
+        return []
+
+    def iter_triples_filtered(self, params: dict[str, str], filter_pred: list,
+                              filter_keep: bool, chunk_size: int):
+        if params.get("object") != self.node:
+            return iter(())
+        return self._chunk(((f"{DBR}Event_{i}", f"{DBO}isPartOfMilitaryConflict", self.node) \
+            for i in range(self.degree)), chunk_size)
+
+
+class TestInterface(unittest.TestCase):
+    """ Test class for Interface """
+    @staticmethod
+    def _get_peak(degree: int, chunk_size: int) -> (int, int):
+        """ Peak memory while streaming a node of degree `degree`, number of triples """
+        interface = GeneratedInterface(node=f"{DBR}French_Revolution", degree=degree)
+        nb_triples = 0
+        tracemalloc.start()
+        try:
+            for ingoing, _, _ in interface.iter_chunks(
+                    node=interface.node, predicate=[], chunk_size=chunk_size):
+                nb_triples += ingoing.shape[0]
+            return tracemalloc.get_traced_memory()[1], nb_triples
+        finally:
+            tracemalloc.stop()
+
+    def test_iter_chunks_memory(self):
+        """ Test iter_chunks: peak memory bounded by the chunk size,
+        not by the degree of the node """
+        peak, nb_triples = self._get_peak(degree=2_000, chunk_size=100)
+        peak_high, nb_triples_high = self._get_peak(degree=20_000, chunk_size=100)
+        self.assertEqual((nb_triples, nb_triples_high), (2_000, 20_000))
+        self.assertLess(peak_high, 2 * peak)
+
+
+if __name__ == '__main__':
+    unittest.main()
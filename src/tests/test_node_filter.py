@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+Unittest of file `node_filter.py`, class NodeFilter
+python -m unittest -v test_node_filter.py
+"""
+import unittest
+from src.node_filter import NodeFilter, get_dataset_node_filter
+
+DBR = "http://dbpedia.org/resource/"
+TRIPLES = [
+    (f"{DBR}French_Revolution", "p", f"{DBR}Paris"),
+    (f"{DBR}French_Revolution", "p", f"{DBR}Category:French_Revolution"),
+    (f"{DBR}Category:Revolutions", "p", f"{DBR}French_Revolution"),
+    (f"{DBR}French_Revolution", "p", "http://www.wikidata.org/entity/Q6534"),
+    ("http://www.wikidata.org/entity/Q6534", "p", f"{DBR}French_Revolution"),
+    (f"{DBR}French_Revolution", "p", '"Révolution française"@fr'),
+    (f"{DBR}French_Revolution", "p", "1789"),
+    (f"{DBR}French_Revolution", "p", f"{DBR}Flag.svg"),
+    (f"{DBR}Flag.svg", "p", f"{DBR}French_Revolution"),
+    (f"{DBR}French_Revolution", "p", '"multi\nline.svg"'),
+]
+
+
+class TestNodeFilter(unittest.TestCase):
+    """ Test class for NodeFilter """
+    def setUp(self):
+        self.node_filter = NodeFilter(start_uri="http://dbpedia",
+                                      filter_out=(f"{DBR}Category:",))
+        self.expected = [TRIPLES[0], TRIPLES[6], TRIPLES[8]]
+
+    def test_call(self):
+        """ Test __call__ on list of triples """
+        self.assertEqual(self.node_filter(TRIPLES), self.expected)
+
+    def test_no_namespace(self):
+        """ Test filter with prefixes only """
+        node_filter = NodeFilter(start_uri=None, filter_out=(f"{DBR}Category:",), suffixes=())
+        self.assertEqual(len(node_filter(TRIPLES)), len(TRIPLES) - 2)
+
+    def test_get_dataset_node_filter(self):
+        """ Test filter depending on dataset config """
+        wikidata = {"config_type": "wikidata", "start_uri": "http://www.wikidata",
+                    "start_stop_uri": ["http://www.wikidata.org/entity/statement/"]}
+        node_filter = get_dataset_node_filter(dataset_config=wikidata, filter_kb=0)
+        self.assertTrue(node_filter.keep_subject("http://www.wikidata.org/entity/Q6534"))
+        self.assertFalse(node_filter.keep_object("http://www.wikidata.org/entity/statement/Q1"))
+        self.assertFalse(node_filter.keep_object(f"{DBR}Paris"))
+        self.assertIs(node_filter, get_dataset_node_filter(dataset_config=wikidata, filter_kb=1))
+
+        dbpedia = {"config_type": "dbpedia", "start_uri": "http://dbpedia",
+                   "category": f"{DBR}Category:"}
+        self.assertIsNone(get_dataset_node_filter(dataset_config=dbpedia, filter_kb=0))
+
+
+if __name__ == '__main__':
+    unittest.main()
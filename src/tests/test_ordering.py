@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+Unittest of file `ordering.py`, class Ordering
+(domain/range info set in the tests, no data needed)
+python -m unittest -v test_ordering.py
+"""
+import unittest
+
+import pandas as pd
+from src.ordering import Ordering
+from src.tests.test_framework import ListInterface
+
+DBR = "http://dbpedia.org/resource/"
+DBO = "http://dbpedia.org/ontology/"
+WD = "http://www.wikidata.org/entity/"
+WDT = "http://www.wikidata.org/prop/direct/"
+
+INFO = {
+    "superclasses": {f"{DBO}MilitaryConflict": [f"{DBO}Event", f"{DBO}SocietalEvent"],
+                     f"{DBO}Person": [f"{DBO}Agent"],
+                     f"{WD}Q178561": [f"{WD}Q1190554"]},
+    "domain": {f"{DBO}isPartOfMilitaryConflict": [f"{DBO}MilitaryConflict"],
+               f"{DBO}commander": [f"{DBO}MilitaryConflict", f"{DBO}Person"],
+               f"{WD}P607": [f"{WD}Q178561", f"{WD}Q5"]},
+    "range": {f"{DBO}commander": [f"{DBO}Person"]},
+}
+
+
+def get_superclass_rows(ordering: Ordering, triple_df: pd.DataFrame, type_node: str) -> list:
+    """ Superclasses computed row by row (first implementation) """
+    lookup = ordering.info[ordering.type_node_to_pred[type_node]]
+    res = []
+    for predicate in triple_df.predicate:
+        if ordering.prefix_entity and ordering.prefix_prop_direct:
+            predicate = str(predicate).replace(ordering.prefix_prop_direct,
+                                               ordering.prefix_entity)
+            superclass = []
+            for elt in [var for var in lookup.get(predicate, []) \
+                if var in ordering.info["superclasses"]]:
+                superclass += ordering.info["superclasses"][elt] + [elt]
+            res.append(superclass)
+        else:
+            res.append([y for elt in lookup[predicate] \
+                for y in ordering.info["superclasses"].get(elt, [])] \
+                    if str(predicate) in lookup else [])
+    return res
+
+
+class TestOrdering(unittest.TestCase):
+    """ Test class for Ordering """
+    def setUp(self):
+        self.ordering = Ordering(interface=ListInterface(triples=[]))
+        self.ordering.info = INFO
+
+    def test_add_superclass_to_df(self):
+        """ Test add_superclass_to_df: same superclasses as row by row,
+        one list per row """
+        triple_df = pd.DataFrame({
+            "subject": [f"{DBR}Battle_of_Valmy", f"{DBR}Battle_of_Jemappes",
+                        f"{DBR}Battle_of_Fleurus", f"{DBR}Napoleon", f"{DBR}Paris"],
+            "predicate": [f"{DBO}isPartOfMilitaryConflict", f"{DBO}isPartOfMilitaryConflict",
+                          f"{DBO}commander", f"{DBO}wikiPageWikiLink", None],
+            "object": [f"{DBR}French_Revolutionary_Wars"] * 5}, index=[3, 5, 8, 13, 21])
+        for type_node in ["ingoing", "outgoing"]:
+            expected = get_superclass_rows(self.ordering, triple_df, type_node)
+            output = self.ordering.add_superclass_to_df(triple_df=triple_df.copy(),
+                                                        type_node=type_node)
+            self.assertEqual(output.superclass.tolist(), expected)
+            self.assertEqual(output.index.tolist(), triple_df.index.tolist())
+
+            # Updating the superclasses of one row doesn't change the other rows
+            for row in [0, 3]:
+                output.superclass.iloc[row].append(f"{DBO}Place")
+                self.assertEqual(output.superclass.iloc[row + 1], expected[row + 1])
+        self.assertEqual(INFO["superclasses"][f"{DBO}MilitaryConflict"],
+                         [f"{DBO}Event", f"{DBO}SocietalEvent"])
+
+    def test_add_superclass_to_df_prefix(self):
+        """ Test add_superclass_to_df with direct properties (e.g. Wikidata) """
+        self.ordering.prefix_entity, self.ordering.prefix_prop_direct = WD, WDT
+        triple_df = pd.DataFrame({"subject": [f"{WD}Q6534", f"{WD}Q6534", f"{WD}Q517"],
+                                  "predicate": [f"{WDT}P607", f"{WDT}P607", f"{WDT}P27"],
+                                  "object": [f"{WD}Q6540"] * 3})
+        output = self.ordering.add_superclass_to_df(triple_df=triple_df.copy(),
+                                                    type_node="ingoing")
+        self.assertEqual(output.superclass.tolist(),
+                         get_superclass_rows(self.ordering, triple_df, "ingoing"))
+        self.assertEqual(output.superclass.iloc[0], [f"{WD}Q1190554", f"{WD}Q178561"])
+        self.assertIsNot(output.superclass.iloc[0], output.superclass.iloc[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+Unittest of file `parallel_expansion.py`, class ParallelExpansion
+(workers query an empty HDT dataset: expansions without triples)
+python -m unittest -v test_parallel_expansion.py
+"""
+import os
+import shutil
+import unittest
+from tempfile import TemporaryDirectory
+
+from src.interface import Interface
+from src.expansion_cache import ExpansionCache
+from src.parallel_expansion import ParallelExpansion
+from src.synthetic_kg import generate_triples
+from src.tests.test_framework import get_synthetic_framework
+
+ARGS_FILTERING = {"when": 0, "where": 0, "who": 0, "point_in_time": None,
+                  "start_dates": None, "end_dates": None, "places": None,
+                  "people": None, "dataset_type": "dbpedia"}
+
+
+class TestParallelExpansion(unittest.TestCase):
+    """ Test class for ParallelExpansion """
+    def setUp(self):
+        self.folder = TemporaryDirectory()
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def get_parallel_expansion(self) -> ParallelExpansion:
+        """ Two workers, with an expansion cache """
+        cache = ExpansionCache(folder=os.path.join(self.folder.name, "cache"),
+                               dataset="empty", interface=Interface())
+        return ParallelExpansion(
+            workers=2,
+            args_interface={"folder_hdt": self.folder.name, "nested_dataset": 0},
+            args_expansion={"rdf_type": [], "args_filtering": ARGS_FILTERING,
+                            "expansion_cache": cache})
+
+    def test_call(self):
+        """ Test outputs in order, and cache counters of the workers """
+        parallel_expansion = self.get_parallel_expansion()
+        list_args = [{"node": f"ex:{name}", "path": "", "predicate": [], "iteration": 1} \
+            for name in ["a", "b", "c"]]
+        try:
+            for _ in range(2):
+                output = parallel_expansion(list_args=list_args, dates=None)
+                self.assertEqual(len(output), 3)
+                self.assertTrue(all(len(elt) == 5 for elt in output))
+            self.assertEqual(parallel_expansion.stats,
+                             {"expansion_cache": {"hits": 3, "misses": 3}})
+        finally:
+            parallel_expansion.close()
+
+    def test_close(self):
+        """ Test workers stopped """
+        parallel_expansion = self.get_parallel_expansion()
+        processes = list(parallel_expansion.pool._pool)
+        parallel_expansion.close()
+        self.assertFalse(any(process.is_alive() for process in processes))
+
+    def test_close_search_failed(self):
+        """ Test workers stopped when the search fails """
+        framework = get_synthetic_framework(
+            folder=self.folder.name, triples=generate_triples(nb_nodes=50),
+            name_exp="test_close_search_failed", workers=2)
+        processes = []
+
+        def merge_outputs(**_):
+            processes.extend(framework.parallel_expansion.pool._pool)
+            raise ValueError("failed")
+        framework.merge_outputs = merge_outputs
+        with self.assertRaises(ValueError):
+            framework()
+        shutil.rmtree(framework.save_folder)
+        self.assertIsNone(framework.parallel_expansion)
+        self.assertEqual(len(processes), 2)
+        self.assertFalse(any(process.is_alive() for process in processes))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""
+Unittest of file `profiler.py`, classes Profiler and NullProfiler
+python -m unittest -v test_profiler.py
+"""
+import os
+import json
+import unittest
+from tempfile import TemporaryDirectory
+
+from src.profiler import Profiler, NULL_PROFILER
+
+
+class TestProfiler(unittest.TestCase):
+    """ Test class for Profiler """
+    def test_stages(self):
+        """ Test timings and counters per iteration, per node and in total """
+        profiler = Profiler()
+        for iteration in [1, 2]:
+            profiler.start_iteration(iteration)
+            with profiler.node("ex:a"):
+                with profiler.stage("kg_query"):
+                    pass
+                profiler.add("kg_query", triples=3)
+            profiler.add_node("ex:a", ingoing=2)
+            with self.assertRaises(ValueError):
+                with profiler.stage("save"):
+                    raise ValueError()
+            profiler.end_iteration()
+
+        report = profiler.get_report()
+        self.assertEqual(list(report["iterations"]), ["1", "2"])
+        stages = report["iterations"]["1"]["stages"]
+        self.assertEqual(sorted(stages), ["expansion", "kg_query", "save"])
+        self.assertEqual(stages["kg_query"]["calls"], 1)
+        self.assertEqual(stages["kg_query"]["triples"], 3)
+        self.assertEqual(report["iterations"]["1"]["nodes"]["ex:a"]["ingoing"], 2)
+        self.assertGreaterEqual(report["iterations"]["1"]["time"],
+                                stages["expansion"]["time"])
+        self.assertEqual(report["total"]["kg_query"]["triples"], 6)
+        self.assertEqual(report["total"]["save"]["calls"], 2)
+
+    def test_save(self):
+        """ Test that the report is saved as JSON """
+        profiler = Profiler()
+        profiler.start_iteration(1)
+        profiler.add("save", bytes=10)
+        with TemporaryDirectory() as folder:
+            path = os.path.join(folder, "timings.json")
+            profiler.save(path)
+            with open(path, "r", encoding="utf-8") as openfile:
+                self.assertEqual(json.load(openfile), profiler.get_report())
+
+    def test_null_profiler(self):
+        """ Test that nothing is recorded when profiling is disabled """
+        self.assertFalse(NULL_PROFILER.enabled)
+        NULL_PROFILER.start_iteration(1)
+        with NULL_PROFILER.stage("kg_query"):
+            NULL_PROFILER.add("kg_query", triples=3)
+        with NULL_PROFILER.node("ex:a"):
+            NULL_PROFILER.add_node("ex:a", ingoing=2)
+        NULL_PROFILER.end_iteration()
+        self.assertEqual(NULL_PROFILER.get_report(), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
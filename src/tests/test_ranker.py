@@ -13,7 +13,7 @@ Different types of ranking strategies:
 """
 
 import unittest
-from src.ranker import Ranker
+from src.ranker import Ranker, PathOccurrences
 
 class TestRanker(unittest.TestCase):
     """ Test class for Ranker """
@@ -88,3 +88,32 @@ class TestRanker(unittest.TestCase):
 
         self.assertEqual(ranker(occurences_expected)[0],
                           "http://www.w3.org/2004/02/skos/core#broader")
+
+    def test_call_incremental(self):
+        """ Ranking after increment/decrement/remove on PathOccurrences """
+        ranker = Ranker(type_ranking='pred_freq')
+        occurences = PathOccurrences()
+        occurences.increment("3-http://purl.org/dc/terms/subject", 87)
+        occurences.increment("1-http://dbpedia.org/ontology/isPartOfMilitaryConflict", 13)
+        occurences.increment("1-http://dbpedia.org/property/partof", 13)
+
+        # Priority 1 first, ties broken by insertion order
+        self.assertEqual(ranker(occurences),
+                         ("1-http://dbpedia.org/ontology/isPartOfMilitaryConflict", 13))
+
+        occurences.decrement("1-http://dbpedia.org/ontology/isPartOfMilitaryConflict")
+        self.assertEqual(ranker(occurences), ("1-http://dbpedia.org/property/partof", 13))
+
+        occurences.remove("1-http://dbpedia.org/property/partof")
+        occurences.remove("1-http://dbpedia.org/ontology/isPartOfMilitaryConflict")
+        self.assertEqual(ranker(occurences), ("3-http://purl.org/dc/terms/subject", 87))
+
+    def test_call_thresholds(self):
+        """ Paths within (low_threshold, high_threshold) ranked first """
+        occurences = PathOccurrences({"1-a": 250, "1-b": 150, "1-c": 1, "1-d": 3})
+        self.assertEqual(Ranker(type_ranking='pred_freq')(occurences)[0], "1-b")
+        self.assertEqual(Ranker(type_ranking='inverse_pred_freq')(occurences)[0], "1-d")
+
+        occurences = PathOccurrences({"1-a": 250, "1-c": 1})
+        self.assertEqual(Ranker(type_ranking='pred_freq')(occurences)[0], "1-a")
+        self.assertEqual(Ranker(type_ranking='inverse_pred_freq')(occurences)[0], "1-c")
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+"""
+Unittest of file `registry.py`
+python -m unittest -v test_registry.py
+"""
+import unittest
+
+from src import registry
+
+
+class TestRegistry(unittest.TestCase):
+    """ Test class for the registry of shared files """
+    def test_get_dataset_config(self):
+        """ Test that a dataset config is loaded once, then shared """
+        config = registry.get_dataset_config("dbpedia")
+        self.assertEqual(config["config_type"], "dbpedia")
+        self.assertIs(config, registry.get_dataset_config("dbpedia"))
+
+        registry.clear()
+        self.assertIsNot(config, registry.get_dataset_config("dbpedia"))
+        self.assertEqual(config, registry.get_dataset_config("dbpedia"))
+
+    def test_get_domain_range_info(self):
+        """ Test that only known info can be loaded """
+        with self.assertRaises(ValueError):
+            registry.get_domain_range_info("dbpedia", "unknown")
+
+
+if __name__ == '__main__':
+    unittest.main()
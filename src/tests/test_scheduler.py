@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+Unittest of file `scheduler.py`, class Scheduler
+python -m unittest -v test_scheduler.py
+"""
+import os
+import time
+import unittest
+from tempfile import TemporaryDirectory
+
+from src.scheduler import Scheduler, get_gold_standard_size
+
+
+def fake_search(config: dict, walk: str) -> dict:
+    """ Search replaced by a sleep, fails if asked to """
+    if config.get("fail"):
+        raise ValueError("failed")
+    time.sleep(config["sleep"])
+    return {"save_folder": f"{walk}-{config['sleep']}"}
+
+
+def fake_search_catching(config: dict, walk: str) -> dict:
+    """ Search catching all errors (e.g. failed SPARQL requests) """
+    try:
+        time.sleep(config["sleep"])
+    except Exception:  # pylint: disable=broad-except
+        pass
+    return {"save_folder": walk}
+
+
+class TestScheduler(unittest.TestCase):
+    """ Test class for Scheduler """
+    def setUp(self):
+        self.folder = TemporaryDirectory()
+        self.ledger_path = os.path.join(self.folder.name, "ledger.jsonl")
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def get_scheduler(self) -> Scheduler:
+        """ Scheduler with two workers, running `fake_search` """
+        return Scheduler(workers=2, ledger_path=self.ledger_path, timeout=2,
+                         run_job=fake_search)
+
+    def test_call(self):
+        """ Test statuses of jobs, and that done jobs are skipped on rerun """
+        scheduler = self.get_scheduler()
+        configs = [{"sleep": 0}, {"sleep": 0.1, "iterations": 2}, {"sleep": 10},
+                   {"fail": 1}]
+        for config in configs:
+            self.assertTrue(scheduler.add(config=config, walk="informed", group="event"))
+        self.assertFalse(scheduler.add(config=configs[0], walk="informed", group="event"))
+
+        records = scheduler()
+        statuses = sorted(record["status"] for record in records)
+        self.assertEqual(statuses, ["done", "done", "error", "timeout"])
+        self.assertIn("informed-0", [record.get("save_folder") for record in records])
+
+        scheduler = self.get_scheduler()
+        self.assertEqual(len(scheduler.ledger), 4)
+        added = [scheduler.add(config=config, walk="informed", group="event") \
+            for config in configs]
+        self.assertEqual(added, [False, False, True, True])
+
+    def test_estimate_cost(self):
+        """ Test cost from previous durations, in the same group first """
+        scheduler = self.get_scheduler()
+        scheduler.ledger = [
+            {"status": "done", "group": "a", "duration": 10, "iterations": 2},
+            {"status": "done", "group": "b", "duration": 1, "iterations": 1},
+            {"status": "timeout", "group": "b", "duration": 100, "iterations": 1},
+        ]
+        self.assertEqual(scheduler.estimate_cost({"group": "a", "iterations": 3}), 15)
+        self.assertEqual(scheduler.estimate_cost({"group": "b", "iterations": 3}), 3)
+        self.assertEqual(scheduler.estimate_cost({"group": "c", "iterations": 1}), 3)
+
+    def test_estimate_cost_prior(self):
+        """ Test cost before any job is done: prior, default = size of the gold standard """
+        gold_standard = os.path.join(self.folder.name, "gs_events.csv")
+        with open(gold_standard, "w", encoding="utf-8") as openfile:
+            openfile.write(",linkDBpediaEn\n0,ex:battle1\n1,ex:battle2\n")
+        self.assertEqual(get_gold_standard_size({"gold_standard": gold_standard}), 2)
+        self.assertEqual(get_gold_standard_size(
+            {"sweep": [{"gold_standard": gold_standard}] * 2}), 4)
+
+        scheduler = self.get_scheduler()
+        scheduler.add(config={"iterations": 3, "gold_standard": gold_standard},
+                      walk="informed", group="a")
+        scheduler.add(config={"iterations": 3}, walk="informed", group="b")
+        scheduler.add(config={"iterations": 2}, walk="informed", group="c", prior=10)
+        self.assertEqual([scheduler.estimate_cost(job) for job in scheduler.jobs], [6, 3, 20])
+
+    def test_timeout_not_caught(self):
+        """ Test timeout of a search catching all errors """
+        scheduler = Scheduler(workers=1, ledger_path=self.ledger_path, timeout=1,
+                              run_job=fake_search_catching)
+        scheduler.add(config={"sleep": 10}, walk="informed", group="event")
+        start = time.time()
+        records = scheduler()
+        self.assertEqual(records[0]["status"], "timeout")
+        self.assertLess(time.time() - start, 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+Unittest of file `sparql_interface.py`, classes SPARQLQuery and SPARQLInterface
+(queries are recorded instead of being sent to an endpoint)
+python -m unittest -v test_sparql_interface.py
+"""
+import unittest
+
+from src.sparql_interface import SPARQLQuery, SPARQLInterface
+
+DBR = "http://dbpedia.org/resource/"
+DBO = "http://dbpedia.org/ontology/"
+RDF_TYPE = "http://www.w3.org/1999/02/22-rdf-syntax-ns#type"
+
+
+class RecordingSPARQLInterface(SPARQLInterface):
+    """ Queries recorded, endpoint answering with `triples` """
+    def __init__(self, triples: list[(str, str, str)], **kwargs):
+        SPARQLInterface.__init__(self, **kwargs)
+        self.triples = triples
+        self.queries = []
+
+    def call_endpoint(self, query: str) -> list[(str, str, str)]:
+        self.queries.append(query)
+        return self.triples
+
+
+class TestSPARQLQuery(unittest.TestCase):
+    """ Test class for SPARQLQuery """
+    def setUp(self):
+        self.sparql_query = SPARQLQuery()
+
+    def test_iri_kept(self):
+        """ Test that `#`, brackets and commas of URIs are not percent-encoded """
+        query = self.sparql_query(params={
+            "subject": f"{DBR}Siege_of_Maubeuge_(1793)",
+            "predicate": [RDF_TYPE, f"{DBO}date"],
+            "object": f"{DBR}Insurrection_of_12_Germinal,_Year_III"})
+        self.assertIn(f"VALUES ?s {{ <{DBR}Siege_of_Maubeuge_(1793)> }}", query)
+        self.assertIn(f"VALUES ?p {{ <{RDF_TYPE}> <{DBO}date> }}", query)
+        self.assertIn(f"VALUES ?o {{ <{DBR}Insurrection_of_12_Germinal,_Year_III> }}", query)
+        self.assertNotIn("%23", query)
+        self.assertNotIn("<FILTER-predicate>", query)
+
+    def test_encoded(self):
+        """ Test that characters not allowed in IRIs are still encoded """
+        query = self.sparql_query(params={"subject": f"{DBR}A B"})
+        self.assertIn(f"<{DBR}A+B>", query)
+
+    def test_predicate_not_in(self):
+        """ Test FILTER clause on excluded predicates """
+        query = self.sparql_query(params={"subject": f"{DBR}French_Revolution",
+                                          "predicate_not_in": [RDF_TYPE, f"{DBO}date"]})
+        self.assertIn(f"FILTER(?p NOT IN (<{RDF_TYPE}>, <{DBO}date>))", query)
+        self.assertNotIn("VALUES ?p", query)
+
+
+class TestSPARQLInterface(unittest.TestCase):
+    """ Test class for SPARQLInterface """
+    def test_get_triples_many(self):
+        """ Test batched lookup: one query per chunk of subjects,
+        literals skipped, only triples with the predicates asked for """
+        interface = RecordingSPARQLInterface(
+            triples=[(f"{DBR}Storming_of_the_Bastille", RDF_TYPE, f"{DBO}Event"),
+                     (f"{DBR}Storming_of_the_Bastille", f"{DBO}place", f"{DBR}Paris")],
+            batch_size=2)
+        subjects = [f"{DBR}Storming_of_the_Bastille", '"1789-07-14"',
+                    f"{DBR}Day_of_Daggers", f"{DBR}13_Vendémiaire"]
+        triples = interface.get_triples_many(subjects=subjects, predicates=[RDF_TYPE])
+
+        self.assertEqual(len(interface.queries), 2)
+        self.assertIn(f"<{DBR}Storming_of_the_Bastille> <{DBR}Day_of_Daggers>",
+                      interface.queries[0])
+        self.assertNotIn("1789", interface.queries[0])
+        self.assertIn(f"VALUES ?p {{ <{RDF_TYPE}> }}", interface.queries[1])
+        self.assertEqual(triples,
+                         [(f"{DBR}Storming_of_the_Bastille", RDF_TYPE, f"{DBO}Event")] * 2)
+
+    def test_get_triples_filtered(self):
+        """ Test predicate filter pushed down to the endpoint: no skipped triples counted """
+        interface = RecordingSPARQLInterface(triples=[])
+        interface.get_triples_filtered(params=dict(subject=f"{DBR}Paris"),
+                                       filter_pred=[RDF_TYPE], filter_keep=False)
+        self.assertIn(f"FILTER(?p NOT IN (<{RDF_TYPE}>))", interface.queries[0])
+        self.assertEqual(interface.get_pushdown_stats(), {})
+
+    def test_get_triples_many_no_predicate(self):
+        """ Test batched lookup without predicates: no query """
+        interface = RecordingSPARQLInterface(triples=[])
+        self.assertEqual(interface.get_triples_many(subjects=[f"{DBR}Paris"], predicates=[]), [])
+        self.assertEqual(interface.queries, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
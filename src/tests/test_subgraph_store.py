@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+Unittest of file `subgraph_store.py`, class SubgraphStore
+python -m unittest -v test_subgraph_store.py
+"""
+import unittest
+import pandas as pd
+from src.subgraph_store import SubgraphStore
+
+INGOING = pd.DataFrame({
+    "subject": ["ex:battle1", "ex:battle2", "ex:battle1"],
+    "predicate": ["ex:partOf", "ex:partOf", "ex:place"],
+    "object": ["ex:war", "ex:war", "ex:war"],
+    "type_df": ["ingoing"] * 3
+})
+
+OUTGOING = pd.DataFrame({
+    "subject": ["ex:war", "ex:war"],
+    "predicate": ["ex:partOf", "ex:place"],
+    "object": ["ex:bigger_war", "ex:battle1"],
+    "type_df": ["outgoing"] * 2
+})
+
+
+class TestSubgraphStore(unittest.TestCase):
+    """ Test class for SubgraphStore """
+    def setUp(self):
+        # chunk_size=4: second append triggers a chunk, third one stays buffered
+        self.store = SubgraphStore(chunk_size=4)
+        self.store.append(INGOING, iteration=1)
+        self.store.append(OUTGOING, iteration=1)
+        self.store.append(INGOING.iloc[1:2], iteration=2)
+
+    def test_to_df(self):
+        """ Test to_df: same rows as concatenating the dataframes """
+        expected = pd.concat([INGOING.assign(iteration=1), OUTGOING.assign(iteration=1),
+                              INGOING.iloc[1:2].assign(iteration=2)], ignore_index=True)
+        output = self.store.to_df()
+        self.assertEqual(len(self.store), 6)
+        self.assertEqual(list(output.columns),
+                         ["subject", "predicate", "object", "type_df", "iteration"])
+        self.assertEqual(output.astype(str).values.tolist(),
+                         expected[output.columns].astype(str).values.tolist())
+        self.assertEqual(self.store.to_df(categorical=True).astype(str).values.tolist(),
+                         output.astype(str).values.tolist())
+
+    def test_encoding(self):
+        """ Test values interned once """
+        self.assertEqual(len(self.store.values), 6)
+        self.assertEqual(len(self.store.chunks), 1)
+        self.assertEqual(len(self.store.buffer), 1)
+
+    def test_get_events(self):
+        """ Test get_events """
+        self.assertEqual(self.store.get_events(),
+                         ["ex:battle1", "ex:battle2", "ex:bigger_war", "ex:battle1"])
+
+    def test_cache_invalidated(self):
+        """ Test dataframe materialised again after append """
+        self.assertEqual(self.store.to_df().shape[0], 6)
+        self.store.append(OUTGOING, iteration=3)
+        self.assertEqual(self.store.to_df().shape[0], 8)
+
+
+if __name__ == '__main__':
+    unittest.main()
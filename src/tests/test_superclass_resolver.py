@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""
+Unittest of file `superclass_resolver.py`, class SuperclassResolver
+python -m unittest -v test_superclass_resolver.py
+"""
+import unittest
+from src.superclass_resolver import SuperclassResolver
+
+PARENTS = {
+    "Battle": "MilitaryConflict",
+    "Siege": "MilitaryConflict",
+    "MilitaryConflict": "SocietalEvent",
+    "SocietalEvent": "Event",
+}
+
+class TestSuperclassResolver(unittest.TestCase):
+    """ Test class for SuperclassResolver """
+    def setUp(self):
+        self.calls = []
+
+    def get_parent(self, node):
+        """ Direct superclass, tracking calls """
+        self.calls.append(node)
+        return PARENTS.get(node)
+
+    def test_call(self):
+        """ Root of chains, each class queried once """
+        resolver = SuperclassResolver(get_parent=self.get_parent)
+        self.assertEqual(resolver("Battle"), "Event")
+        self.assertEqual(len(self.calls), 4)
+
+        # Path compression: all nodes of the chain are cached
+        for node in ["Battle", "MilitaryConflict", "SocietalEvent", "Event"]:
+            self.assertEqual(resolver(node), "Event")
+        self.assertEqual(len(self.calls), 4)
+
+        # Shared ancestors are not walked again
+        self.assertEqual(resolver("Siege"), "Event")
+        self.assertEqual(self.calls[4:], ["Siege"])
+
+        self.assertEqual(resolver("Person"), "Person")
+
+    def test_max_size(self):
+        """ Cache bounded in size """
+        resolver = SuperclassResolver(get_parent=self.get_parent, max_size=2)
+        resolver("Battle")
+        self.assertEqual(len(resolver.cache), 2)
+        self.assertEqual(resolver("Battle"), "Event")
+
+
+if __name__ == '__main__':
+    unittest.main()
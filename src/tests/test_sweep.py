@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+Unittest of file `sweep.py`, class SharedExpansion
+python -m unittest -v test_sweep.py
+"""
+import os
+import shutil
+import unittest
+from tempfile import TemporaryDirectory
+
+from src.expansion import NodeExpansion
+from src.sweep import SharedExpansion, Sweep
+from src.synthetic_kg import generate_triples, get_degrees, DBO
+from src.tests.test_expansion import ARGS_FILTERING, get_triples
+from src.tests.test_framework import ListInterface, get_synthetic_framework
+
+DATES = ["1750-01-01", "1850-12-31"]
+TRIPLES = generate_triples(nb_nodes=200)
+
+
+class CallCountInterface(ListInterface):
+    """ Counting the number of times the triples of a node are retrieved """
+    def __init__(self, triples: list[(str, str, str)], **kwargs):
+        ListInterface.__init__(self, triples=triples, **kwargs)
+        self.nb_calls = 0
+
+    def __call__(self, node: str, predicate: list[str]):
+        self.nb_calls += 1
+        return ListInterface.__call__(self, node=node, predicate=predicate)
+
+
+class TestSharedExpansion(unittest.TestCase):
+    """ Test class for SharedExpansion """
+    def setUp(self):
+        self.memo, self.stats = {}, {"hits": 0, "misses": 0}
+        # Same KG, different filtering settings
+        settings = [(ARGS_FILTERING, [("event", f"{DBO}Event")]),
+                    (dict(ARGS_FILTERING, when=0, where=0), [("event", f"{DBO}Event")]),
+                    (ARGS_FILTERING, [("place", f"{DBO}Place")])]
+        self.interfaces = [CallCountInterface(triples=TRIPLES) for _ in range(4)]
+        self.expanders = [NodeExpansion(rdf_type=rdf_type, args_filtering=args_filtering,
+                                        interface=interface) \
+            for (args_filtering, rdf_type), interface in zip(
+                settings + [settings[0]], self.interfaces)]
+        self.shared = [
+            SharedExpansion(node_expander=expander, key=key, memo=self.memo, stats=self.stats) \
+                for expander, key in zip(self.expanders, ["a", "a", "a", "b"])]
+        self.args = {"node": get_degrees(triples=TRIPLES).index[0], "predicate": []}
+
+    def test_call(self):
+        """ Test that triples are retrieved once per key and node, then filtered
+        by each search as without sharing """
+        outputs = [shared(args=self.args, dates=DATES) for shared in self.shared]
+        self.assertEqual(self.stats, {"hits": 2, "misses": 2})
+        self.assertEqual([interface.nb_calls for interface in self.interfaces], [1, 0, 0, 1])
+
+        expected = [expander(args=self.args, dates=DATES) for expander in self.expanders]
+        self.assertEqual([get_triples(output) for output in outputs],
+                         [get_triples(output) for output in expected])
+        self.assertNotEqual(get_triples(outputs[0]), get_triples(outputs[1]))
+        self.assertNotEqual(get_triples(outputs[0]), get_triples(outputs[2]))
+
+        # Outputs modified by a search (e.g. ordering): not shared
+        outputs[0][1]["superclass"] = [[]] * outputs[0][1].shape[0]
+        outputs[0][4].append("ex:d")
+        output = self.shared[1](args=self.args, dates=DATES)
+        self.assertNotIn("superclass", output[1].columns)
+        self.assertNotIn("ex:d", output[4])
+
+    def test_getattr(self):
+        """ Test that other attributes are the ones of the NodeExpansion """
+        output = list(self.shared[0].iter_chunks(args=self.args, dates=DATES, chunk_size=7))
+        self.assertTrue(len(output) > 1)
+        self.assertEqual(self.stats, {"hits": 0, "misses": 0})
+
+
+class TestSweep(unittest.TestCase):
+    """ Test class for Sweep """
+    def test_get_expansion_key(self):
+        """ Test that searches differing only in filtering settings share expansions,
+        not searches on different datasets """
+        configs = [{}, {"filtering": {"when": 1, "where": 1}, "start_date": DATES[0],
+                        "end_date": DATES[1]},
+                   {"rdf_type": [("place", f"{DBO}Place")]}, {}]
+        with TemporaryDirectory() as folder, TemporaryDirectory() as other_folder:
+            frameworks = [get_synthetic_framework(
+                folder=folder if i < 3 else other_folder, triples=TRIPLES,
+                name_exp=f"test_sweep_{i}", **config) for i, config in enumerate(configs)]
+        for framework in frameworks:
+            if os.path.exists(framework.save_folder):
+                shutil.rmtree(framework.save_folder)
+        keys = [Sweep.get_expansion_key(framework) for framework in frameworks]
+        self.assertEqual(len(set(keys[:3])), 1)
+        self.assertNotEqual(keys[0], keys[3])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+Unittest of file `synthetic_kg.py`
+python -m unittest -v test_synthetic_kg.py
+"""
+import os
+import unittest
+from tempfile import TemporaryDirectory
+
+from src.synthetic_kg import DBO, DBR, RDF_TYPE, generate_triples, get_degrees, \
+    get_events, write_ntriples, split_triples
+
+
+class TestSyntheticKG(unittest.TestCase):
+    """ Test class for the generation of synthetic KGs """
+    def test_generate_triples(self):
+        """ Test that KGs are reproducible, with types and dates """
+        triples = generate_triples(nb_nodes=200, mean_degree=4, seed=1)
+        self.assertEqual(triples, generate_triples(nb_nodes=200, mean_degree=4, seed=1))
+        self.assertNotEqual(triples, generate_triples(nb_nodes=200, mean_degree=4, seed=2))
+        self.assertEqual(len(triples), len(set(triples)))
+
+        types = {sub for sub, pred, obj in triples if pred == RDF_TYPE and obj == f"{DBO}Event"}
+        self.assertTrue(types)
+        self.assertTrue(all(sub.startswith(f"{DBR}Event_") for sub in types))
+
+        events = get_events(triples=triples, years=(1750, 1850))
+        self.assertTrue(set(events).issubset(types))
+
+    def test_hubs(self):
+        """ Test that the degree distribution is skewed with `alpha` """
+        uniform = get_degrees(generate_triples(nb_nodes=1000, alpha=0))
+        skewed = get_degrees(generate_triples(nb_nodes=1000, alpha=1.5))
+        self.assertGreater(skewed.iloc[0], 5 * uniform.iloc[0])
+
+    def test_split_triples(self):
+        """ Test documents of nested datasets: all triples, in blocks of the same size """
+        triples = generate_triples(nb_nodes=200, mean_degree=4)
+        docs = split_triples(triples=triples, nb_docs=4)
+        self.assertEqual(len(docs), 4)
+        self.assertEqual([triple for doc in docs for triple in doc], triples)
+        self.assertLessEqual(max(map(len, docs)) - min(map(len, docs)), 3)
+        self.assertEqual(split_triples(triples=triples[:2], nb_docs=4),
+                         [[triple] for triple in triples[:2]])
+
+    def test_write_ntriples(self):
+        """ Test N-Triples serialisation of URIs and literals """
+        triples = [(f"{DBR}Event_0", f"{DBO}date",
+                    '"1789-07-14"^^<http://www.w3.org/2001/XMLSchema#date>')]
+        with TemporaryDirectory() as folder:
+            path = os.path.join(folder, "kg.nt")
+            write_ntriples(triples=triples, path=path)
+            with open(path, "r", encoding="utf-8") as openfile:
+                self.assertEqual(
+                    openfile.read(),
+                    f"<{DBR}Event_0> <{DBO}date> " + \
+                        '"1789-07-14"^^<http://www.w3.org/2001/XMLSchema#date> .\n')
+
+
+if __name__ == '__main__':
+    unittest.main()
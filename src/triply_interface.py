@@ -7,6 +7,8 @@ from pandas.core.frame import DataFrame
 import requests
 from rdflib import Graph
 from rdflib.term import Literal
+from src.superclass_resolver import SuperclassResolver
+from src.node_filter import get_node_filter
 
 TPF_DBPEDIA = \
     "https://api.triplydb.com/datasets/DBpedia-association/snapshot-2021-09/fragments/?limit=10000"
@@ -38,6 +40,8 @@ class TriplInterface:
         self.end_date = dates[1]
 
         self.discard_nodes = ["http://dbpedia.org/resource/Category:"]
+        self.node_filter = get_node_filter(None, tuple(self.discard_nodes), ())
+        self.superclass_resolver = SuperclassResolver(get_parent=self._get_parent_class)
 
     def _run_get_request(self, params: dict[str, str]) -> bytes:
         """ Retrieving get curl request by chunks """
@@ -63,26 +67,25 @@ class TriplInterface:
         else:
             triples = [(a, b, c) for (a, b, c) in graph if str(b) not in filter_pred]
 
-        triples = [(a, b, c) for (a, b, c) in triples \
-            if not any(str(a).startswith(prefix) for prefix in self.discard_nodes)]
-        triples = [(a, b, c) for (a, b, c) in triples \
-            if not any(str(c).startswith(prefix) for prefix in self.discard_nodes)]
+        return self.node_filter(triples)
 
-        return triples
-
-    def get_superclass(self, node: str) -> str:
-        """ Superclass of a node
-        Most ancient ancestor before owl:Thing """
+    def _get_parent_class(self, node: str) -> str:
+        """ Direct superclass of a node, None if no superclass or if owl:Thing """
         info = self.run_request(
             params=dict(subject=str(node)),
             filter_pred=["http://www.w3.org/2000/01/rdf-schema#subClassOf"],
             filter_keep=True)
 
         if not info:
-            return node
+            return None
         if str(info[0][2]) == "http://www.w3.org/2002/07/owl#Thing":
-            return node
-        return self.get_superclass(str(info[0][2]))
+            return None
+        return str(info[0][2])
+
+    def get_superclass(self, node: str) -> str:
+        """ Superclass of a node
+        Most ancient ancestor before owl:Thing (memoised) """
+        return self.superclass_resolver(str(node))
 
     def _get_all_results(self, node: str, predicate: list[str]) \
         -> (list[(str, str, str)], list[(str, str, str)], list[(str, str, str)]):